@@ -1,66 +1,160 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from datetime import date, datetime
+from functools import partial
+from typing import Annotated, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 
+from app.helpers.etag import etagMatches
 from app.helpers.exception import BookingException
-from app.models.bookingBaseModel import BookingMutation, ReservationDate
+from app.helpers.serializer import BookingResponse
+from app.helpers.streaming import ndjsonStream, sseStream
+from app.models.bookingBaseModel import BookingMutation, BookingStatus, PaymentStatus, ReservationDate
+from app.core.compression import negotiateEncoding
+from app.core.config import settings
 from app.services.bookingService import BookingService
 
 router = APIRouter()
 
-bookingService = BookingService()
+def getBookingService(request: Request) -> BookingService:
+    return request.app.state.bookingService
+
+BookingServiceDependency = Annotated[BookingService, Depends(getBookingService)]
+
+def conditionalHeaders(etag: Optional[str]) -> dict:
+    headers = {"Cache-Control": "private, no-cache"}
+    if etag is not None:
+        headers["ETag"] = etag
+    return headers
 
 @router.post("/{userId}/{restaurantId}/create")
-async def createBooking(bookingMutation : BookingMutation, userId: str, restaurantId : str):
+async def createBooking(bookingMutation : BookingMutation, userId: str, restaurantId : str, bookingService: BookingServiceDependency, idempotencyKey: Optional[str] = Header(None, alias="Idempotency-Key")):
     try:
-      response = bookingService.createBooking(bookingMutation, userId, restaurantId)
-      return JSONResponse(status_code=response["statusCode"], content={"message": "Booking created successfully", "bookingId": response["bookingId"]})
+      response = await bookingService.createBooking(bookingMutation, userId, restaurantId, idempotencyKey)
+      headers = {"Idempotent-Replayed": "true"} if response.get("replayed") else None
+      return BookingResponse(status_code=response["statusCode"], content={"message": "Booking created successfully", "bookingId": response["bookingId"]}, headers=headers)
+    except BookingException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.post("/{userId}/{restaurantId}/createBulk")
+async def createBookings(bookingMutations : List[BookingMutation], userId: str, restaurantId : str, bookingService: BookingServiceDependency):
+    try:
+      response = await bookingService.createBookings(bookingMutations, userId, restaurantId)
+      return BookingResponse(status_code=response["statusCode"], content={"message": "Bookings processed successfully", "results": response["results"]})
     except BookingException as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
 
 @router.get("/get/restaurantId/{restaurantId}")
-async def retrieveBookingByRestaurantId(restaurantId: str):
+async def retrieveBookingByRestaurantId(restaurantId: str, bookingService: BookingServiceDependency, limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX), after: Optional[str] = None, includeArchived: bool = False, fields: Optional[str] = None, ifNoneMatch: Optional[str] = Header(None, alias="If-None-Match")):
     try:
-      response = bookingService.getBookingByRestaurantId(restaurantId)
-      return JSONResponse(status_code=response["statusCode"], content={"message": "Bookings fetched successfully", "bookings": response["bookings"]})
+      etag = await bookingService.getEtag("restaurant", restaurantId)
+      if etagMatches(ifNoneMatch, etag):
+        return Response(status_code=304, headers=conditionalHeaders(etag))
+      response = await bookingService.getBookingByRestaurantId(restaurantId, limit, after, includeArchived, fields, etag)
+      # "*" only matches once the read has found something to match
+      if etagMatches(ifNoneMatch, etag, exists=True):
+        return Response(status_code=304, headers=conditionalHeaders(etag))
+      return BookingResponse(status_code=response["statusCode"], content={"message": "Bookings fetched successfully", "bookings": response["bookings"], "nextCursor": response.get("nextCursor")}, headers=conditionalHeaders(etag))
     except BookingException as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
     
+@router.get("/export/restaurantId/{restaurantId}")
+async def exportBookingByRestaurantId(restaurantId: str, request: Request, bookingService: BookingServiceDependency, includeArchived: bool = False):
+    encoding = negotiateEncoding(request.headers.get("accept-encoding", ""))
+    headers = {"Content-Disposition": f'attachment; filename="bookings-{restaurantId}.ndjson"', "Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    batches = bookingService.exportBookingByRestaurantId(restaurantId, includeArchived)
+    return StreamingResponse(ndjsonStream(batches, encoding, settings.COMPRESSION_LEVEL), media_type="application/x-ndjson", headers=headers)
+
+@router.get("/events/restaurantId/{restaurantId}")
+async def streamBookingEvents(restaurantId: str, bookingService: BookingServiceDependency):
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(sseStream(partial(bookingService.events.subscribe, restaurantId), settings.EVENT_HEARTBEAT_SECONDS), media_type="text/event-stream", headers=headers)
+
 @router.get("/get/userId/{userId}")
-async def retrieveBookingByUserId(userId: str):
+async def retrieveBookingByUserId(userId: str, bookingService: BookingServiceDependency, limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX), after: Optional[str] = None, includeArchived: bool = False, fields: Optional[str] = None, ifNoneMatch: Optional[str] = Header(None, alias="If-None-Match")):
     try:
-       response = bookingService.getBookingByUserId(userId)
-       return JSONResponse(status_code=response["statusCode"], content={"message": "Bookings fetched successfully", "bookings": response["bookings"]})
+       etag = await bookingService.getEtag("user", userId)
+       if etagMatches(ifNoneMatch, etag):
+         return Response(status_code=304, headers=conditionalHeaders(etag))
+       response = await bookingService.getBookingByUserId(userId, limit, after, includeArchived, fields, etag)
+       # "*" only matches once the read has found something to match
+       if etagMatches(ifNoneMatch, etag, exists=True):
+         return Response(status_code=304, headers=conditionalHeaders(etag))
+       return BookingResponse(status_code=response["statusCode"], content={"message": "Bookings fetched successfully", "bookings": response["bookings"], "nextCursor": response.get("nextCursor")}, headers=conditionalHeaders(etag))
     except BookingException as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
 
 @router.get("/get/bookingId/{bookingId}")
-async def getBookingById(bookingId: str):
+async def getBookingById(bookingId: str, bookingService: BookingServiceDependency, includeArchived: bool = False, fields: Optional[str] = None, ifNoneMatch: Optional[str] = Header(None, alias="If-None-Match")):
     try:
-       response = bookingService.getBookingById(bookingId)
-       return JSONResponse(status_code=response["statusCode"], content={"message": "Booking fetched successfully", "booking": response["booking"]})
+       etag = await bookingService.getEtag("booking", bookingId)
+       if etagMatches(ifNoneMatch, etag):
+         return Response(status_code=304, headers=conditionalHeaders(etag))
+       response = await bookingService.getBookingById(bookingId, includeArchived, fields, etag)
+       # "*" only matches once the read has found something to match
+       if etagMatches(ifNoneMatch, etag, exists=True):
+         return Response(status_code=304, headers=conditionalHeaders(etag))
+       return BookingResponse(status_code=response["statusCode"], content={"message": "Booking fetched successfully", "booking": response["booking"]}, headers=conditionalHeaders(etag))
     except BookingException as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
     
-@router.get("/get/date")
-async def retrieveBookingByDate(bookingData: ReservationDate):
+@router.post("/get/bookingIds")
+async def getBookingsByIds(bookingIds: List[str], bookingService: BookingServiceDependency, includeArchived: bool = False, fields: Optional[str] = None):
+    try:
+       response = await bookingService.getBookingsByIds(bookingIds, includeArchived, fields)
+       return BookingResponse(status_code=response["statusCode"], content={"message": "Bookings fetched successfully", "results": response["results"]})
+    except BookingException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.get("/search")
+async def searchBookings(bookingService: BookingServiceDependency, startFrom: datetime = Query(alias="from"), to: datetime = Query(), restaurantId: Optional[str] = None, bookingStatus: Optional[BookingStatus] = None, paymentStatus: Optional[PaymentStatus] = None, limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX), after: Optional[str] = None, includeArchived: bool = False, fields: Optional[str] = None):
     try:
-       response = bookingService.getBookingByDate(bookingData.startFrom, bookingData.to)
-       return JSONResponse(status_code=response["statusCode"], content={"message": "Bookings fetched successfully", "bookings": response["bookings"]})
+       response = await bookingService.searchBookings(startFrom, to, restaurantId, bookingStatus, paymentStatus, limit, after, includeArchived, fields)
+       return BookingResponse(status_code=response["statusCode"], content={"message": "Bookings fetched successfully", "bookings": response["bookings"], "nextCursor": response.get("nextCursor")})
+    except BookingException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.get("/get/date", deprecated=True)
+async def retrieveBookingByDate(bookingData: ReservationDate, bookingService: BookingServiceDependency):
+    try:
+       response = await bookingService.getBookingByDate(bookingData.startFrom, bookingData.to)
+       return BookingResponse(status_code=response["statusCode"], content={"message": "Bookings fetched successfully", "bookings": response["bookings"]})
     except BookingException as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
     
+@router.get("/availability/restaurantId/{restaurantId}")
+async def retrieveAvailability(restaurantId: str, startFrom: datetime, bookingService: BookingServiceDependency, to: Optional[datetime] = None):
+    try:
+       response = await bookingService.getAvailability(restaurantId, startFrom, to)
+       return BookingResponse(status_code=response["statusCode"], content={"message": "Availability fetched successfully", "bookings": response["bookings"], "seatsTaken": response["seatsTaken"]})
+    except BookingException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.get("/stats/restaurantId/{restaurantId}")
+async def retrieveBookingStats(restaurantId: str, startFrom: date, to: date, bookingService: BookingServiceDependency):
+    try:
+       response = await bookingService.getBookingStats(restaurantId, startFrom, to)
+       return BookingResponse(status_code=response["statusCode"], content={"message": "Booking stats fetched successfully", "stats": response["stats"]})
+    except BookingException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.get("/cache/stats")
+async def retrieveCacheStats(bookingService: BookingServiceDependency):
+    return BookingResponse(status_code=200, content={"message": "Cache stats fetched successfully", "cache": bookingService.cache.stats(), "singleFlight": bookingService.singleFlight.stats()})
+
 @router.delete("/{userId}/cancel/{bookingId}")
-async def cancelBooking(bookingId: str, userId: str):
+async def cancelBooking(bookingId: str, userId: str, bookingService: BookingServiceDependency):
     try:
-        response = bookingService.cancelBooking(bookingId, userId)
-        return JSONResponse(status_code=response["statusCode"], content={"message": "Booking cancelled successfully", "bookingId": response["bookingId"]})
+        response = await bookingService.cancelBooking(bookingId, userId)
+        return BookingResponse(status_code=response["statusCode"], content={"message": "Booking cancelled successfully", "bookingId": response["bookingId"]})
     except BookingException as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
     
 @router.put("/{userId}/update/{bookingId}")
-async def updateBooking(bookingMutation : BookingMutation, userId: str, bookingId : str):
+async def updateBooking(bookingMutation : BookingMutation, userId: str, bookingId : str, bookingService: BookingServiceDependency):
     try:
-        response = bookingService.updateStatus(bookingMutation, userId, bookingId)
-        return JSONResponse(status_code=response["statusCode"], content={"message": "Booking updated successfully", "bookingId": response["bookingId"]})
+        response = await bookingService.updateStatus(bookingMutation, userId, bookingId)
+        return BookingResponse(status_code=response["statusCode"], content={"message": "Booking updated successfully", "bookingId": response["bookingId"]})
     except BookingException as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
\ No newline at end of file
@@ -0,0 +1,16 @@
+from typing import Optional
+from fastapi import APIRouter, Query
+
+from app.core.profiling import profiles
+from app.helpers.serializer import BookingResponse
+
+router = APIRouter()
+
+@router.get("/profiles")
+async def retrieveProfiles(limit: Optional[int] = Query(None, ge=1)):
+    return BookingResponse(status_code=200, content={"message": "Profiles fetched successfully", "profiles": profiles.recent(limit)})
+
+@router.delete("/profiles")
+async def clearProfiles():
+    profiles.clear()
+    return BookingResponse(status_code=200, content={"message": "Profiles cleared successfully"})
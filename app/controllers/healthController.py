@@ -0,0 +1,22 @@
+import asyncio
+from fastapi import APIRouter, Request
+
+from app.core.config import settings
+from app.helpers.serializer import BookingResponse
+
+router = APIRouter()
+
+@router.get("/live")
+async def retrieveLiveness():
+    return BookingResponse(status_code=200, content={"status": "live"})
+
+@router.get("/ready")
+async def retrieveReadiness(request: Request):
+    bookingService = getattr(request.app.state, "bookingService", None)
+    if bookingService is None:
+        return BookingResponse(status_code=503, content={"status": "starting"})
+    try:
+        await asyncio.wait_for(bookingService.repository.ping(), settings.READINESS_TIMEOUT_SECONDS)
+    except Exception as e:
+        return BookingResponse(status_code=503, content={"status": "unavailable", "detail": str(e) or type(e).__name__})
+    return BookingResponse(status_code=200, content={"status": "ready"})
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.helpers.metrics import registry
+
+router = APIRouter()
+
+@router.get("/metrics")
+async def retrieveMetrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,103 @@
+import gzip
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PREFERENCE = ("br", "gzip")
+
+def negotiateEncoding(acceptEncoding: str):
+    """Returns the accepted coding with the highest q-value, preferring br on
+    ties, or None when the client accepts neither."""
+    qualities = {}
+    for part in acceptEncoding.split(","):
+        coding, _, parameters = part.partition(";")
+        quality = 1.0
+        parameters = parameters.strip()
+        if parameters.startswith("q="):
+            try:
+                quality = float(parameters[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    best = None
+    for coding in PREFERENCE:
+        if coding == "br" and brotli is None:
+            continue
+        quality = qualities.get(coding, qualities.get("*", 0.0))
+        if quality > 0 and (best is None or quality > best[0]):
+            best = (quality, coding)
+    return best[1] if best is not None else None
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+class StreamCompressor:
+    """Compresses a streamed body chunk by chunk, flushing after each one so
+    every chunk can be decoded as soon as it reaches the client."""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self.compressor = brotli.Compressor(quality=level)
+        else:
+            self.compressor = zlib.compressobj(level, wbits=zlib.MAX_WBITS | 16)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self.compressor.process(chunk) + self.compressor.flush()
+        return self.compressor.compress(chunk) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+class CompressionMiddleware:
+    """Compresses whole response bodies of at least minimumSize bytes. Streamed
+    responses pass through untouched: the NDJSON export compresses itself and
+    server-sent events have to reach the client as soon as they are written."""
+
+    def __init__(self, app, minimumSize: int, level: int):
+        self.app = app
+        self.minimumSize = minimumSize
+        self.level = level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiateEncoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+
+        async def sendCompressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None:
+                return await send(message)
+
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if not message.get("more_body") and len(body) >= self.minimumSize and "content-encoding" not in headers:
+                body = compress(body, encoding, self.level)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                message = {**message, "body": body}
+            await send(start)
+            start = None
+            await send(message)
+
+        await self.app(scope, receive, sendCompressed)
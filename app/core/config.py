@@ -7,5 +7,66 @@ class Settings(BaseSettings):
     MONGODB_URI: str = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
     DB_NAME: str = os.getenv("DB_NAME", "BOOKING")
     COLLECTION_NAME: str = os.getenv("COLLECTION_NAME", "BOOKING")
+    STATS_COLLECTION_NAME: str = os.getenv("STATS_COLLECTION_NAME", "BOOKING_DAILY_STATS")
+    IDEMPOTENCY_COLLECTION_NAME: str = os.getenv("IDEMPOTENCY_COLLECTION_NAME", "BOOKING_IDEMPOTENCY_KEYS")
+    IDEMPOTENCY_TTL_SECONDS: int = os.getenv("IDEMPOTENCY_TTL_SECONDS", 86400)
+    VERSIONS_COLLECTION_NAME: str = os.getenv("VERSIONS_COLLECTION_NAME", "BOOKING_VERSIONS")
+    ARCHIVE_COLLECTION_NAME: str = os.getenv("ARCHIVE_COLLECTION_NAME", "BOOKING_ARCHIVE")
+    ARCHIVE_AFTER_DAYS: int = os.getenv("ARCHIVE_AFTER_DAYS", 90)
+    ARCHIVE_BATCH_SIZE: int = os.getenv("ARCHIVE_BATCH_SIZE", 500)
+    MIGRATIONS_COLLECTION_NAME: str = os.getenv("MIGRATIONS_COLLECTION_NAME", "BOOKING_MIGRATIONS")
+    STATS_MAX_DAYS: int = os.getenv("STATS_MAX_DAYS", 366)
+    MONGO_DRIVER: str = os.getenv("MONGO_DRIVER", "motor")
+    MONGO_MAX_POOL_SIZE: int = os.getenv("MONGO_MAX_POOL_SIZE", 100)
+    MONGO_MIN_POOL_SIZE: int = os.getenv("MONGO_MIN_POOL_SIZE", 10)
+    MONGO_MAX_IDLE_TIME_MS: int = os.getenv("MONGO_MAX_IDLE_TIME_MS", 300000)
+    MONGO_CONNECT_TIMEOUT_MS: int = os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)
+    MONGO_SOCKET_TIMEOUT_MS: int = os.getenv("MONGO_SOCKET_TIMEOUT_MS", 20000)
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000)
+    MONGO_WARMUP_CONNECTIONS: int = os.getenv("MONGO_WARMUP_CONNECTIONS", 10)
+    READINESS_TIMEOUT_SECONDS: float = os.getenv("READINESS_TIMEOUT_SECONDS", 1)
+    BOOKING_REPOSITORY: str = os.getenv("BOOKING_REPOSITORY", "mongo")
+    MONGODB_MOCK: bool = os.getenv("MONGODB_MOCK", False)
+    SEARCH_MAX_DAYS: int = os.getenv("SEARCH_MAX_DAYS", 92)
+    PAGE_SIZE_DEFAULT: int = os.getenv("PAGE_SIZE_DEFAULT", 50)
+    PAGE_SIZE_MAX: int = os.getenv("PAGE_SIZE_MAX", 200)
+    AVAILABILITY_REFRESH_SECONDS: int = os.getenv("AVAILABILITY_REFRESH_SECONDS", 300)
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_MAX_SIZE: int = os.getenv("CACHE_MAX_SIZE", 10000)
+    CACHE_TTL_SECONDS: float = os.getenv("CACHE_TTL_SECONDS", 30)
+    SINGLE_FLIGHT_REUSE_MS: float = os.getenv("SINGLE_FLIGHT_REUSE_MS", 0)
+    SINGLE_FLIGHT_MAX_ENTRIES: int = os.getenv("SINGLE_FLIGHT_MAX_ENTRIES", 10000)
+    ENSURE_INDEXES: bool = os.getenv("ENSURE_INDEXES", True)
+    BULK_CREATE_MAX: int = os.getenv("BULK_CREATE_MAX", 500)
+    BATCH_GET_MAX: int = os.getenv("BATCH_GET_MAX", 500)
+    EXPORT_BATCH_SIZE: int = os.getenv("EXPORT_BATCH_SIZE", 500)
+    COALESCE_INSERTS: bool = os.getenv("COALESCE_INSERTS", False)
+    COALESCE_WINDOW_MS: float = os.getenv("COALESCE_WINDOW_MS", 2)
+    COALESCE_MAX_BATCH: int = os.getenv("COALESCE_MAX_BATCH", 100)
+    COALESCE_MAX_PENDING: int = os.getenv("COALESCE_MAX_PENDING", 1000)
+    COALESCE_QUEUE_TIMEOUT_SECONDS: float = os.getenv("COALESCE_QUEUE_TIMEOUT_SECONDS", 1)
+    EVENT_SOURCE: str = os.getenv("EVENT_SOURCE", "auto")
+    EVENT_QUEUE_SIZE: int = os.getenv("EVENT_QUEUE_SIZE", 100)
+    EVENT_HEARTBEAT_SECONDS: float = os.getenv("EVENT_HEARTBEAT_SECONDS", 15)
+    SERVER_HOST: str = os.getenv("SERVER_HOST", "127.0.0.1")
+    SERVER_PORT: int = os.getenv("SERVER_PORT", 8001)
+    SERVER_WORKERS: int = os.getenv("SERVER_WORKERS", 1)
+    SERVER_LOOP: str = os.getenv("SERVER_LOOP", "auto")
+    SERVER_HTTP: str = os.getenv("SERVER_HTTP", "auto")
+    SERVER_KEEP_ALIVE_SECONDS: int = os.getenv("SERVER_KEEP_ALIVE_SECONDS", 5)
+    SERVER_BACKLOG: int = os.getenv("SERVER_BACKLOG", 2048)
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = os.getenv("SERVER_GRACEFUL_SHUTDOWN_SECONDS", 20)
+    SERVER_ACCESS_LOG: bool = os.getenv("SERVER_ACCESS_LOG", False)
+    SERVER_RELOAD: bool = os.getenv("SERVER_RELOAD", False)
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", True)
+    COMPRESSION_MIN_SIZE: int = os.getenv("COMPRESSION_MIN_SIZE", 1024)
+    COMPRESSION_LEVEL: int = os.getenv("COMPRESSION_LEVEL", 5)
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", False)
+    PROFILING_SLOW_MS: float = os.getenv("PROFILING_SLOW_MS", 500)
+    PROFILING_SAMPLE_RATE: float = os.getenv("PROFILING_SAMPLE_RATE", 0)
+    PROFILING_BUFFER_SIZE: int = os.getenv("PROFILING_BUFFER_SIZE", 200)
+    PROFILING_EXPLAIN: bool = os.getenv("PROFILING_EXPLAIN", True)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", True)
     
 settings = Settings()
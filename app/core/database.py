@@ -0,0 +1,39 @@
+import certifi
+from pymongo import MongoClient
+from app.core.config import settings
+
+def createMongoClient(isAsync: bool = False):
+    if settings.MONGODB_MOCK:
+        if isAsync:
+            from mongomock_motor import AsyncMongoMockClient
+            return AsyncMongoMockClient()
+        import mongomock
+        return mongomock.MongoClient()
+
+    options = {
+        "tlsCAFile": certifi.where(),
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGO_SOCKET_TIMEOUT_MS,
+        "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS
+    }
+    if settings.METRICS_ENABLED:
+        from app.core.metrics import mongoCommandMetrics
+        options["event_listeners"] = [mongoCommandMetrics]
+
+    if isAsync:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        return AsyncIOMotorClient(settings.MONGODB_URI, **options)
+    return MongoClient(settings.MONGODB_URI, **options)
+
+def createBookingRepository():
+    if settings.BOOKING_REPOSITORY == "memory":
+        from app.repositories.inMemoryBookingRepository import InMemoryBookingRepository
+        return InMemoryBookingRepository()
+
+    from app.repositories.mongoBookingRepository import MongoBookingRepository
+    isAsync = settings.MONGO_DRIVER == "motor"
+    return MongoBookingRepository(createMongoClient(isAsync), isAsync)
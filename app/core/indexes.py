@@ -0,0 +1,74 @@
+import argparse
+from datetime import datetime
+from pymongo import ASCENDING, IndexModel
+from app.core.config import settings
+from app.core.database import createMongoClient
+from app.helpers.exception import IndexVerificationError
+from app.services.bookingArchive import archiveQuery
+
+ACTIVE = {"status": 1}
+
+BOOKING_INDEXES = [
+    IndexModel([("restaurantId", ASCENDING), ("_id", ASCENDING)], name="restaurantId_active", partialFilterExpression=ACTIVE),
+    IndexModel([("created_by", ASCENDING), ("_id", ASCENDING)], name="createdBy_active", partialFilterExpression=ACTIVE),
+    IndexModel([("reservationDate.startFrom", ASCENDING), ("_id", ASCENDING)], name="startFrom_id_active", partialFilterExpression=ACTIVE),
+    IndexModel([("restaurantId", ASCENDING), ("reservationDate.startFrom", ASCENDING), ("_id", ASCENDING)], name="restaurantId_startFrom_active", partialFilterExpression=ACTIVE),
+    IndexModel([("reservationDate.to", ASCENDING)], name="to_active", partialFilterExpression=ACTIVE),
+    IndexModel([("updated_when", ASCENDING)], name="updatedWhen_cancelled", partialFilterExpression={"status": 0}),
+]
+
+# includeArchived reads page and search the archive by restaurant, user or date the same way
+ARCHIVE_INDEXES = BOOKING_INDEXES[:4]
+
+IDEMPOTENCY_INDEXES = [
+    IndexModel([("createdAt", ASCENDING)], name="createdAt_ttl", expireAfterSeconds=settings.IDEMPOTENCY_TTL_SECONDS),
+]
+
+def bookingQueries():
+    now = datetime.now()
+    return {
+        "getBookingByRestaurantId": ({"restaurantId": "explain", "status": 1}, [("_id", ASCENDING)]),
+        "getBookingByUserId": ({"created_by": "explain", "status": 1}, [("_id", ASCENDING)]),
+        "getBookingByDate": ({"status": 1, "$or": [{"reservationDate.startFrom": now}, {"reservationDate.to": now}]}, None),
+        "searchBookings": ({"status": 1, "reservationDate.startFrom": {"$gte": now, "$lt": now}}, [("reservationDate.startFrom", ASCENDING), ("_id", ASCENDING)]),
+        "searchBookingsByRestaurant": ({"restaurantId": "explain", "status": 1, "reservationDate.startFrom": {"$gte": now, "$lt": now}}, [("reservationDate.startFrom", ASCENDING), ("_id", ASCENDING)]),
+        "archiveBookings": (archiveQuery(now), None),
+    }
+
+def planStages(plan) -> list:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(planStages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(planStages(value))
+    return stages
+
+def verifyIndexes(collection):
+    failures = []
+    for name, (query, sort) in bookingQueries().items():
+        cursor = collection.find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        stages = planStages(cursor.explain()["queryPlanner"]["winningPlan"])
+        if "COLLSCAN" in stages or "IXSCAN" not in stages:
+            failures.append(f"{name} ({' <- '.join(stages)})")
+
+    if failures:
+        raise IndexVerificationError(failures)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the BOOKING collection indexes.")
+    parser.add_argument("--verify", action="store_true", help="explain() every service query and fail if it is not an IXSCAN")
+    args = parser.parse_args()
+
+    db = createMongoClient()[settings.DB_NAME]
+    collection = db[settings.COLLECTION_NAME]
+    ensured = collection.create_indexes(BOOKING_INDEXES) + db[settings.IDEMPOTENCY_COLLECTION_NAME].create_indexes(IDEMPOTENCY_INDEXES) + db[settings.ARCHIVE_COLLECTION_NAME].create_indexes(ARCHIVE_INDEXES)
+    print("Indexes ensured:", ", ".join(ensured))
+    if args.verify:
+        verifyIndexes(collection)
+        print("All booking queries use an index.")
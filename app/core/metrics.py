@@ -0,0 +1,53 @@
+import time
+from pymongo import monitoring
+from app.helpers.metrics import registry
+
+httpRequests = registry.counter("booking_http_requests", "HTTP requests by route and status code.", ("method", "route", "status"))
+httpLatency = registry.histogram("booking_http_request_duration_seconds", "HTTP request latency by route.", ("method", "route"))
+mongoLatency = registry.histogram("booking_mongo_command_duration_seconds", "MongoDB command latency by command name.", ("command",))
+mongoErrors = registry.counter("booking_mongo_command_errors", "Failed MongoDB commands by command name.", ("command",))
+singleFlightRequests = registry.counter("booking_singleflight_requests", "Read requests by operation and whether they ran the query (leader), joined one in flight (shared) or reused a recent result (reused).", ("operation", "outcome"))
+
+class MetricsMiddleware:
+    """Plain ASGI middleware so the only per-request work is two clock reads and
+    the status capture; requests are labelled by route template, not raw path."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def sendWithStatus(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        startedAt = time.perf_counter()
+        try:
+            await self.app(scope, receive, sendWithStatus)
+        finally:
+            elapsed = time.perf_counter() - startedAt
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            httpRequests.inc((scope["method"], path, status))
+            httpLatency.observe((scope["method"], path), elapsed)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongoLatency.observe((event.command_name,), event.duration_micros / 1e6)
+
+    def failed(self, event):
+        mongoLatency.observe((event.command_name,), event.duration_micros / 1e6)
+        mongoErrors.inc((event.command_name,))
+
+
+mongoCommandMetrics = MongoCommandMetrics()
@@ -0,0 +1,175 @@
+import asyncio
+import inspect
+import logging
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from app.core.config import settings
+from app.helpers.dates import utcNow
+
+currentProfile = ContextVar("currentProfile", default=None)
+
+logger = logging.getLogger(__name__)
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+def summarizeExplain(explain: dict) -> dict:
+    """Keeps the winning plan and the execution counters, which is what tells
+    an index miss apart from a slow server without storing every candidate plan."""
+    summary = {"winningPlan": explain.get("queryPlanner", {}).get("winningPlan")}
+    stats = explain.get("executionStats")
+    if stats:
+        summary["executionStats"] = {key: stats.get(key) for key in ("nReturned", "totalKeysExamined", "totalDocsExamined", "executionTimeMillis")}
+    return summary
+
+
+class RequestProfile:
+    def __init__(self):
+        self.startedAt = time.perf_counter()
+        self.serviceCalls = []
+        self.commands = []
+
+    def service(self, name: str, startedAt: float, endedAt: float):
+        self.serviceCalls.append((name, startedAt, endedAt))
+
+    def command(self, name: str, seconds: float, explain=None):
+        self.commands.append((name, seconds, explain))
+
+    def phases(self, respondedAt: float) -> dict:
+        if not self.serviceCalls:
+            return {"handler": _ms(respondedAt - self.startedAt)}
+        # parse covers routing, reading the body and pydantic validation; encode
+        # covers rendering the response after the last service call returned
+        return {
+            "parse": _ms(self.serviceCalls[0][1] - self.startedAt),
+            "service": _ms(sum(endedAt - startedAt for _, startedAt, endedAt in self.serviceCalls)),
+            "encode": _ms(respondedAt - self.serviceCalls[-1][2])
+        }
+
+
+class ProfileBuffer:
+    def __init__(self, size: int):
+        self.entries = deque(maxlen=size)
+
+    def append(self, entry: dict):
+        self.entries.append(entry)
+
+    def recent(self, limit: int = None) -> list:
+        entries = list(reversed(self.entries))
+        return entries[:limit] if limit is not None else entries
+
+    def clear(self):
+        self.entries.clear()
+
+
+profiles = ProfileBuffer(settings.PROFILING_BUFFER_SIZE)
+
+@contextmanager
+def profileCommand(name: str, explain=None):
+    """Times one repository call for the current request; callers check
+    currentProfile first so unprofiled calls skip the clock reads entirely."""
+    profile = currentProfile.get()
+    startedAt = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.command(name, time.perf_counter() - startedAt, explain)
+
+
+class ProfiledService:
+    """Wraps BookingService so each awaited method call is timed as the
+    service phase of the request that made it; other attributes pass through."""
+
+    def __init__(self, service):
+        self._service = service
+
+    def __getattr__(self, name):
+        attribute = getattr(self._service, name)
+        if not inspect.iscoroutinefunction(attribute):
+            return attribute
+
+        async def timed(*args, **kwargs):
+            profile = currentProfile.get()
+            if profile is None:
+                return await attribute(*args, **kwargs)
+            startedAt = time.perf_counter()
+            try:
+                return await attribute(*args, **kwargs)
+            finally:
+                profile.service(name, startedAt, time.perf_counter())
+        return timed
+
+
+class ProfilingMiddleware:
+    """Records per-phase timings for requests slower than slowSeconds, plus a
+    sampleRate fraction of the rest, into a bounded ring buffer. explain() for
+    the slowest find runs after the response has gone out."""
+
+    def __init__(self, app, slowSeconds: float, sampleRate: float, buffer: ProfileBuffer = profiles, explain: bool = True):
+        self.app = app
+        self.slowSeconds = slowSeconds
+        self.sampleRate = sampleRate
+        self.buffer = buffer
+        self.explain = explain
+        self.tasks = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile()
+        status = 500
+        respondedAt = None
+
+        async def sendWithTiming(message):
+            nonlocal status, respondedAt
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                respondedAt = time.perf_counter()
+            await send(message)
+
+        token = currentProfile.set(profile)
+        try:
+            await self.app(scope, receive, sendWithTiming)
+        finally:
+            currentProfile.reset(token)
+            endedAt = time.perf_counter()
+            total = endedAt - profile.startedAt
+            if total >= self.slowSeconds:
+                self._record(scope, profile, status, respondedAt or endedAt, total, "slow")
+            elif self.sampleRate and random.random() < self.sampleRate:
+                self._record(scope, profile, status, respondedAt or endedAt, total, "sampled")
+
+    def _record(self, scope, profile: RequestProfile, status: int, respondedAt: float, total: float, reason: str):
+        route = scope.get("route")
+        entry = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route.path if route is not None else None,
+            "status": status,
+            "reason": reason,
+            "recordedAt": utcNow(),
+            "totalMs": _ms(total),
+            "phases": profile.phases(respondedAt),
+            "serviceCalls": [{"name": name, "ms": _ms(endedAt - startedAt)} for name, startedAt, endedAt in profile.serviceCalls],
+            "commands": [{"name": name, "ms": _ms(seconds)} for name, seconds, _ in profile.commands]
+        }
+        self.buffer.append(entry)
+
+        explainable = [command for command in profile.commands if command[2] is not None]
+        if self.explain and reason == "slow" and explainable:
+            name, seconds, explain = max(explainable, key=lambda command: command[1])
+            task = asyncio.ensure_future(self._explain(entry, name, seconds, explain))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    @staticmethod
+    async def _explain(entry: dict, name: str, seconds: float, explain):
+        try:
+            plan = summarizeExplain(await explain())
+        except Exception as e:
+            plan = {"error": str(e) or type(e).__name__}
+        entry["explain"] = {"command": name, "ms": _ms(seconds), **plan}
@@ -0,0 +1,50 @@
+import os
+from app.core.config import settings
+
+def availableCpus() -> int:
+    # affinity reflects cpusets (docker --cpuset-cpus), cpu_count() does not
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def workerCount() -> int:
+    if settings.SERVER_RELOAD:
+        return 1
+    workers = settings.SERVER_WORKERS or availableCpus()
+    if workers > 1:
+        # each worker is its own process, so anything kept in process memory
+        # would serve other workers' writes stale or not at all
+        if settings.BOOKING_REPOSITORY == "memory":
+            raise ValueError("BOOKING_REPOSITORY=memory keeps bookings per process, run it with SERVER_WORKERS=1")
+        if settings.CACHE_BACKEND == "memory":
+            raise ValueError("CACHE_BACKEND=memory is not invalidated by other workers, use a shared CACHE_BACKEND or SERVER_WORKERS=1")
+        # change streams also feed each worker's availability index
+        if settings.EVENT_SOURCE == "local":
+            raise ValueError("EVENT_SOURCE=local only streams the answering worker's writes, use EVENT_SOURCE=changeStream or SERVER_WORKERS=1")
+    return workers
+
+def serverOptions() -> dict:
+    return {
+        "host": settings.SERVER_HOST,
+        "port": settings.SERVER_PORT,
+        "workers": workerCount(),
+        # auto picks uvloop and httptools when they are installed
+        "loop": settings.SERVER_LOOP,
+        "http": settings.SERVER_HTTP,
+        "backlog": settings.SERVER_BACKLOG,
+        "timeout_keep_alive": settings.SERVER_KEEP_ALIVE_SECONDS,
+        # on SIGTERM uvicorn stops accepting and waits this long for in-flight
+        # requests; open event streams are cancelled when it runs out
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        "access_log": settings.SERVER_ACCESS_LOG,
+        "reload": settings.SERVER_RELOAD
+    }
+
+def run():
+    import uvicorn
+    # workers are spawned processes that import main:app themselves, so each
+    # one opens its own Mongo pool in the lifespan rather than inheriting one
+    uvicorn.run("main:app", **serverOptions())
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,107 @@
+import importlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+class CacheBackend(ABC):
+
+    @abstractmethod
+    def get(self, key: str):
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value, readAt: float = None):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+
+class NullCache(CacheBackend):
+    def get(self, key: str):
+        return None
+
+    def set(self, key: str, value, readAt: float = None):
+        pass
+
+    def delete(self, key: str):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": "none"}
+
+
+class LRUCache(CacheBackend):
+    def __init__(self, maxSize: int, ttlSeconds: float):
+        self.maxSize = maxSize
+        self.ttlSeconds = ttlSeconds
+        self.entries = OrderedDict()
+        self.tombstones = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expiresAt, value = entry
+            if expiresAt <= time.monotonic():
+                del self.entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value, readAt: float = None):
+        with self.lock:
+            deletedAt = self.tombstones.get(key)
+            if readAt is not None and deletedAt is not None and deletedAt >= readAt:
+                return
+            self.entries[key] = (time.monotonic() + self.ttlSeconds, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxSize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self.lock:
+            self.entries.pop(key, None)
+            now = time.monotonic()
+            self.tombstones[key] = now
+            self.tombstones.move_to_end(key)
+            while self.tombstones and next(iter(self.tombstones.values())) < now - self.ttlSeconds:
+                self.tombstones.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "backend": "memory",
+                "size": len(self.entries),
+                "maxSize": self.maxSize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+
+def createCache(backend: str, maxSize: int, ttlSeconds: float) -> CacheBackend:
+    if backend == "memory":
+        return LRUCache(maxSize, ttlSeconds)
+    if ":" in backend:
+        moduleName, className = backend.split(":", 1)
+        return getattr(importlib.import_module(moduleName), className)(maxSize, ttlSeconds)
+    return NullCache()
@@ -0,0 +1,9 @@
+from datetime import datetime, timezone
+
+def toNaiveUtc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def utcNow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
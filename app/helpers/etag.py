@@ -0,0 +1,14 @@
+def formatEtag(version: dict) -> str:
+    return f'"{version["epoch"]}.{version["version"]}"'
+
+def etagMatches(ifNoneMatch: str, etag: str, exists: bool = False) -> bool:
+    """etag is None when no version was ever written. "*" only matches once the
+    read has found something (exists), anything else must name a current tag."""
+    if not ifNoneMatch:
+        return False
+    if ifNoneMatch.strip() == "*":
+        return exists
+    if etag is None:
+        return False
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in ifNoneMatch.split(","))
@@ -1,4 +1,9 @@
 class BookingException(Exception):
     def __init__(self, status_code: int, detail: str):
         self.status_code = status_code
-        self.detail = detail
\ No newline at end of file
+        self.detail = detail
+
+class IndexVerificationError(Exception):
+    def __init__(self, failures: list):
+        self.failures = failures
+        super().__init__("Queries not using an index: " + "; ".join(failures))
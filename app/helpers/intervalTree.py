@@ -0,0 +1,113 @@
+import random
+
+class _Node:
+    __slots__ = ("start", "end", "key", "value", "priority", "maxEnd", "left", "right")
+
+    def __init__(self, start, end, key, value):
+        self.start = start
+        self.end = end
+        self.key = key
+        self.value = value
+        self.priority = random.random()
+        self.maxEnd = end
+        self.left = None
+        self.right = None
+
+    def update(self):
+        self.maxEnd = self.end
+        if self.left is not None and self.left.maxEnd > self.maxEnd:
+            self.maxEnd = self.left.maxEnd
+        if self.right is not None and self.right.maxEnd > self.maxEnd:
+            self.maxEnd = self.right.maxEnd
+
+
+class IntervalTree:
+    """Treap keyed on (start, key) and augmented with each subtree's latest end,
+    so overlap queries skip whole subtrees and run in O(log n + k)."""
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def insert(self, start, end, key, value=None):
+        self.root = self._insert(self.root, _Node(start, end, key, value))
+        self.size += 1
+
+    def remove(self, start, key) -> bool:
+        self.root, removed = self._remove(self.root, (start, key))
+        if removed:
+            self.size -= 1
+        return removed
+
+    def overlap(self, start, end):
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None or node.maxEnd <= start:
+                continue
+            stack.append(node.left)
+            if node.start < end:
+                if node.end > start:
+                    yield node.start, node.end, node.key, node.value
+                stack.append(node.right)
+
+    @staticmethod
+    def _rotateRight(node):
+        pivot = node.left
+        node.left = pivot.right
+        pivot.right = node
+        node.update()
+        pivot.update()
+        return pivot
+
+    @staticmethod
+    def _rotateLeft(node):
+        pivot = node.right
+        node.right = pivot.left
+        pivot.left = node
+        node.update()
+        pivot.update()
+        return pivot
+
+    def _insert(self, node, new):
+        if node is None:
+            return new
+        if (new.start, new.key) < (node.start, node.key):
+            node.left = self._insert(node.left, new)
+            if node.left.priority > node.priority:
+                return self._rotateRight(node)
+        else:
+            node.right = self._insert(node.right, new)
+            if node.right.priority > node.priority:
+                return self._rotateLeft(node)
+        node.update()
+        return node
+
+    def _remove(self, node, target):
+        if node is None:
+            return None, False
+        current = (node.start, node.key)
+        if target < current:
+            node.left, removed = self._remove(node.left, target)
+        elif target > current:
+            node.right, removed = self._remove(node.right, target)
+        else:
+            return self._merge(node.left, node.right), True
+        node.update()
+        return node, removed
+
+    def _merge(self, left, right):
+        if left is None:
+            return right
+        if right is None:
+            return left
+        if left.priority > right.priority:
+            left.right = self._merge(left.right, right)
+            left.update()
+            return left
+        right.left = self._merge(left, right.left)
+        right.update()
+        return right
@@ -0,0 +1,103 @@
+import bisect
+import threading
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labelText(labelNames: tuple, labels: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelNames, labels)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _formatValue(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+class Counter:
+    """Monotonic counter per label tuple; callers pass the tuple directly so
+    recording a sample is one dict lookup and an add."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelNames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelNames = labelNames
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            values = list(self.values.items())
+        for labels, value in sorted(values):
+            yield f"{self.name}_total{_labelText(self.labelNames, labels)} {_formatValue(value)}"
+
+
+class Histogram:
+    """Fixed-bucket histogram. Each label tuple owns a preallocated list of
+    per-bucket counts, cumulated only when rendering."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelNames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelNames = labelNames
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self.lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self.series.items()]
+        for labels, counts, total in sorted(series):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_formatValue(bound)}"'
+                yield f"{self.name}_bucket{_labelText(self.labelNames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labelText(self.labelNames, labels)} {_formatValue(total)}"
+            yield f"{self.name}_count{_labelText(self.labelNames, labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelNames: tuple = ()) -> Counter:
+        return self.register(Counter(name, help, labelNames))
+
+    def histogram(self, name: str, help: str, labelNames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelNames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            name = f"{metric.name}_total" if metric.kind == "counter" else metric.name
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
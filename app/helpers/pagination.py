@@ -0,0 +1,38 @@
+import base64
+import binascii
+from datetime import datetime, timedelta
+from bson import ObjectId
+from bson.errors import InvalidId
+from app.helpers.exception import BookingException
+
+EPOCH = datetime(1970, 1, 1)
+
+class Cursor:
+
+  @staticmethod
+  def encode(lastId : ObjectId) -> str:
+    return base64.urlsafe_b64encode(lastId.binary).decode().rstrip("=")
+
+  @staticmethod
+  def decode(cursor : str) -> ObjectId:
+    try:
+      return ObjectId(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, InvalidId, TypeError, ValueError):
+      raise BookingException(400, "Invalid pagination cursor.")
+
+  @staticmethod
+  def encodeKeyset(startFrom : datetime, lastId : ObjectId) -> str:
+    micros = (startFrom - EPOCH) // timedelta(microseconds=1)
+    return Cursor.encode(lastId) + "." + base64.urlsafe_b64encode(micros.to_bytes(8, "big", signed=True)).decode().rstrip("=")
+
+  @staticmethod
+  def decodeKeyset(cursor : str) -> tuple:
+    lastId, separator, startFrom = cursor.partition(".")
+    try:
+      packed = base64.urlsafe_b64decode(startFrom + "=" * (-len(startFrom) % 4))
+      if not separator or len(packed) != 8:
+        raise ValueError("keyset cursor without a start time")
+      micros = int.from_bytes(packed, "big", signed=True)
+      return EPOCH + timedelta(microseconds=micros), Cursor.decode(lastId)
+    except (binascii.Error, OverflowError, ValueError):
+      raise BookingException(400, "Invalid pagination cursor.")
@@ -0,0 +1,71 @@
+import operator
+from functools import lru_cache
+import orjson
+from bson import ObjectId
+from fastapi.responses import Response
+from app.helpers.exception import BookingException
+
+BOOKING_FIELDS = (
+    ("bookingId", "_id"),
+    ("restaurantId", "restaurantId"),
+    ("paymentId", "paymentId"),
+    ("reservationDate", "reservationDate"),
+    ("reservationRequest", "reservationRequest"),
+    ("guestNumber", "guestNumber"),
+    ("costPerPerson", "costPerPerson"),
+    ("totalAmount", "totalAmount"),
+    ("paymentStatus", "paymentStatus"),
+    ("bookingStatus", "bookingStatus"),
+    ("createdBy", "created_by"),
+    ("createdWhen", "created_when"),
+    ("updatedBy", "updated_by"),
+    ("updatedWhen", "updated_when")
+)
+
+class BookingSerializer:
+    def __init__(self, fields: tuple = BOOKING_FIELDS):
+        self.keys = tuple(key for key, _ in fields)
+        sources = [source for _, source in fields]
+        getter = operator.itemgetter(*sources)
+        self.getter = getter if len(sources) > 1 else lambda booking: (getter(booking),)
+
+    def format(self, booking: dict) -> dict:
+        return dict(zip(self.keys, self.getter(booking)))
+
+bookingSerializer = BookingSerializer()
+
+FIELD_SOURCES = dict(BOOKING_FIELDS)
+
+def selectFields(fields: str = None) -> tuple:
+    """Parses a comma-separated fields= value into a BOOKING_FIELDS subset in
+    schema order; bookingId is always included since cursors page on it."""
+    if not fields:
+        return BOOKING_FIELDS
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - FIELD_SOURCES.keys()
+    if unknown:
+        raise BookingException(400, f"unknown fields: {', '.join(sorted(unknown))}")
+    requested.add("bookingId")
+    return tuple(field for field in BOOKING_FIELDS if field[0] in requested)
+
+@lru_cache(maxsize=128)
+def serializerFor(fields: tuple) -> BookingSerializer:
+    return bookingSerializer if fields == BOOKING_FIELDS else BookingSerializer(fields)
+
+def projectionFor(fields: tuple) -> dict:
+    # _id is listed explicitly so fields=bookingId never becomes an empty, return-everything projection
+    return {source: 1 for _, source in fields}
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NAIVE_UTC)
+
+class BookingResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,65 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers with the same key
+    await the call already in flight. With reuseSeconds > 0 a finished result
+    is also handed to callers arriving within that window, so it may be up to
+    reuseSeconds stale."""
+
+    def __init__(self, reuseSeconds: float = 0, maxEntries: int = 10000, counter=None):
+        self.reuseSeconds = reuseSeconds
+        self.maxEntries = maxEntries
+        self.counter = counter
+        self.inflight = {}
+        self.recent = OrderedDict()
+        self.outcomes = {"leader": 0, "shared": 0, "reused": 0}
+
+    def _record(self, key: tuple, outcome: str):
+        self.outcomes[outcome] += 1
+        if self.counter is not None:
+            self.counter.inc((key[0], outcome))
+
+    async def do(self, key: tuple, function):
+        if self.reuseSeconds:
+            entry = self.recent.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._record(key, "reused")
+                return entry[1]
+
+        flight = self.inflight.get(key)
+        if flight is not None:
+            self._record(key, "shared")
+        else:
+            self._record(key, "leader")
+            # the call runs as its own task so a leader whose client disconnects
+            # does not cancel the query for everyone else waiting on it
+            flight = self.inflight[key] = asyncio.ensure_future(function())
+            flight.add_done_callback(lambda done: self._land(key, done))
+        return await asyncio.shield(flight)
+
+    def forget(self, *groups: tuple):
+        """Drops the in-flight and reusable calls whose key starts with one of
+        the (kind, id) groups, so callers arriving after a write start a fresh
+        call; callers already waiting still get the result they joined."""
+        groups = set(groups)
+        for calls in (self.inflight, self.recent):
+            for key in [key for key in calls if key[:2] in groups]:
+                del calls[key]
+
+    def _land(self, key: tuple, flight):
+        if self.inflight.get(key) is not flight:
+            # forgotten while running, the result may predate a write
+            return
+        del self.inflight[key]
+        if flight.cancelled() or flight.exception() is not None or not self.reuseSeconds:
+            return
+        now = time.monotonic()
+        self.recent[key] = (now + self.reuseSeconds, flight.result())
+        self.recent.move_to_end(key)
+        while self.recent and (len(self.recent) > self.maxEntries or next(iter(self.recent.values()))[0] <= now):
+            self.recent.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {**self.outcomes, "inflight": len(self.inflight), "reusable": len(self.recent)}
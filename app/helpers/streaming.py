@@ -0,0 +1,33 @@
+import asyncio
+from starlette.concurrency import iterate_in_threadpool
+from app.core.compression import StreamCompressor
+from app.helpers.serializer import dumps
+
+async def ndjsonStream(batches, encoding: str = None, level: int = 5):
+    if not hasattr(batches, "__aiter__"):
+        batches = iterate_in_threadpool(batches)
+
+    compressor = StreamCompressor(encoding, level) if encoding is not None else None
+
+    async for batch in batches:
+        chunk = b"".join(dumps(row) + b"\n" for row in batch)
+        if compressor is None:
+            yield chunk
+        else:
+            yield compressor.compress(chunk)
+
+    if compressor is not None:
+        yield compressor.finish()
+
+async def sseStream(subscribe, heartbeatSeconds: float):
+    # subscribing inside the generator ties the subscription to the response
+    # lifetime, so a dropped client always unsubscribes
+    with subscribe() as subscription:
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), heartbeatSeconds)
+            except asyncio.TimeoutError:
+                # comment lines keep proxies from closing an idle connection
+                yield b": keep-alive\n\n"
+                continue
+            yield b"event: " + event["type"].encode() + b"\ndata: " + dumps(event) + b"\n\n"
@@ -0,0 +1,120 @@
+import argparse
+import time
+from datetime import datetime
+from pymongo import UpdateOne
+from app.helpers.dates import utcNow
+
+MIGRATION_ID = "auditDatetimes"
+LEGACY_FORMAT = "%d%m%Y"
+LEGACY_QUERY = {"$or": [
+    {"created_when": {"$type": "string"}},
+    {"updated_when": {"$type": "string"}},
+    {"updated_When": {"$exists": True}}
+]}
+PROJECTION = {"created_when": 1, "updated_when": 1, "updated_When": 1}
+COUNTERS = ("scanned", "migrated", "invalid", "skipped")
+RETRIES = 3
+
+def parseLegacy(value):
+    if not isinstance(value, str):
+        return value
+    try:
+        return datetime.strptime(value, LEGACY_FORMAT)
+    except ValueError:
+        return None
+
+def migrationOperation(booking: dict):
+    created = parseLegacy(booking.get("created_when"))
+    # updateStatus used to write the latest update time to a stray updated_When
+    # key, so that one wins unless updated_when has already been rewritten
+    updated = booking.get("updated_when")
+    if not isinstance(updated, datetime):
+        updated = parseLegacy(booking.get("updated_When", updated))
+    if ("created_when" in booking and created is None) or updated is None:
+        return None
+
+    # matching on the values we read skips documents the app rewrote meanwhile
+    guard = {field: booking[field] if field in booking else {"$exists": False} for field in PROJECTION}
+    update = {"$set": {"updated_when": updated}}
+    if created is not None:
+        update["$set"]["created_when"] = created
+    if "updated_When" in booking:
+        update["$unset"] = {"updated_When": ""}
+    return UpdateOne({"_id": booking["_id"], **guard}, update)
+
+def migrateBatch(collection, batch: list, retries: int = RETRIES) -> dict:
+    counts = {"migrated": 0, "invalid": 0, "skipped": 0}
+    pending = batch
+    for _ in range(retries):
+        operations = {booking["_id"]: operation for booking in pending if (operation := migrationOperation(booking)) is not None}
+        counts["invalid"] += len(pending) - len(operations)
+        if not operations:
+            return counts
+        result = collection.bulk_write(list(operations.values()), ordered=False)
+        counts["migrated"] += result.modified_count
+        if result.matched_count == len(operations):
+            return counts
+        # the app rewrote some documents between our read and the guarded write;
+        # the ones still in the legacy format are read again and retried
+        pending = list(collection.find({"$and": [LEGACY_QUERY, {"_id": {"$in": list(operations)}}]}, PROJECTION))
+    counts["skipped"] += len(pending)
+    return counts
+
+def migrate(collection, checkpoints, batchSize: int = 500, maxRate: float = None, pause: float = 0, maxBatches: int = None, restart: bool = False, report=print) -> dict:
+    checkpoint = None if restart else checkpoints.find_one({"_id": MIGRATION_ID})
+    lastId = checkpoint["lastId"] if checkpoint else None
+    totals = {counter: checkpoint.get(counter, 0) if checkpoint else 0 for counter in COUNTERS}
+    query = dict(LEGACY_QUERY)
+    if lastId is not None:
+        query["_id"] = {"$gt": lastId}
+    remaining = collection.count_documents(query)
+    report(f"{remaining} documents to migrate" + (f", resuming after {lastId}" if lastId else ""))
+
+    startedAt = time.monotonic()
+    scanned = 0
+    batches = 0
+    while maxBatches is None or batches < maxBatches:
+        batch = list(collection.find(query, PROJECTION).sort("_id", 1).limit(batchSize))
+        if not batch:
+            if totals["skipped"]:
+                report(f"{totals['skipped']} documents kept changing under the migration, rerun with --restart to finish them")
+            else:
+                checkpoints.update_one({"_id": MIGRATION_ID}, {"$set": {"completedAt": utcNow()}}, upsert=True)
+            break
+
+        for counter, count in migrateBatch(collection, batch).items():
+            totals[counter] += count
+        totals["scanned"] += len(batch)
+        scanned += len(batch)
+        batches += 1
+
+        lastId = batch[-1]["_id"]
+        query["_id"] = {"$gt": lastId}
+        checkpoints.update_one({"_id": MIGRATION_ID}, {"$set": {"lastId": lastId, **totals, "updatedAt": utcNow()}}, upsert=True)
+
+        elapsed = time.monotonic() - startedAt
+        report(f"{scanned}/{remaining} scanned, {totals['migrated']} migrated, {totals['invalid']} unparseable, {scanned / elapsed if elapsed else 0:.0f} docs/s")
+
+        delay = pause
+        if maxRate:
+            delay = max(delay, scanned / maxRate - elapsed)
+        if delay > 0:
+            time.sleep(delay)
+
+    return totals
+
+if __name__ == "__main__":
+    from app.core.config import settings
+    from app.core.database import createMongoClient
+
+    parser = argparse.ArgumentParser(description="Convert created_when/updated_when strings to datetimes and drop the stray updated_When key.")
+    parser.add_argument("--batchSize", type=int, default=500)
+    parser.add_argument("--maxRate", type=float, help="upper bound on documents per second")
+    parser.add_argument("--pause", type=float, default=0, help="seconds to sleep between batches")
+    parser.add_argument("--maxBatches", type=int, help="stop after this many batches; rerun to resume")
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    args = parser.parse_args()
+
+    db = createMongoClient()[settings.DB_NAME]
+    totals = migrate(db[settings.COLLECTION_NAME], db[settings.MIGRATIONS_COLLECTION_NAME], args.batchSize, args.maxRate, args.pause, args.maxBatches, args.restart)
+    print(f"Scanned {totals['scanned']}, migrated {totals['migrated']}, unparseable {totals['invalid']}, skipped {totals['skipped']}.")
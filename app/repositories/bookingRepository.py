@@ -0,0 +1,102 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from bson import ObjectId
+
+class BookingRepository(ABC):
+
+    @abstractmethod
+    async def ping(self):
+        ...
+
+    @abstractmethod
+    async def warmUp(self, connections: int):
+        ...
+
+    @abstractmethod
+    async def close(self):
+        ...
+
+    @abstractmethod
+    async def ensureIndexes(self):
+        ...
+
+    @abstractmethod
+    async def insertOne(self, bookingData: dict) -> ObjectId:
+        ...
+
+    @abstractmethod
+    async def insertMany(self, documents: list) -> list:
+        ...
+
+    @abstractmethod
+    async def findActiveById(self, bookingId: ObjectId, projection: dict, archived: bool = False):
+        ...
+
+    @abstractmethod
+    async def findActiveByIds(self, bookingIds: list, projection: dict, archived: bool = False) -> list:
+        """Active bookings among bookingIds, in no particular order."""
+        ...
+
+    @abstractmethod
+    async def findActive(self, filter: dict, projection: dict, after: ObjectId = None, limit: int = None, archived: bool = False) -> list:
+        """Active bookings ordered by _id; archived=True reads the archive collection instead."""
+        ...
+
+    @abstractmethod
+    async def iterActive(self, filter: dict, projection: dict, batchSize: int, archived: bool = False):
+        ...
+
+    @abstractmethod
+    async def findActiveInRange(self, filter: dict, startFrom: datetime, to: datetime, projection: dict, after: tuple = None, limit: int = None, archived: bool = False) -> list:
+        """Active bookings starting in [startFrom, to) ordered by (startFrom, _id); after is the last (startFrom, _id) seen."""
+        ...
+
+    @abstractmethod
+    async def findActiveByDate(self, startFrom: datetime, to: datetime, projection: dict) -> list:
+        ...
+
+    @abstractmethod
+    async def updateIfActive(self, bookingId: ObjectId, fields: dict, projection: dict):
+        ...
+
+    @abstractmethod
+    async def archiveBatch(self, cutoff: datetime, limit: int) -> tuple:
+        """Copies up to limit bookings matching archiveQuery(cutoff) into the archive,
+        then removes the ones not modified meanwhile; returns (bookings, removedCount)."""
+        ...
+
+    @abstractmethod
+    async def reserveIdempotencyKey(self, record: dict):
+        """Stores record unless its _id is already taken; returns the existing record in that case."""
+        ...
+
+    @abstractmethod
+    async def completeIdempotencyKey(self, key: str, result: dict):
+        ...
+
+    @abstractmethod
+    async def releaseIdempotencyKey(self, key: str):
+        ...
+
+    @abstractmethod
+    async def openChangeStream(self):
+        """Returns an object with async next() and close() over booking changes;
+        raises when the backend cannot stream changes."""
+        ...
+
+    @abstractmethod
+    async def bumpVersions(self, keys: list):
+        ...
+
+    @abstractmethod
+    async def findVersion(self, key: str):
+        """Returns {"epoch", "version"} for key, or None if it was never bumped."""
+        ...
+
+    @abstractmethod
+    async def applyStats(self, deltas: dict):
+        ...
+
+    @abstractmethod
+    async def findStats(self, restaurantId: str, startDay: str, toDay: str) -> list:
+        ...
@@ -0,0 +1,215 @@
+import bisect
+from collections import defaultdict
+from datetime import datetime
+from bson import ObjectId
+from app.helpers.dates import toNaiveUtc
+from app.repositories.bookingRepository import BookingRepository
+from app.services.bookingStats import statsKey
+
+INDEXED_FIELDS = ("restaurantId", "created_by")
+
+def _project(booking: dict, projection: dict) -> dict:
+    document = {"_id": booking["_id"]}
+    for field in projection:
+        if field in booking:
+            document[field] = booking[field]
+    return document
+
+def _normalize(fields: dict) -> dict:
+    if "reservationDate" in fields:
+        fields["reservationDate"] = {key: toNaiveUtc(value) for key, value in fields["reservationDate"].items()}
+    return fields
+
+def _setPath(document: dict, path: str, value):
+    *parents, field = path.split(".")
+    for parent in parents:
+        document = document.setdefault(parent, {})
+    document[field] = document.get(field, 0) + value
+
+class InMemoryBookingRepository(BookingRepository):
+    def __init__(self):
+        self.bookings = {}
+        self.indexes = {field: defaultdict(list) for field in INDEXED_FIELDS}
+        self.startFromIndex = []
+        self.toIndex = []
+        self.stats = {}
+        self.idempotency = {}
+        self.versions = {}
+        self.archive = {}
+
+    def _index(self, booking: dict):
+        for field in INDEXED_FIELDS:
+            bisect.insort(self.indexes[field][booking[field]], booking["_id"])
+        bisect.insort(self.startFromIndex, (booking["reservationDate"]["startFrom"], booking["_id"]))
+        bisect.insort(self.toIndex, (booking["reservationDate"]["to"], booking["_id"]))
+
+    def _unindex(self, booking: dict):
+        for field in INDEXED_FIELDS:
+            ids = self.indexes[field][booking[field]]
+            del ids[bisect.bisect_left(ids, booking["_id"])]
+        for index, value in ((self.startFromIndex, booking["reservationDate"]["startFrom"]), (self.toIndex, booking["reservationDate"]["to"])):
+            del index[bisect.bisect_left(index, (value, booking["_id"]))]
+
+    def _insert(self, bookingData: dict) -> ObjectId:
+        bookingData.setdefault("_id", ObjectId())
+        booking = _normalize(dict(bookingData))
+        self.bookings[booking["_id"]] = booking
+        if booking["status"] == 1:
+            self._index(booking)
+        return booking["_id"]
+
+    @staticmethod
+    def _archivable(booking: dict, cutoff: datetime) -> bool:
+        if booking["status"] == 0:
+            return booking["updated_when"] < cutoff
+        return booking["reservationDate"]["to"] < cutoff
+
+    def _matchIds(self, filter: dict, archived: bool = False) -> list:
+        if archived:
+            ids = sorted(bookingId for bookingId, booking in self.archive.items() if booking["status"] == 1)
+            return [bookingId for bookingId in ids if all(self.archive[bookingId].get(field) == value for field, value in filter.items())]
+        indexed = [field for field in filter if field in INDEXED_FIELDS]
+        if indexed:
+            ids = self.indexes[indexed[0]].get(filter[indexed[0]], [])
+        else:
+            ids = sorted(bookingId for bookingId, booking in self.bookings.items() if booking["status"] == 1)
+        return [bookingId for bookingId in ids if all(self.bookings[bookingId].get(field) == value for field, value in filter.items())]
+
+    async def ping(self):
+        return {"ok": 1.0}
+
+    async def warmUp(self, connections: int):
+        pass
+
+    async def close(self):
+        pass
+
+    async def ensureIndexes(self):
+        return []
+
+    async def insertOne(self, bookingData: dict) -> ObjectId:
+        return self._insert(bookingData)
+
+    async def insertMany(self, documents: list) -> list:
+        for bookingData in documents:
+            self._insert(bookingData)
+        return []
+
+    async def findActiveById(self, bookingId: ObjectId, projection: dict, archived: bool = False):
+        booking = (self.archive if archived else self.bookings).get(bookingId)
+        if booking is None or booking["status"] != 1:
+            return None
+        return _project(booking, projection)
+
+    async def findActiveByIds(self, bookingIds: list, projection: dict, archived: bool = False) -> list:
+        bookings = self.archive if archived else self.bookings
+        found = (bookings.get(bookingId) for bookingId in bookingIds)
+        return [_project(booking, projection) for booking in found if booking is not None and booking["status"] == 1]
+
+    async def findActive(self, filter: dict, projection: dict, after: ObjectId = None, limit: int = None, archived: bool = False) -> list:
+        bookings = self.archive if archived else self.bookings
+        ids = self._matchIds(filter, archived)
+        start = bisect.bisect_right(ids, after) if after is not None else 0
+        end = start + limit if limit is not None else len(ids)
+        return [_project(bookings[bookingId], projection) for bookingId in ids[start:end]]
+
+    async def iterActive(self, filter: dict, projection: dict, batchSize: int, archived: bool = False):
+        bookings = self.archive if archived else self.bookings
+        ids = self._matchIds(filter, archived)
+        for start in range(0, len(ids), batchSize):
+            yield [_project(bookings[bookingId], projection) for bookingId in ids[start:start + batchSize]]
+
+    async def findActiveInRange(self, filter: dict, startFrom: datetime, to: datetime, projection: dict, after: tuple = None, limit: int = None, archived: bool = False) -> list:
+        if archived:
+            # the archive is not indexed in memory, a scan keeps it out of the hot path
+            startFrom, to = toNaiveUtc(startFrom), toNaiveUtc(to)
+            keys = sorted((booking["reservationDate"]["startFrom"], bookingId) for bookingId, booking in self.archive.items() if booking["status"] == 1 and startFrom <= booking["reservationDate"]["startFrom"] < to)
+            keys = [key for key in keys if after is None or key > after]
+            matched = [self.archive[bookingId] for _, bookingId in keys if all(self.archive[bookingId].get(field) == value for field, value in filter.items())]
+            return [_project(booking, projection) for booking in matched[:limit]]
+        to = toNaiveUtc(to)
+        position = bisect.bisect_left(self.startFromIndex, (toNaiveUtc(startFrom),))
+        if after is not None:
+            position = max(position, bisect.bisect_right(self.startFromIndex, after))
+        bookings = []
+        while position < len(self.startFromIndex) and self.startFromIndex[position][0] < to and (limit is None or len(bookings) < limit):
+            booking = self.bookings[self.startFromIndex[position][1]]
+            if all(booking.get(field) == value for field, value in filter.items()):
+                bookings.append(_project(booking, projection))
+            position += 1
+        return bookings
+
+    async def findActiveByDate(self, startFrom: datetime, to: datetime, projection: dict) -> list:
+        ids = set()
+        for index, value in ((self.startFromIndex, startFrom), (self.toIndex, to)):
+            if value is None:
+                continue
+            value = toNaiveUtc(value)
+            position = bisect.bisect_left(index, (value,))
+            while position < len(index) and index[position][0] == value:
+                ids.add(index[position][1])
+                position += 1
+        return [_project(self.bookings[bookingId], projection) for bookingId in sorted(ids)]
+
+    async def updateIfActive(self, bookingId: ObjectId, fields: dict, projection: dict):
+        booking = self.bookings.get(bookingId)
+        if booking is None:
+            return None
+        before = _project(booking, projection)
+        if booking["status"] == 1:
+            self._unindex(booking)
+            booking.update(_normalize(dict(fields)))
+            if booking["status"] == 1:
+                self._index(booking)
+        return before
+
+    async def archiveBatch(self, cutoff: datetime, limit: int) -> tuple:
+        cutoff = toNaiveUtc(cutoff)
+        bookings = []
+        for bookingId in sorted(self.bookings):
+            if len(bookings) >= limit:
+                break
+            booking = self.bookings[bookingId]
+            if self._archivable(booking, cutoff):
+                bookings.append(dict(booking))
+
+        for booking in bookings:
+            if booking["status"] == 1:
+                self._unindex(booking)
+            self.archive[booking["_id"]] = self.bookings.pop(booking["_id"])
+        return bookings, len(bookings)
+
+    async def reserveIdempotencyKey(self, record: dict):
+        existing = self.idempotency.get(record["_id"])
+        if existing is not None:
+            return dict(existing)
+        self.idempotency[record["_id"]] = dict(record)
+        return None
+
+    async def completeIdempotencyKey(self, key: str, result: dict):
+        if key in self.idempotency:
+            self.idempotency[key]["result"] = result
+
+    async def releaseIdempotencyKey(self, key: str):
+        self.idempotency.pop(key, None)
+
+    async def openChangeStream(self):
+        raise NotImplementedError("the in-memory repository has no change stream")
+
+    async def bumpVersions(self, keys: list):
+        for key in keys:
+            version = self.versions.setdefault(key, {"epoch": ObjectId(), "version": 0})
+            version["version"] += 1
+
+    async def findVersion(self, key: str):
+        version = self.versions.get(key)
+        return dict(version) if version is not None else None
+
+    async def applyStats(self, deltas: dict):
+        for key, delta in deltas.items():
+            stats = self.stats.setdefault(key, {"restaurantId": delta["restaurantId"], "day": delta["day"]})
+            for path, value in delta["inc"].items():
+                _setPath(stats, path, value)
+
+    async def findStats(self, restaurantId: str, startDay: str, toDay: str) -> list:
+        return [dict(self.stats[key]) for key in sorted(self.stats) if statsKey(restaurantId, startDay) <= key <= statsKey(restaurantId, toDay)]
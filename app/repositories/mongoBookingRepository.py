@@ -0,0 +1,224 @@
+import asyncio
+from datetime import datetime
+from functools import partial
+from itertools import islice
+from bson import ObjectId
+from fastapi.concurrency import run_in_threadpool
+from pymongo import DeleteOne, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from app.core.config import settings
+from app.core.profiling import currentProfile, profileCommand
+from app.core.indexes import ARCHIVE_INDEXES, BOOKING_INDEXES, IDEMPOTENCY_INDEXES
+from app.repositories.bookingRepository import BookingRepository
+from app.services.bookingArchive import archiveQuery
+from app.services.bookingStats import statsOperations, statsRangeQuery
+
+CHANGE_PIPELINE = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+
+class ChangeStream:
+    def __init__(self, stream, isAsync: bool):
+        self.stream = stream
+        self.isAsync = isAsync
+
+    async def next(self) -> dict:
+        if self.isAsync:
+            return await self.stream.next()
+        # try_next returns after maxAwaitTimeMS, so a worker thread is never parked indefinitely
+        while True:
+            change = await run_in_threadpool(self.stream.try_next)
+            if change is not None:
+                return change
+
+    async def close(self):
+        if self.isAsync:
+            await self.stream.close()
+        else:
+            await run_in_threadpool(self.stream.close)
+
+
+class MongoBookingRepository(BookingRepository):
+    def __init__(self, client, isAsync: bool):
+        self.client = client
+        self.isAsync = isAsync
+        self.db = client[settings.DB_NAME]
+        self.collection = self.db[settings.COLLECTION_NAME]
+        self.stats = self.db[settings.STATS_COLLECTION_NAME]
+        self.idempotency = self.db[settings.IDEMPOTENCY_COLLECTION_NAME]
+        self.versions = self.db[settings.VERSIONS_COLLECTION_NAME]
+        self.archive = self.db[settings.ARCHIVE_COLLECTION_NAME]
+
+    async def _call(self, method, *args, **kwargs):
+        if self.isAsync:
+            return await method(*args, **kwargs)
+        return await run_in_threadpool(method, *args, **kwargs)
+
+    async def _run(self, method, *args, **kwargs):
+        if currentProfile.get() is None:
+            return await self._call(method, *args, **kwargs)
+        with profileCommand(getattr(method, "__name__", "command")):
+            return await self._call(method, *args, **kwargs)
+
+    async def _fetch(self, cursor) -> list:
+        if self.isAsync:
+            return await cursor.to_list(length=None)
+        return await run_in_threadpool(list, cursor)
+
+    async def _list(self, cursor) -> list:
+        if currentProfile.get() is None:
+            return await self._fetch(cursor)
+        with profileCommand("find", partial(self._explain, cursor)):
+            return await self._fetch(cursor)
+
+    async def _explain(self, cursor) -> dict:
+        # a clone re-issues the same query, the original cursor is already exhausted
+        if self.isAsync:
+            return await cursor.clone().explain()
+        return await run_in_threadpool(lambda: cursor.clone().explain())
+
+    @staticmethod
+    def _whenActive(fields: dict) -> list:
+        return [{"$set": {field: {"$cond": [{"$eq": ["$status", 1]}, {"$literal": value}, f"${field}"]} for field, value in fields.items()}}]
+
+    async def ping(self):
+        return await self._run(self.db.command, "ping")
+
+    async def warmUp(self, connections: int):
+        # concurrent pings each check out their own socket, so the pool holds
+        # this many open connections before the first request arrives
+        await asyncio.gather(*(self.ping() for _ in range(max(1, connections))))
+
+    async def close(self):
+        self.client.close()
+
+    async def ensureIndexes(self):
+        return await self._run(self.collection.create_indexes, BOOKING_INDEXES) + await self._run(self.idempotency.create_indexes, IDEMPOTENCY_INDEXES) + await self._run(self.archive.create_indexes, ARCHIVE_INDEXES)
+
+    async def insertOne(self, bookingData: dict) -> ObjectId:
+        result = await self._run(self.collection.insert_one, bookingData)
+        return result.inserted_id
+
+    async def insertMany(self, documents: list) -> list:
+        try:
+            await self._run(self.collection.insert_many, documents, ordered=False)
+        except BulkWriteError as e:
+            return e.details.get("writeErrors", [])
+        return []
+
+    async def findActiveById(self, bookingId: ObjectId, projection: dict, archived: bool = False):
+        collection = self.archive if archived else self.collection
+        return await self._run(collection.find_one, {"_id": bookingId, "status": 1}, projection)
+
+    async def findActiveByIds(self, bookingIds: list, projection: dict, archived: bool = False) -> list:
+        collection = self.archive if archived else self.collection
+        return await self._list(collection.find({"_id": {"$in": bookingIds}, "status": 1}, projection))
+
+    async def findActive(self, filter: dict, projection: dict, after: ObjectId = None, limit: int = None, archived: bool = False) -> list:
+        query = {**filter, "status": 1}
+        if after is not None:
+            query["_id"] = {"$gt": after}
+        collection = self.archive if archived else self.collection
+        cursor = collection.find(query, projection).sort("_id", 1)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        return await self._list(cursor)
+
+    async def iterActive(self, filter: dict, projection: dict, batchSize: int, archived: bool = False):
+        collection = self.archive if archived else self.collection
+        cursor = collection.find({**filter, "status": 1}, projection).sort("_id", 1).batch_size(batchSize)
+        if not self.isAsync:
+            while True:
+                batch = await run_in_threadpool(lambda: list(islice(cursor, batchSize)))
+                if not batch:
+                    return
+                yield batch
+
+        batch = []
+        async for booking in cursor:
+            batch.append(booking)
+            if len(batch) >= batchSize:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def findActiveInRange(self, filter: dict, startFrom: datetime, to: datetime, projection: dict, after: tuple = None, limit: int = None, archived: bool = False) -> list:
+        query = {**filter, "status": 1, "reservationDate.startFrom": {"$gte": startFrom, "$lt": to}}
+        if after is not None:
+            afterStart, afterId = after
+            # narrow the index bounds to the cursor and drop the few ties already returned
+            query["reservationDate.startFrom"]["$gte"] = max(startFrom, afterStart)
+            query["$nor"] = [{"reservationDate.startFrom": afterStart, "_id": {"$lte": afterId}}]
+        collection = self.archive if archived else self.collection
+        cursor = collection.find(query, projection).sort([("reservationDate.startFrom", 1), ("_id", 1)])
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        return await self._list(cursor)
+
+    async def findActiveByDate(self, startFrom: datetime, to: datetime, projection: dict) -> list:
+        query = {
+            "status": 1,
+            "$or": [
+                {"reservationDate.startFrom": {"$eq": startFrom}},
+                {"reservationDate.to": {"$eq": to}}
+            ]
+        }
+        return await self._list(self.collection.find(query, projection))
+
+    async def updateIfActive(self, bookingId: ObjectId, fields: dict, projection: dict):
+        return await self._run(self.collection.find_one_and_update, {"_id": bookingId}, self._whenActive(fields), projection=projection, return_document=ReturnDocument.BEFORE)
+
+    async def archiveBatch(self, cutoff: datetime, limit: int) -> tuple:
+        bookings = await self._list(self.collection.find(archiveQuery(cutoff)).limit(limit))
+        if not bookings:
+            return [], 0
+        # the copy lands before the delete, so an interrupted batch never loses a booking
+        await self._run(self.archive.bulk_write, [ReplaceOne({"_id": booking["_id"]}, booking, upsert=True) for booking in bookings], ordered=False)
+        # a booking updated after it was read keeps its hot copy and is picked up again by the next batch
+        deletes = [DeleteOne({"_id": booking["_id"], "status": booking["status"], "updated_when": booking.get("updated_when")}) for booking in bookings]
+        result = await self._run(self.collection.bulk_write, deletes, ordered=False)
+        if result.deleted_count < len(bookings):
+            # the copy made before that update is outdated (an active copy of a
+            # cancelled booking would be read back), so it goes until the next batch
+            kept = {booking["_id"] for booking in await self._list(self.collection.find({"_id": {"$in": [booking["_id"] for booking in bookings]}}, {"_id": 1}))}
+            stale = [DeleteOne({"_id": booking["_id"], "status": booking["status"], "updated_when": booking.get("updated_when")}) for booking in bookings if booking["_id"] in kept]
+            if stale:
+                await self._run(self.archive.bulk_write, stale, ordered=False)
+        return bookings, result.deleted_count
+
+    async def reserveIdempotencyKey(self, record: dict):
+        try:
+            await self._run(self.idempotency.insert_one, record)
+            return None
+        except DuplicateKeyError:
+            return await self._run(self.idempotency.find_one, {"_id": record["_id"]})
+
+    async def completeIdempotencyKey(self, key: str, result: dict):
+        await self._run(self.idempotency.update_one, {"_id": key}, {"$set": {"result": result}})
+
+    async def releaseIdempotencyKey(self, key: str):
+        await self._run(self.idempotency.delete_one, {"_id": key})
+
+    async def openChangeStream(self):
+        if self.isAsync:
+            stream = self.collection.watch(CHANGE_PIPELINE, full_document="updateLookup")
+            await stream.__aenter__()
+        else:
+            stream = await run_in_threadpool(self.collection.watch, CHANGE_PIPELINE, full_document="updateLookup")
+        return ChangeStream(stream, self.isAsync)
+
+    async def bumpVersions(self, keys: list):
+        # a fresh epoch per counter document keeps old ETags from matching if the collection is ever reset
+        operations = [UpdateOne({"_id": key}, {"$inc": {"version": 1}, "$setOnInsert": {"epoch": ObjectId()}}, upsert=True) for key in keys]
+        if operations:
+            await self._run(self.versions.bulk_write, operations, ordered=False)
+
+    async def findVersion(self, key: str):
+        return await self._run(self.versions.find_one, {"_id": key}, {"_id": 0})
+
+    async def applyStats(self, deltas: dict):
+        operations = statsOperations(deltas)
+        if operations:
+            await self._run(self.stats.bulk_write, operations, ordered=False)
+
+    async def findStats(self, restaurantId: str, startDay: str, toDay: str) -> list:
+        return await self._list(self.stats.find(statsRangeQuery(restaurantId, startDay, toDay), {"_id": 0}).sort("_id", 1))
@@ -0,0 +1,122 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from app.helpers.dates import toNaiveUtc
+from app.helpers.intervalTree import IntervalTree
+
+AVAILABILITY_PROJECTION = {"reservationDate": 1, "guestNumber": 1}
+
+class AvailabilityIndex:
+    def __init__(self, refreshSeconds: int):
+        self.refreshSeconds = refreshSeconds
+        self.trees = {}
+        self.loadedAt = {}
+        self.bookings = {}
+        self.loading = {}
+        self.lock = threading.Lock()
+
+    def isStale(self, restaurantId: str) -> bool:
+        loadedAt = self.loadedAt.get(restaurantId)
+        return loadedAt is None or time.monotonic() - loadedAt > self.refreshSeconds
+
+    def invalidate(self):
+        """Marks every restaurant stale, so the next read reloads it."""
+        with self.lock:
+            self.loadedAt.clear()
+
+    def beginLoad(self, restaurantId: str) -> list:
+        """Starts buffering the writes for restaurantId that land while its
+        bookings are read; load() replays them onto the snapshot, which may or
+        may not already include them."""
+        pending = []
+        with self.lock:
+            self.loading.setdefault(restaurantId, []).append(pending)
+        return pending
+
+    def endLoad(self, restaurantId: str, pending: list):
+        with self.lock:
+            self._endLoad(restaurantId, pending)
+
+    def load(self, restaurantId: str, bookings: list, pending: list = ()):
+        tree = IntervalTree()
+        with self.lock:
+            self._endLoad(restaurantId, pending)
+            for bookingId in [bookingId for bookingId, entry in self.bookings.items() if entry[0] == restaurantId]:
+                del self.bookings[bookingId]
+            for booking in bookings:
+                self._insert(tree, restaurantId, booking)
+            self.trees[restaurantId] = tree
+            for bookingId, booking in pending:
+                self._remove(bookingId)
+                if booking is not None:
+                    self._insert(tree, restaurantId, booking)
+            self.loadedAt[restaurantId] = time.monotonic()
+
+    def add(self, restaurantId: str, booking: dict):
+        with self.lock:
+            self._buffer(restaurantId, str(booking["_id"]), booking)
+            tree = self.trees.get(restaurantId)
+            if tree is not None:
+                self._insert(tree, restaurantId, booking)
+
+    def remove(self, restaurantId: str, bookingId: str):
+        with self.lock:
+            self._buffer(restaurantId, bookingId, None)
+            self._remove(bookingId)
+
+    def update(self, restaurantId: str, booking: dict):
+        with self.lock:
+            self._buffer(restaurantId, str(booking["_id"]), booking)
+            self._remove(str(booking["_id"]))
+            tree = self.trees.get(restaurantId)
+            if tree is not None:
+                self._insert(tree, restaurantId, booking)
+
+    def overlapping(self, restaurantId: str, startFrom: datetime, to: datetime = None) -> list:
+        startFrom = toNaiveUtc(startFrom)
+        to = toNaiveUtc(to) if to is not None else startFrom + timedelta(microseconds=1)
+        with self.lock:
+            tree = self.trees.get(restaurantId)
+            if tree is None:
+                return []
+            return sorted(tree.overlap(startFrom, to), key=lambda interval: (interval[0], interval[2]))
+
+    @staticmethod
+    def peakSeats(intervals: list, startFrom: datetime, to: datetime = None) -> int:
+        startFrom = toNaiveUtc(startFrom)
+        to = toNaiveUtc(to) if to is not None else startFrom
+        events = []
+        for start, end, _, guestNumber in intervals:
+            events.append((max(start, startFrom), 1, guestNumber))
+            if end < to:
+                events.append((end, 0, -guestNumber))
+        events.sort(key=lambda event: (event[0], event[1]))
+
+        seats = peak = 0
+        for _, _, delta in events:
+            seats += delta
+            peak = max(peak, seats)
+        return peak
+
+    def _buffer(self, restaurantId: str, bookingId: str, booking: dict):
+        for pending in self.loading.get(restaurantId, ()):
+            pending.append((bookingId, booking))
+
+    def _endLoad(self, restaurantId: str, pending: list):
+        loads = self.loading.get(restaurantId, [])
+        if any(load is pending for load in loads):
+            loads[:] = [load for load in loads if load is not pending]
+            if not loads:
+                del self.loading[restaurantId]
+
+    def _remove(self, bookingId: str):
+        entry = self.bookings.pop(bookingId, None)
+        if entry is not None:
+            self.trees[entry[0]].remove(entry[1], bookingId)
+
+    def _insert(self, tree: IntervalTree, restaurantId: str, booking: dict):
+        bookingId = str(booking["_id"])
+        start = toNaiveUtc(booking["reservationDate"]["startFrom"])
+        end = toNaiveUtc(booking["reservationDate"]["to"])
+        tree.insert(start, end, bookingId, booking["guestNumber"])
+        self.bookings[bookingId] = (restaurantId, start)
@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+from datetime import timedelta
+from app.helpers.dates import utcNow
+
+def archiveQuery(cutoff) -> dict:
+    """Cancelled bookings last touched before cutoff and active bookings that
+    ended before it; each branch is served by a partial index."""
+    return {"$or": [
+        {"status": 0, "updated_when": {"$lt": cutoff}},
+        {"status": 1, "reservationDate.to": {"$lt": cutoff}}
+    ]}
+
+def archiveVersionKeys(bookings: list) -> list:
+    keys = set()
+    for booking in bookings:
+        keys.update((f"restaurant:{booking['restaurantId']}", f"user:{booking['created_by']}", f"booking:{booking['_id']}"))
+    return sorted(keys)
+
+async def archiveBookings(repository, olderThanDays: int, batchSize: int = 500, pause: float = 0, maxBatches: int = None, report=print) -> dict:
+    """Moves bookings matching archiveQuery into the archive collection one
+    batch at a time. Progress lives in the data itself: an interrupted run
+    leaves every booking in the hot collection, the archive or (briefly) both,
+    so rerunning simply picks up the remaining ones."""
+    cutoff = utcNow() - timedelta(days=olderThanDays)
+    totals = {"scanned": 0, "archived": 0}
+    batches = 0
+    while maxBatches is None or batches < maxBatches:
+        batch, archived = await repository.archiveBatch(cutoff, batchSize)
+        if not batch:
+            break
+        # archived bookings drop out of the restaurant and user listings
+        await repository.bumpVersions(archiveVersionKeys(batch))
+        totals["scanned"] += len(batch)
+        totals["archived"] += archived
+        batches += 1
+        report(f"{totals['scanned']} scanned, {totals['archived']} archived")
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+    return totals
+
+if __name__ == "__main__":
+    from app.core.config import settings
+    from app.core.database import createBookingRepository
+
+    parser = argparse.ArgumentParser(description="Move cancelled and completed bookings older than --olderThanDays into the archive collection.")
+    parser.add_argument("--olderThanDays", type=int, default=settings.ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batchSize", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=0, help="seconds to sleep between batches")
+    parser.add_argument("--maxBatches", type=int, help="stop after this many batches; rerun to continue")
+    args = parser.parse_args()
+
+    async def main():
+        repository = createBookingRepository()
+        try:
+            return await archiveBookings(repository, args.olderThanDays, args.batchSize, args.pause, args.maxBatches)
+        finally:
+            await repository.close()
+
+    totals = asyncio.run(main())
+    print(f"Scanned {totals['scanned']}, archived {totals['archived']}.")
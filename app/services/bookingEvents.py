@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from collections import defaultdict
+from app.helpers.serializer import BOOKING_FIELDS, bookingSerializer
+
+RESYNC = {"type": "resync"}
+FIELD_KEYS = {source: key for key, source in BOOKING_FIELDS}
+
+logger = logging.getLogger(__name__)
+
+def changedFields(fields: dict) -> dict:
+    return {FIELD_KEYS[source]: value for source, value in fields.items() if source in FIELD_KEYS}
+
+def createdEvent(booking: dict) -> dict:
+    return {"type": "created", "bookingId": str(booking["_id"]), "booking": bookingSerializer.format(booking)}
+
+def updatedEvent(bookingId, fields: dict) -> dict:
+    if fields.get("status") == 0:
+        return {"type": "cancelled", "bookingId": str(bookingId)}
+    return {"type": "updated", "bookingId": str(bookingId), "booking": changedFields(fields)}
+
+def changeEvent(change: dict):
+    """Maps a change-stream document onto (restaurantId, event), or None when
+    there is nothing a subscriber needs to see."""
+    document = change.get("fullDocument")
+    if document is None:
+        return None
+    if change["operationType"] == "insert":
+        return document["restaurantId"], createdEvent(document)
+    if change["operationType"] == "replace":
+        return document["restaurantId"], updatedEvent(document["_id"], document)
+    updatedFields = change.get("updateDescription", {}).get("updatedFields")
+    if not updatedFields:
+        return None
+    return document["restaurantId"], updatedEvent(document["_id"], updatedFields)
+
+
+class Subscription:
+    def __init__(self, bus, restaurantId: str, queueSize: int):
+        self.bus = bus
+        self.restaurantId = restaurantId
+        self.queue = asyncio.Queue(queueSize)
+        self.dropped = 0
+
+    def push(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # a consumer that fell behind gets a single resync marker in place
+            # of its backlog, so memory per subscriber stays bounded
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BookingEventBus:
+    """Fans booking events out to per-restaurant subscribers. Events come from
+    a Mongo change stream when the deployment has one, so writes made by other
+    workers are seen too; otherwise BookingService publishes its own writes.
+    onChange gets every raw change-stream document and onResync is called when
+    changes may have been lost, so other per-process state can follow along."""
+
+    def __init__(self, queueSize: int, source: str = "auto", onChange=None, onResync=None):
+        self.queueSize = queueSize
+        self.mode = source
+        self.onChange = onChange
+        self.onResync = onResync
+        self.source = "local"
+        self.subscribers = defaultdict(set)
+        self.task = None
+
+    def subscribe(self, restaurantId: str) -> Subscription:
+        subscription = Subscription(self, restaurantId, self.queueSize)
+        self.subscribers[restaurantId].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self.subscribers.get(subscription.restaurantId)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self.subscribers[subscription.restaurantId]
+
+    def publish(self, restaurantId: str, event: dict):
+        for subscription in tuple(self.subscribers.get(restaurantId, ())):
+            subscription.push(event)
+
+    def record(self, restaurantId: str, event: dict):
+        if self.source == "local" and restaurantId in self.subscribers:
+            self.publish(restaurantId, event)
+
+    def stats(self) -> dict:
+        return {"source": self.source, "restaurants": len(self.subscribers), "subscribers": sum(len(subscribers) for subscribers in self.subscribers.values())}
+
+    async def start(self, repository):
+        if self.mode == "local":
+            return
+        try:
+            stream = await repository.openChangeStream()
+        except Exception as e:
+            if self.mode == "changeStream":
+                raise
+            logger.warning("Change streams unavailable (%s), publishing booking events in-process; other workers' writes reach availability only on refresh", e)
+            return
+        self.source = "changeStream"
+        self.task = asyncio.create_task(self._follow(repository, stream))
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _follow(self, repository, stream):
+        while True:
+            try:
+                change = await stream.next()
+                if self.onChange is not None:
+                    self._notify(self.onChange, change)
+                routed = changeEvent(change)
+                if routed is not None:
+                    self.publish(*routed)
+            except asyncio.CancelledError:
+                await stream.close()
+                raise
+            except Exception:
+                logger.exception("Booking change stream failed, reopening")
+                await asyncio.sleep(1)
+                try:
+                    stream = await repository.openChangeStream()
+                except Exception:
+                    continue
+                # changes made while the stream was down are lost
+                if self.onResync is not None:
+                    self._notify(self.onResync)
+                for subscribers in tuple(self.subscribers.values()):
+                    for subscription in tuple(subscribers):
+                        subscription.push(RESYNC)
+
+    @staticmethod
+    def _notify(callback, *args):
+        # a failing listener must not tear down the stream for the subscribers
+        try:
+            callback(*args)
+        except Exception:
+            logger.exception("Booking change listener failed")
@@ -1,259 +1,619 @@
-from datetime import datetime
+import hashlib
+import logging
+import time
+from datetime import date, datetime, timedelta
 from bson import ObjectId
-import certifi
-from pymongo import MongoClient
+from app.helpers.cache import createCache
+from app.helpers.dates import toNaiveUtc, utcNow
+from app.helpers.etag import formatEtag
 from app.helpers.exception import BookingException
-from app.models.bookingBaseModel import BookingMutation
+from app.models.bookingBaseModel import BookingMutation, BookingStatus, PaymentStatus
 from app.core.config import settings
+from app.core.database import createBookingRepository
+from app.core.metrics import singleFlightRequests
+from app.helpers.pagination import Cursor
+from app.helpers.serializer import BOOKING_FIELDS, bookingSerializer, projectionFor, selectFields, serializerFor
+from app.helpers.singleFlight import SingleFlight
 from app.helpers.validator import Validator
+from app.repositories.bookingRepository import BookingRepository
+from app.services.availabilityIndex import AVAILABILITY_PROJECTION, AvailabilityIndex
+from app.services.bookingEvents import BookingEventBus, createdEvent, updatedEvent
+from app.services.insertCoalescer import InsertCoalescer
+from app.services.bookingStats import statsDeltas
+
+BOOKING_PROJECTION = {
+    "restaurantId": 1,
+    "paymentId": 1,
+    "reservationDate": 1,
+    "reservationRequest": 1,
+    "guestNumber": 1,
+    "costPerPerson": 1,
+    "totalAmount": 1,
+    "paymentStatus": 1,
+    "bookingStatus": 1,
+    "created_by": 1,
+    "created_when": 1,
+    "updated_by": 1,
+    "updated_when": 1
+}
+
+WRITE_PROJECTION = {
+    "restaurantId": 1,
+    "created_by": 1,
+    "status": 1,
+    "reservationDate": 1,
+    "guestNumber": 1,
+    "costPerPerson": 1,
+    "paymentStatus": 1
+}
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+IDEMPOTENCY_COMPLETE_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
 
 class BookingService:
-    def __init__(self):
-      self.client = MongoClient(settings.MONGODB_URI, tlsCAFile=certifi.where())
-      self.db = self.client[settings.DB_NAME]
-      self.collection = self.db[settings.COLLECTION_NAME]
+    def __init__(self, repository: BookingRepository = None):
+      self.repository = repository if repository is not None else createBookingRepository()
+      self.availability = AvailabilityIndex(settings.AVAILABILITY_REFRESH_SECONDS)
+      self.cache = createCache(settings.CACHE_BACKEND, settings.CACHE_MAX_SIZE, settings.CACHE_TTL_SECONDS)
+      self.singleFlight = SingleFlight(settings.SINGLE_FLIGHT_REUSE_MS / 1000, settings.SINGLE_FLIGHT_MAX_ENTRIES, singleFlightRequests)
+      # with change streams the availability index also follows other workers' writes
+      self.events = BookingEventBus(settings.EVENT_QUEUE_SIZE, settings.EVENT_SOURCE, self._applyChange, self.availability.invalidate)
+      self.coalescer = None
+      if settings.COALESCE_INSERTS:
+        self.coalescer = InsertCoalescer(self.repository.insertMany, settings.COALESCE_MAX_BATCH, settings.COALESCE_WINDOW_MS / 1000, settings.COALESCE_MAX_PENDING, settings.COALESCE_QUEUE_TIMEOUT_SECONDS)
+
+    async def close(self):
+      if self.coalescer is not None:
+        await self.coalescer.close()
+      await self.events.stop()
+      await self.repository.close()
+
+    @staticmethod
+    def _validateBooking(bookingData: dict):
+      if not (Validator.validateAmount(bookingData["guestNumber"], 0)):
+         raise BookingException(400, "guest must not be less than 1")
+
+      if not (Validator.validateAmount(bookingData["costPerPerson"], 0)):
+         raise BookingException(400, "cost must not be less than 1")
+
+      if bookingData["reservationDate"]["startFrom"] >= bookingData["reservationDate"]["to"]:
+         raise BookingException(400, "'start' time must be earlier than 'to' time.")
+
+    def _newBooking(self, bookingMutation : BookingMutation, userId : str, restaurantId : str):
+      bookingData = bookingMutation.model_dump()
+
+      bookingData["restaurantId"] = restaurantId
+
+      self._validateBooking(bookingData)
+
+      bookingData["totalAmount"] = bookingData["guestNumber"] * bookingData["costPerPerson"]
+      now = utcNow()
+      bookingData["created_by"] = userId
+      bookingData["created_when"] = now
+      bookingData["updated_by"] = userId
+      bookingData["updated_when"] = now
+      bookingData["status"] = 1
+      return bookingData
+
+    def _prepareBulk(self, bookingMutations: list, userId: str, restaurantId: str):
+      if len(bookingMutations) > settings.BULK_CREATE_MAX:
+         raise BookingException(400, f"cannot create more than {settings.BULK_CREATE_MAX} bookings at once")
+
+      results = [None] * len(bookingMutations)
+      documents = []
+      positions = []
+      for index, bookingMutation in enumerate(bookingMutations):
+         try:
+            documents.append(self._newBooking(bookingMutation, userId, restaurantId))
+            positions.append(index)
+         except BookingException as e:
+            results[index] = {"index": index, "statusCode": e.status_code, "detail": e.detail}
+      return results, documents, positions
+
+    def _finishBulk(self, results: list, documents: list, positions: list, restaurantId: str, writeErrors: list = ()):
+      failed = {error["index"]: error["errmsg"] for error in writeErrors}
+      for documentIndex, (index, bookingData) in enumerate(zip(positions, documents)):
+         if documentIndex in failed:
+            results[index] = {"index": index, "statusCode": 500, "detail": f"Error creating booking: {failed[documentIndex]}"}
+         else:
+            results[index] = {"index": index, "statusCode": 201, "bookingId": str(bookingData["_id"])}
+            self.availability.add(restaurantId, bookingData)
+            self.events.record(restaurantId, createdEvent(bookingData))
+
+      statusCode = 201 if all(result["statusCode"] == 201 for result in results) else 207
+      return {"statusCode": statusCode, "results": results}
+
+    @staticmethod
+    def _updateData(bookingData: dict, userId: str):
+      return {
+          "paymentId" : bookingData["paymentId"],
+          "reservationDate" : bookingData["reservationDate"],
+          "reservationRequest" : bookingData["reservationRequest"],
+          "guestNumber" : bookingData["guestNumber"],
+          "costPerPerson" : bookingData["costPerPerson"],
+          "totalAmount" : bookingData["guestNumber"] * bookingData["costPerPerson"],
+          "paymentStatus" : bookingData["paymentStatus"],
+          "bookingStatus" : bookingData["bookingStatus"],
+          "updated_by" : userId,
+          "updated_when": utcNow()
+      }
 
-    def createBooking(self, bookingMutation : BookingMutation, userId : str, restaurantId : str):
+    @staticmethod
+    def _statsDays(startFrom: date, to: date):
+      if startFrom > to:
+         raise BookingException(400, "'start' day must not be after 'to' day.")
+      if (to - startFrom).days >= settings.STATS_MAX_DAYS:
+         raise BookingException(400, f"cannot fetch more than {settings.STATS_MAX_DAYS} days of stats")
+      return startFrom.isoformat(), to.isoformat()
+
+    @staticmethod
+    def _createdDocuments(results: list, documents: list, positions: list):
+      return [bookingData for index, bookingData in zip(positions, documents) if results[index]["statusCode"] == 201]
+
+    async def _recordStats(self, restaurantId: str, removed: list = (), added: list = ()):
+      deltas = statsDeltas(restaurantId, removed, added)
+      if deltas:
+        try:
+          await self.repository.applyStats(deltas)
+        except Exception:
+          logger.exception("Error recording booking stats for restaurant %s", restaurantId)
+
+    @staticmethod
+    def _versionKeys(restaurantId: str, userId: str, *bookingIds: str) -> list:
+      return [f"restaurant:{restaurantId}", f"user:{userId}"] + [f"booking:{bookingId}" for bookingId in bookingIds]
+
+    def _applyChange(self, change: dict):
+      document = change.get("fullDocument")
+      if document is None or "reservationDate" not in document:
+        return
+      if document.get("status") == 1:
+        self.availability.update(document["restaurantId"], document)
+      else:
+        self.availability.remove(document["restaurantId"], str(document["_id"]))
+
+    def _forgetReads(self, restaurantId: str, userId: str, *bookingIds: str):
+      # a read that started before the write may have missed it; callers
+      # arriving once the write returns must not join or reuse it
+      self.singleFlight.forget(("restaurantId", restaurantId), ("userId", userId), *(("bookingId", bookingId) for bookingId in bookingIds))
+
+    async def _bumpVersions(self, keys: list):
       try:
-        bookingData = bookingMutation.model_dump()
-        
-        bookingData["restaurantId"] = restaurantId
-
-        if not (Validator.validateAmount(bookingData["guestNumber"], 0)):
-           raise BookingException(400, "guest must not be less than 1")
-        
-        if not (Validator.validateAmount(bookingData["costPerPerson"], 0)):
-            raise BookingException(400, "cost must not be less than 1")
-        
-        if bookingData["reservationDate"]["startFrom"] >= bookingData["reservationDate"]["to"]:
+        await self.repository.bumpVersions(keys)
+      except Exception as e:
+        # unlike stats, a version that did not move keeps clients on 304 with
+        # stale data, so the write is reported as failed
+        logger.exception("Error bumping versions %s", keys)
+        raise BookingException(500, f"Booking saved but its version could not be updated: {str(e)}")
+
+    async def getEtag(self, scope: str, key: str):
+      """Returns None while nothing has been written under key, so a client
+      cannot get a 304 for a resource that does not exist."""
+      try:
+        if scope == "booking":
+          # an unparseable id has no version; the read that follows answers 400
+          if not ObjectId.is_valid(key):
+            return None
+          key = self._bookingId(key)
+        version = await self.repository.findVersion(f"{scope}:{key}")
+        return formatEtag(version) if version is not None else None
+
+      except Exception as e:
+        raise BookingException(500, f"Error fetching version: {str(e)}")
+
+    async def _reserveIdempotencyKey(self, userId: str, idempotencyKey: str, bookingMutation: BookingMutation, restaurantId: str):
+      if not idempotencyKey or len(idempotencyKey) > IDEMPOTENCY_KEY_MAX_LENGTH:
+         raise BookingException(400, f"Idempotency-Key must be between 1 and {IDEMPOTENCY_KEY_MAX_LENGTH} characters.")
+
+      now = utcNow()
+      record = {
+          "_id": f"{userId}:{idempotencyKey}",
+          "fingerprint": hashlib.sha256(f"{restaurantId}:{bookingMutation.model_dump_json()}".encode()).hexdigest(),
+          "createdAt": now
+      }
+      existing = await self.repository.reserveIdempotencyKey(record)
+      if existing is not None and existing["createdAt"] <= now - timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS):
+         # the TTL monitor sweeps about once a minute, so an expired key can still be stored
+         await self.repository.releaseIdempotencyKey(record["_id"])
+         existing = await self.repository.reserveIdempotencyKey(record)
+
+      if existing is None:
+         return record["_id"], None
+      if existing["fingerprint"] != record["fingerprint"]:
+         raise BookingException(422, "Idempotency-Key was already used with a different request.")
+      if "result" not in existing:
+         raise BookingException(409, "A request with this Idempotency-Key is still being processed.")
+      return record["_id"], existing["result"]
+
+    async def _completeIdempotencyKey(self, key: str, result: dict):
+      for attempt in range(IDEMPOTENCY_COMPLETE_ATTEMPTS):
+        try:
+          await self.repository.completeIdempotencyKey(key, result)
+          return
+        except Exception:
+          logger.exception("Error storing the result for idempotency key %s (attempt %s)", key, attempt + 1)
+      # a key left without a result answers 409 until it expires; releasing it
+      # lets the client retry, at the cost of a possible second booking
+      try:
+        await self.repository.releaseIdempotencyKey(key)
+      except Exception:
+        logger.exception("Error releasing idempotency key %s", key)
+
+    @staticmethod
+    def _bookingId(bookingId: str) -> str:
+      # one spelling per booking, so cache, single-flight and version keys
+      # match however the caller cased the id
+      if not ObjectId.is_valid(bookingId):
+        raise BookingException(400, "Invalid booking id.")
+      return str(ObjectId(bookingId))
+
+    @staticmethod
+    def _pageAfter(after: str = None):
+      return Cursor.decode(after) if after else None
+
+    @staticmethod
+    def _pageResult(bookings: list, limit: int):
+      nextCursor = None
+      if len(bookings) > limit:
+         bookings = bookings[:limit]
+         nextCursor = Cursor.encode(bookings[-1]["_id"])
+      return bookings, nextCursor
+
+    @staticmethod
+    def _projection(fields: tuple) -> dict:
+      return BOOKING_PROJECTION if fields == BOOKING_FIELDS else projectionFor(fields)
+
+    async def _fetchPage(self, filter: dict, limit: int, after: str = None, includeArchived: bool = False, fields: tuple = BOOKING_FIELDS):
+      afterId = self._pageAfter(after)
+      projection = self._projection(fields)
+      bookings = await self.repository.findActive(filter, projection, afterId, limit + 1)
+      if includeArchived:
+        archived = await self.repository.findActive(filter, projection, afterId, limit + 1, archived=True)
+        # both sides are in _id order, so one cursor pages through their union;
+        # a booking caught mid-archival sits in both and is returned once
+        merged = {booking["_id"]: booking for booking in archived + bookings}
+        bookings = [merged[bookingId] for bookingId in sorted(merged)[:limit + 1]]
+
+      if not bookings and after is None:
+        raise BookingException(404, "Bookings not found.")
+
+      bookings, nextCursor = self._pageResult(bookings, limit)
+
+      serializer = serializerFor(fields)
+      bookingList = [serializer.format(booking) for booking in bookings]
+
+      return {"statusCode": 200, "bookings": bookingList, "nextCursor": nextCursor}
+
+    async def _fetchBooking(self, bookingId: str, includeArchived: bool = False, fields: tuple = BOOKING_FIELDS):
+      readAt = time.monotonic()
+      projection = self._projection(fields)
+      booking = await self.repository.findActiveById(ObjectId(bookingId), projection)
+
+      if booking is None and includeArchived:
+        booking = await self.repository.findActiveById(ObjectId(bookingId), projection, archived=True)
+        if booking is not None:
+          return {"statusCode": 200, "booking": serializerFor(fields).format(booking)}
+
+      if booking is None:
+        raise BookingException(404, "Bookings not found.")
+
+      bookingData = serializerFor(fields).format(booking)
+      # only whole bookings are cached, a partial one cannot answer other field selections
+      if fields == BOOKING_FIELDS:
+        self.cache.set(bookingId, bookingData, readAt)
+
+      return {"statusCode": 200, "booking": bookingData}
+
+    @staticmethod
+    def _formatInterval(interval: tuple):
+      start, end, bookingId, guestNumber = interval
+      return {"bookingId": bookingId, "startFrom": start, "to": end, "guestNumber": guestNumber}
+
+    async def createBooking(self, bookingMutation : BookingMutation, userId : str, restaurantId : str, idempotencyKey : str = None):
+      try:
+        key = None
+        if idempotencyKey is not None:
+          key, replay = await self._reserveIdempotencyKey(userId, idempotencyKey, bookingMutation, restaurantId)
+          if replay is not None:
+            return {**replay, "replayed": True}
+
+        try:
+          bookingData = self._newBooking(bookingMutation, userId, restaurantId)
+          if self.coalescer is not None:
+            insertedId = await self.coalescer.submit(bookingData)
+          else:
+            insertedId = await self.repository.insertOne(bookingData)
+        except Exception:
+          if key is not None:
+            await self.repository.releaseIdempotencyKey(key)
+          raise
+
+        self.availability.add(restaurantId, bookingData)
+        self._forgetReads(restaurantId, userId, str(insertedId))
+        self.events.record(restaurantId, createdEvent(bookingData))
+        await self._recordStats(restaurantId, added=[bookingData])
+
+        response = {"statusCode": 201, "bookingId": str(insertedId)}
+        # completed first, so a retry after a failed version bump replays the booking
+        if key is not None:
+          await self._completeIdempotencyKey(key, response)
+        await self._bumpVersions(self._versionKeys(restaurantId, userId, str(insertedId)))
+        return response
+
+      except BookingException as e:
+        raise e
+      except Exception as e:
+        raise BookingException(500, f"Error creating booking: {str(e)}")
+
+    async def createBookings(self, bookingMutations: list, userId: str, restaurantId: str):
+      try:
+        results, documents, positions = self._prepareBulk(bookingMutations, userId, restaurantId)
+        writeErrors = await self.repository.insertMany(documents) if documents else []
+
+        response = self._finishBulk(results, documents, positions, restaurantId, writeErrors)
+        created = self._createdDocuments(results, documents, positions)
+        if created:
+          self._forgetReads(restaurantId, userId, *(str(bookingData["_id"]) for bookingData in created))
+        await self._recordStats(restaurantId, added=created)
+        if created:
+          await self._bumpVersions(self._versionKeys(restaurantId, userId, *(str(bookingData["_id"]) for bookingData in created)))
+        return response
+
+      except BookingException as e:
+        raise e
+      except Exception as e:
+        raise BookingException(500, f"Error creating bookings: {str(e)}")
+
+    async def getBookingByRestaurantId(self, restaurantId: str, limit: int = None, after: str = None, includeArchived: bool = False, fields: str = None, version: str = None):
+      """version is the ETag the caller read first; keying the flight on it
+      keeps a response from coming out of a query older than its tag."""
+      try:
+        limit = limit or settings.PAGE_SIZE_DEFAULT
+        restaurantId = str(restaurantId)
+        selected = selectFields(fields)
+        return await self.singleFlight.do(("restaurantId", restaurantId, limit, after, includeArchived, selected, version), lambda: self._fetchPage({"restaurantId": restaurantId}, limit, after, includeArchived, selected))
+
+      except BookingException as e:
+        raise e
+      except Exception as e:
+        raise BookingException(500, f"Error fetching bookings by restaurant ID: {str(e)}")
+
+    async def exportBookingByRestaurantId(self, restaurantId: str, includeArchived: bool = False):
+      filter = {"restaurantId": str(restaurantId)}
+      async for batch in self.repository.iterActive(filter, BOOKING_PROJECTION, settings.EXPORT_BATCH_SIZE):
+        yield [bookingSerializer.format(booking) for booking in batch]
+      if includeArchived:
+        async for batch in self.repository.iterActive(filter, BOOKING_PROJECTION, settings.EXPORT_BATCH_SIZE, archived=True):
+          # a booking caught mid-archival sits in both and was exported already
+          exported = {booking["_id"] for booking in await self.repository.findActiveByIds([booking["_id"] for booking in batch], {"_id": 1})}
+          bookings = [bookingSerializer.format(booking) for booking in batch if booking["_id"] not in exported]
+          if bookings:
+            yield bookings
+
+    async def getBookingByUserId(self, userId, limit: int = None, after: str = None, includeArchived: bool = False, fields: str = None, version: str = None):
+      try:
+        limit = limit or settings.PAGE_SIZE_DEFAULT
+        selected = selectFields(fields)
+        return await self.singleFlight.do(("userId", userId, limit, after, includeArchived, selected, version), lambda: self._fetchPage({"created_by": userId}, limit, after, includeArchived, selected))
+
+      except BookingException as e:
+        raise e
+      except Exception as e:
+        raise BookingException(500, f"Error fetching bookings by user ID: {str(e)}")
+
+    async def getBookingById(self, bookingId: str, includeArchived: bool = False, fields: str = None, version: str = None):
+      try:
+        bookingId = self._bookingId(bookingId)
+        selected = selectFields(fields)
+        bookingData = self.cache.get(bookingId)
+        if bookingData is not None:
+          if selected != BOOKING_FIELDS:
+            bookingData = {key: bookingData[key] for key, _ in selected}
+          return {"statusCode": 200, "booking": bookingData}
+
+        return await self.singleFlight.do(("bookingId", bookingId, includeArchived, selected, version), lambda: self._fetchBooking(bookingId, includeArchived, selected))
+
+      except BookingException as e:
+        raise e
+      except Exception as e:
+        raise BookingException(500, f"Error fetching booking by ID: {str(e)}")
+
+    async def getBookingsByIds(self, bookingIds: list, includeArchived: bool = False, fields: str = None):
+      try:
+        if len(bookingIds) > settings.BATCH_GET_MAX:
+          raise BookingException(400, f"cannot fetch more than {settings.BATCH_GET_MAX} bookings at once")
+        selected = selectFields(fields)
+
+        parsed = {bookingId: ObjectId(bookingId) for bookingId in dict.fromkeys(bookingIds) if ObjectId.is_valid(bookingId)}
+        found = {}
+        missing = []
+        for objectId in dict.fromkeys(parsed.values()):
+          bookingData = self.cache.get(str(objectId))
+          if bookingData is None:
+            missing.append(objectId)
+          else:
+            found[objectId] = bookingData if selected == BOOKING_FIELDS else {key: bookingData[key] for key, _ in selected}
+
+        if missing:
+          readAt = time.monotonic()
+          projection = self._projection(selected)
+          serializer = serializerFor(selected)
+          bookings = await self.repository.findActiveByIds(missing, projection)
+          for booking in bookings:
+            found[booking["_id"]] = serializer.format(booking)
+            if selected == BOOKING_FIELDS:
+              self.cache.set(str(booking["_id"]), found[booking["_id"]], readAt)
+          if includeArchived and len(bookings) < len(missing):
+            # archived bookings stay out of the cache, plain by-id reads must not see them
+            archived = await self.repository.findActiveByIds([objectId for objectId in missing if objectId not in found], projection, archived=True)
+            for booking in archived:
+              found[booking["_id"]] = serializer.format(booking)
+
+        results = []
+        for bookingId in bookingIds:
+          objectId = parsed.get(bookingId)
+          if objectId is None:
+            results.append({"bookingId": bookingId, "statusCode": 400, "detail": "Invalid booking id."})
+          elif objectId in found:
+            results.append({"bookingId": bookingId, "statusCode": 200, "booking": found[objectId]})
+          else:
+            results.append({"bookingId": bookingId, "statusCode": 404, "detail": "Booking not found."})
+
+        statusCode = 200 if all(result["statusCode"] == 200 for result in results) else 207
+        return {"statusCode": statusCode, "results": results}
+
+      except BookingException as e:
+        raise e
+      except Exception as e:
+        raise BookingException(500, f"Error fetching bookings by ID: {str(e)}")
+
+    async def getBookingByDate(self, startfrom: datetime, to: datetime):
+      try:
+        bookings = await self.repository.findActiveByDate(startfrom, to, BOOKING_PROJECTION)
+
+        if not bookings:
+          raise BookingException(404, "Bookings not found.")
+
+        bookingList = [bookingSerializer.format(booking) for booking in bookings]
+
+        return {"statusCode": 200, "bookings": bookingList}
+
+      except BookingException as e:
+        raise e
+      except Exception as e:
+        raise BookingException(500, f"Error fetching bookings by date: {str(e)}")
+
+    async def searchBookings(self, startFrom: datetime, to: datetime, restaurantId: str = None, bookingStatus: BookingStatus = None, paymentStatus: PaymentStatus = None, limit: int = None, after: str = None, includeArchived: bool = False, fields: str = None):
+      try:
+        selected = selectFields(fields)
+        startFrom, to = toNaiveUtc(startFrom), toNaiveUtc(to)
+        if startFrom >= to:
+          raise BookingException(400, "'from' must be earlier than 'to'.")
+        if to - startFrom > timedelta(days=settings.SEARCH_MAX_DAYS):
+          raise BookingException(400, f"search window must not exceed {settings.SEARCH_MAX_DAYS} days")
+
+        filter = {}
+        if restaurantId is not None:
+          filter["restaurantId"] = str(restaurantId)
+        if bookingStatus is not None:
+          filter["bookingStatus"] = BookingStatus(bookingStatus).value
+        if paymentStatus is not None:
+          filter["paymentStatus"] = PaymentStatus(paymentStatus).value
+
+        limit = limit or settings.PAGE_SIZE_DEFAULT
+        keyset = Cursor.decodeKeyset(after) if after else None
+        # the keyset cursor needs startFrom even when the caller did not ask for it
+        projection = {**self._projection(selected), "reservationDate": 1}
+        bookings = await self.repository.findActiveInRange(filter, startFrom, to, projection, keyset, limit + 1)
+        if includeArchived:
+          archived = await self.repository.findActiveInRange(filter, startFrom, to, projection, keyset, limit + 1, archived=True)
+          # both sides are in (startFrom, _id) order, so the keyset pages through their union
+          merged = {booking["_id"]: booking for booking in archived + bookings}
+          bookings = sorted(merged.values(), key=lambda booking: (booking["reservationDate"]["startFrom"], booking["_id"]))[:limit + 1]
+
+        nextCursor = None
+        if len(bookings) > limit:
+          bookings = bookings[:limit]
+          nextCursor = Cursor.encodeKeyset(bookings[-1]["reservationDate"]["startFrom"], bookings[-1]["_id"])
+
+        serializer = serializerFor(selected)
+        bookingList = [serializer.format(booking) for booking in bookings]
+
+        return {"statusCode": 200, "bookings": bookingList, "nextCursor": nextCursor}
+
+      except BookingException as e:
+        raise e
+      except Exception as e:
+        raise BookingException(500, f"Error searching bookings: {str(e)}")
+
+    async def getAvailability(self, restaurantId: str, startFrom: datetime, to: datetime = None):
+      try:
+        if to is not None and startFrom >= to:
           raise BookingException(400, "'start' time must be earlier than 'to' time.")
 
-        bookingData["totalAmount"] = bookingData["guestNumber"] * bookingData["costPerPerson"]
-        bookingData["created_by"] = userId
-        bookingData["created_when"] = datetime.now().strftime("%d%m%Y") 
-        bookingData["updated_by"] = userId 
-        bookingData["updated_when"] = datetime.now().strftime("%d%m%Y")
-        bookingData["status"] = 1
-        result = self.collection.insert_one(bookingData)
+        if self.availability.isStale(restaurantId):
+          pending = self.availability.beginLoad(restaurantId)
+          try:
+            bookings = await self.repository.findActive({"restaurantId": str(restaurantId)}, AVAILABILITY_PROJECTION)
+          except Exception:
+            self.availability.endLoad(restaurantId, pending)
+            raise
+          self.availability.load(restaurantId, bookings, pending)
+
+        intervals = self.availability.overlapping(restaurantId, startFrom, to)
+
+        return {"statusCode": 200, "bookings": [self._formatInterval(interval) for interval in intervals], "seatsTaken": AvailabilityIndex.peakSeats(intervals, startFrom, to)}
 
-        return {"statusCode": 201, "bookingId": str(result.inserted_id)}
-      
       except BookingException as e:
-            raise e 
+        raise e
       except Exception as e:
-          raise BookingException(500, f"Error creating booking: {str(e)}")      
-
-    def getBookingByRestaurantId(self, restaurantId: str):
-       try:
-          
-          bookings = list(self.collection.find({"restaurantId": str(restaurantId), "status": 1}))
-          
-          if not bookings:
-             raise BookingException(404, "Bookings not found.")
-
-          bookingList = [{
-            "bookingId": str(booking["_id"]),
-            "restaurantId": str(booking["restaurantId"]),
-            "paymentId": booking["paymentId"],
-            "reservationDate": str(booking["reservationDate"]),
-            "reservationRequest": booking["reservationRequest"],
-            "guestNumber": booking["guestNumber"],
-            "costPerPerson": booking["costPerPerson"],
-            "totalAmount": booking["totalAmount"],
-            "paymentStatus": booking["paymentStatus"],
-            "bookingStatus": booking["bookingStatus"],
-            "createdBy": booking["created_by"],
-            "createdWhen": booking["created_when"],
-            "updatedBy": booking["updated_by"],
-            "updatedWhen": booking["updated_when"]
-          } for booking in bookings]
-
-          return {"statusCode": 200, "bookings": bookingList} 
-       
-       except BookingException as e:
-         raise e
-       except Exception as e:
-         raise BookingException(500, f"Error fetching bookings by restaurant ID: {str(e)}")
-
-    
-    def getBookingByUserId(self, userId):
-       try:
-          bookings = list(self.collection.find({"created_by": userId, "status": 1}))
-
-          if not bookings:
-             raise BookingException(404, "Bookings not found.")
-          
-          bookingList = [{
-            "bookingId": str(booking["_id"]),
-            "restaurantId": str(booking["restaurantId"]),
-            "paymentId": booking["paymentId"],
-            "reservationDate": str(booking["reservationDate"]),
-            "reservationRequest": booking["reservationRequest"],
-            "guestNumber": booking["guestNumber"],
-            "costPerPerson": booking["costPerPerson"],
-            "totalAmount": booking["totalAmount"],
-            "paymentStatus": booking["paymentStatus"],
-            "bookingStatus": booking["bookingStatus"],
-            "createdBy": booking["created_by"],
-            "createdWhen": booking["created_when"],
-            "updatedBy": booking["updated_by"],
-            "updatedWhen": booking["updated_when"]
-          } for booking in bookings]
-       
-          return {"statusCode": 200, "bookings": bookingList} 
-
-       except BookingException as e:
-         raise e
-       except Exception as e:
-         raise BookingException(500, f"Error fetching bookings by user ID: {str(e)}")
-
-    def getBookingById(self, bookingId: str):
-       try:
-          booking = self.collection.find_one({"_id": ObjectId(bookingId), "status": 1})
-
-          if booking is None:
-             raise BookingException(404, "Bookings not found.")
-          
-          bookingData = {
-            "bookingId": str(booking["_id"]),
-            "restaurantId": str(booking["restaurantId"]),
-            "paymentId": booking["paymentId"],
-            "reservationDate": str(booking["reservationDate"]),
-            "reservationRequest": booking["reservationRequest"],
-            "guestNumber": booking["guestNumber"],
-            "costPerPerson": booking["costPerPerson"],
-            "totalAmount": booking["totalAmount"],
-            "paymentStatus": booking["paymentStatus"],
-            "bookingStatus": booking["bookingStatus"],
-            "createdBy": booking["created_by"],
-            "createdWhen": booking["created_when"],
-            "updatedBy": booking["updated_by"],
-            "updatedWhen": booking["updated_when"]
-          }
-       
-          return {"statusCode": 200, "booking": bookingData} 
-
-       except BookingException as e:
-         raise e
-       except Exception as e:
-         raise BookingException(500, f"Error fetching booking by ID: {str(e)}")
-    
-    def getBookingByDate(self, startfrom: datetime, to: datetime):
-       try:
-          query = {
-            "status": 1,
-            "$or": [
-                {"reservationDate.startFrom": {"$eq": startfrom}},
-                {"reservationDate.to": {"$eq": to}}
-            ]
-          }
-
-          bookings = list(self.collection.find(query))
-
-          if not bookings:
-             raise BookingException(404, "Bookings not found.")
-          
-          bookingList = [{
-            "bookingId": str(booking["_id"]),
-            "restaurantId": str(booking["restaurantId"]),
-            "paymentId": booking["paymentId"],
-            "reservationDate": str(booking["reservationDate"]),
-            "reservationRequest": booking["reservationRequest"],
-            "guestNumber": booking["guestNumber"],
-            "costPerPerson": booking["costPerPerson"],
-            "totalAmount": booking["totalAmount"],
-            "paymentStatus": booking["paymentStatus"],
-            "bookingStatus": booking["bookingStatus"],
-            "createdBy": booking["created_by"],
-            "createdWhen": booking["created_when"],
-            "updatedBy": booking["updated_by"],
-            "updatedWhen": booking["updated_when"]
-          } for booking in bookings]
-       
-          return {"statusCode": 200, "bookings": bookingList} 
-
-       except BookingException as e:
-         raise e
-       except Exception as e:
-         raise BookingException(500, f"Error fetching bookings by date: {str(e)}")
-       
-    def cancelBooking(self, bookingId: str, userId: str):
-       try:
-          existing_booking = self.collection.find_one({"_id": ObjectId(bookingId)})
-          if not existing_booking:
-             raise BookingException(404, "Booking not found.")
-          if existing_booking["status"] == 0:
-             raise BookingException(400, "Booking is already inactive.")
-          updateData = {
-             "$set": {
-                  "status": 0,
-                  "updated_by": userId,
-                  "updated_when": datetime.now().strftime("%d%m%Y")
-              }
-          }
-          result = self.collection.update_one({"_id": ObjectId(bookingId)}, updateData)
-
-          if result.modified_count == 0:
-             raise BookingException(500, "Error updating booking status.")
-          return {"statusCode": 200, "bookingId": bookingId}
-       
-       except BookingException as e:
-          raise e
-       except Exception as e:
-          raise BookingException(500, f"Error updating booking status: {str(e)}")
-
-    def updateStatus(self, bookingMutation : BookingMutation, userId : str, bookingId : str):
-       try:
-        bookingData = bookingMutation.model_dump()
+        raise BookingException(500, f"Error fetching availability: {str(e)}")
 
-        
-
-        if not (Validator.validateAmount(bookingData["guestNumber"], 0)):
-            raise BookingException(400, "guest must not be less than 1")
-        
-        if not (Validator.validateAmount(bookingData["costPerPerson"], 0)):
-            raise BookingException(400, "cost must not be less than 1")
-        
-        if bookingData["reservationDate"]["startFrom"] >= bookingData["reservationDate"]["to"]:
-            raise BookingException(400, "'start' time must be earlier than 'to' time.")
-        
-        existing_booking = self.collection.find_one({"_id": ObjectId(bookingId)})
-        if not existing_booking:
-            raise BookingException(404, "Booking not found.")
-        if existing_booking["status"] == 0:
-            raise BookingException(400, "cannot update booking because it is inactive.")
-        
-        updateData = {
-           "$set": {
-               "paymentId" : bookingData["paymentId"],
-               "reservationDate" : bookingData["reservationDate"],
-               "reservationRequest" : bookingData["reservationRequest"],
-               "guestNumber" : bookingData["guestNumber"],
-               "costPerPerson" : bookingData["costPerPerson"],
-               "paymentStatus" : bookingData["paymentStatus"],
-               "bookingStatus" : bookingData["bookingStatus"],
-               "updated_by" : userId,
-               "updated_When": datetime.now().strftime("%d%m%Y") 
-           }
+    async def getBookingStats(self, restaurantId: str, startFrom: date, to: date):
+      try:
+        startDay, toDay = self._statsDays(startFrom, to)
+        stats = await self.repository.findStats(restaurantId, startDay, toDay)
+
+        return {"statusCode": 200, "stats": stats}
+
+      except BookingException as e:
+        raise e
+      except Exception as e:
+        raise BookingException(500, f"Error fetching booking stats: {str(e)}")
+
+    async def cancelBooking(self, bookingId: str, userId: str):
+      try:
+        bookingId = self._bookingId(bookingId)
+        cancelData = {
+          "status": 0,
+          "updated_by": userId,
+          "updated_when": utcNow()
         }
+        existing_booking = await self.repository.updateIfActive(ObjectId(bookingId), cancelData, WRITE_PROJECTION)
 
-        result = self.collection.update_one({"_id": ObjectId(bookingId)}, updateData)
+        if not existing_booking:
+          raise BookingException(404, "Booking not found.")
+        if existing_booking["status"] == 0:
+          raise BookingException(400, "Booking is already inactive.")
 
-        if result.modified_count == 0:
-            raise BookingException(500, "Error updating booking status.")
+        self.availability.remove(existing_booking["restaurantId"], bookingId)
+        self.cache.delete(bookingId)
+        self._forgetReads(existing_booking["restaurantId"], existing_booking["created_by"], bookingId)
+        self.events.record(existing_booking["restaurantId"], updatedEvent(bookingId, cancelData))
+        await self._recordStats(existing_booking["restaurantId"], removed=[existing_booking])
+        await self._bumpVersions(self._versionKeys(existing_booking["restaurantId"], existing_booking["created_by"], bookingId))
         return {"statusCode": 200, "bookingId": bookingId}
-       
-       except BookingException as e:
-          raise e
-       except Exception as e:
-          raise BookingException(500, f"Error updating booking status: {str(e)}")
-       
 
+      except BookingException as e:
+        raise e
+      except Exception as e:
+        raise BookingException(500, f"Error updating booking status: {str(e)}")
+
+    async def updateStatus(self, bookingMutation : BookingMutation, userId : str, bookingId : str):
+      try:
+        bookingId = self._bookingId(bookingId)
+        bookingData = bookingMutation.model_dump()
 
+        self._validateBooking(bookingData)
 
+        updateData = self._updateData(bookingData, userId)
+        existing_booking = await self.repository.updateIfActive(ObjectId(bookingId), updateData, WRITE_PROJECTION)
 
-      
-    
+        if not existing_booking:
+          raise BookingException(404, "Booking not found.")
+        if existing_booking["status"] == 0:
+          raise BookingException(400, "cannot update booking because it is inactive.")
 
-   
+        self.availability.update(existing_booking["restaurantId"], {**bookingData, "_id": bookingId})
+        self.cache.delete(bookingId)
+        self._forgetReads(existing_booking["restaurantId"], existing_booking["created_by"], bookingId)
+        self.events.record(existing_booking["restaurantId"], updatedEvent(bookingId, updateData))
+        await self._recordStats(existing_booking["restaurantId"], removed=[existing_booking], added=[bookingData])
+        await self._bumpVersions(self._versionKeys(existing_booking["restaurantId"], existing_booking["created_by"], bookingId))
+        return {"statusCode": 200, "bookingId": bookingId}
 
+      except BookingException as e:
+        raise e
+      except Exception as e:
+        raise BookingException(500, f"Error updating booking status: {str(e)}")
@@ -0,0 +1,106 @@
+import argparse
+from pymongo import DeleteMany, ReplaceOne, UpdateOne
+from app.helpers.dates import toNaiveUtc
+from app.models.bookingBaseModel import PaymentStatus
+
+STATS_FIELDS = ("bookings", "covers", "revenue")
+
+def statsKey(restaurantId: str, day: str) -> str:
+    return f"{restaurantId}:{day}"
+
+def _contribution(booking: dict, sign: int):
+    day = toNaiveUtc(booking["reservationDate"]["startFrom"]).strftime("%Y-%m-%d")
+    values = {
+        "bookings": sign,
+        "covers": sign * booking["guestNumber"],
+        "revenue": sign * booking["guestNumber"] * booking["costPerPerson"]
+    }
+    paymentStatus = PaymentStatus(booking["paymentStatus"]).value
+    increments = dict(values)
+    for field, value in values.items():
+        increments[f"paymentStatus.{paymentStatus}.{field}"] = value
+    return day, increments
+
+def statsDeltas(restaurantId: str, removed: list = (), added: list = ()) -> dict:
+    deltas = {}
+    for bookings, sign in ((removed, -1), (added, 1)):
+        for booking in bookings:
+            day, increments = _contribution(booking, sign)
+            delta = deltas.setdefault(statsKey(restaurantId, day), {"restaurantId": restaurantId, "day": day, "inc": {}})["inc"]
+            for field, value in increments.items():
+                delta[field] = delta.get(field, 0) + value
+
+    for key in list(deltas):
+        deltas[key]["inc"] = {field: value for field, value in deltas[key]["inc"].items() if value != 0}
+        if not deltas[key]["inc"]:
+            del deltas[key]
+    return deltas
+
+def statsOperations(deltas: dict) -> list:
+    return [UpdateOne(
+        {"_id": key},
+        {"$inc": delta["inc"], "$setOnInsert": {"restaurantId": delta["restaurantId"], "day": delta["day"]}},
+        upsert=True
+    ) for key, delta in deltas.items()]
+
+def statsRangeQuery(restaurantId: str, startFrom: str, to: str) -> dict:
+    return {"_id": {"$gte": statsKey(restaurantId, startFrom), "$lte": statsKey(restaurantId, to)}}
+
+def rebuildPipeline(restaurantId: str = None) -> list:
+    match = {"status": 1}
+    if restaurantId is not None:
+        match["restaurantId"] = restaurantId
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "restaurantId": "$restaurantId",
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$reservationDate.startFrom"}},
+                "paymentStatus": "$paymentStatus"
+            },
+            "bookings": {"$sum": 1},
+            "covers": {"$sum": "$guestNumber"},
+            "revenue": {"$sum": {"$multiply": ["$guestNumber", "$costPerPerson"]}}
+        }}
+    ]
+
+def _groups(collections: list, restaurantId: str = None):
+    for collection in collections:
+        yield from collection.aggregate(rebuildPipeline(restaurantId), allowDiskUse=True)
+
+def rebuildStats(collection, statsCollection, restaurantId: str = None, archive=None) -> int:
+    # archived bookings that were not cancelled still count towards their day
+    collections = [collection] if archive is None else [collection, archive]
+    days = {}
+    for group in _groups(collections, restaurantId):
+        key = statsKey(group["_id"]["restaurantId"], group["_id"]["day"])
+        stats = days.setdefault(key, {
+            "_id": key,
+            "restaurantId": group["_id"]["restaurantId"],
+            "day": group["_id"]["day"],
+            "bookings": 0,
+            "covers": 0,
+            "revenue": 0,
+            "paymentStatus": {}
+        })
+        paymentStats = stats["paymentStatus"].setdefault(group["_id"]["paymentStatus"], dict.fromkeys(STATS_FIELDS, 0))
+        for field in STATS_FIELDS:
+            paymentStats[field] += group[field]
+            stats[field] += group[field]
+
+    scope = {} if restaurantId is None else {"restaurantId": restaurantId}
+    operations = [DeleteMany(scope)] + [ReplaceOne({"_id": key}, stats, upsert=True) for key, stats in days.items()]
+    statsCollection.bulk_write(operations, ordered=True)
+    return len(days)
+
+if __name__ == "__main__":
+    from app.core.config import settings
+    from app.core.database import createMongoClient
+
+    parser = argparse.ArgumentParser(description="Recompute the daily booking stats from the booking collection.")
+    parser.add_argument("--restaurantId", help="only rebuild this restaurant")
+    args = parser.parse_args()
+
+    db = createMongoClient()[settings.DB_NAME]
+    count = rebuildStats(db[settings.COLLECTION_NAME], db[settings.STATS_COLLECTION_NAME], args.restaurantId, db[settings.ARCHIVE_COLLECTION_NAME])
+    print(f"Rebuilt {count} daily stats documents.")
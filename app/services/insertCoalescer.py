@@ -0,0 +1,92 @@
+import asyncio
+from bson import ObjectId
+from pymongo.errors import WriteError
+from app.helpers.exception import BookingException
+
+class InsertCoalescer:
+    """Gathers documents from concurrent callers and writes them with a single
+    insertMany once maxBatch documents are waiting or windowSeconds has passed.
+    Each caller gets back its own _id, or the write error for its document."""
+
+    def __init__(self, insertMany, maxBatch: int, windowSeconds: float, maxPending: int, queueTimeoutSeconds: float):
+        self.insertMany = insertMany
+        self.maxBatch = maxBatch
+        self.windowSeconds = windowSeconds
+        self.queueTimeoutSeconds = queueTimeoutSeconds
+        self.slots = asyncio.Semaphore(maxPending)
+        self.pending = []
+        self.timer = None
+        self.writes = set()
+        self.closed = False
+        self.batches = 0
+        self.documents = 0
+
+    async def submit(self, document: dict) -> ObjectId:
+        if self.closed:
+            raise BookingException(503, "Service is shutting down.")
+        if not self.slots.locked():
+            await self.slots.acquire()
+        else:
+            try:
+                await asyncio.wait_for(self.slots.acquire(), self.queueTimeoutSeconds)
+            except asyncio.TimeoutError:
+                raise BookingException(503, "Too many bookings are waiting to be written, retry shortly.")
+
+        try:
+            if self.closed:
+                raise BookingException(503, "Service is shutting down.")
+            document.setdefault("_id", ObjectId())
+            future = asyncio.get_running_loop().create_future()
+            self.pending.append((document, future))
+            if len(self.pending) >= self.maxBatch:
+                self._flush()
+            elif self.timer is None:
+                self.timer = asyncio.get_running_loop().call_later(self.windowSeconds, self._flush)
+            return await future
+        finally:
+            self.slots.release()
+
+    def _flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        write = asyncio.ensure_future(self._write(batch))
+        self.writes.add(write)
+        write.add_done_callback(self.writes.discard)
+
+    async def _write(self, batch: list):
+        try:
+            writeErrors = await self.insertMany([document for document, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        failed = {error["index"]: error for error in writeErrors}
+        for index, (document, future) in enumerate(batch):
+            if future.done():
+                continue
+            if index in failed:
+                future.set_exception(WriteError(failed[index]["errmsg"], failed[index].get("code"), failed[index]))
+            else:
+                future.set_result(document["_id"])
+        self.batches += 1
+        self.documents += len(batch)
+
+    async def close(self):
+        self.closed = True
+        self._flush()
+        if self.writes:
+            await asyncio.gather(*self.writes, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self.pending),
+            "batches": self.batches,
+            "documents": self.documents,
+            "averageBatch": round(self.documents / self.batches, 2) if self.batches else 0
+        }
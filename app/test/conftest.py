@@ -0,0 +1,33 @@
+import os
+
+os.environ.setdefault("MONGODB_MOCK", "true")
+
+import mongomock
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from app.models.bookingBaseModel import BookingMutation
+from app.repositories.inMemoryBookingRepository import InMemoryBookingRepository
+from app.repositories.mongoBookingRepository import MongoBookingRepository
+
+REPOSITORIES = {
+    "memory": InMemoryBookingRepository,
+    "motor": lambda: MongoBookingRepository(AsyncMongoMockClient(), True),
+    "pymongo": lambda: MongoBookingRepository(mongomock.MongoClient(), False)
+}
+
+@pytest.fixture(params=REPOSITORIES.keys())
+def repository(request):
+    return REPOSITORIES[request.param]()
+
+def buildMutation(guestNumber=5, paymentStatus="Unpaid", startFrom="2024-10-08T09:00:00", to="2024-10-08T11:00:00"):
+    return BookingMutation(**{
+        "paymentId" : "test123",
+        "reservationDate" : {
+            "startFrom" : startFrom,
+            "to" : to
+        },
+        "reservationRequest" : "WHATISTHIS?",
+        "guestNumber" : guestNumber,
+        "costPerPerson" : 20,
+        "paymentStatus" : paymentStatus
+    })
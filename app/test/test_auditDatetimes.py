@@ -0,0 +1,77 @@
+from datetime import datetime
+import mongomock
+from bson import ObjectId
+from app.migrations.auditDatetimes import MIGRATION_ID, migrate
+
+
+def buildLegacyBookings():
+    return [
+        {"_id": ObjectId(), "created_when": "08102024", "updated_when": "08102024"},
+        {"_id": ObjectId(), "created_when": "08102024", "updated_when": "08102024", "updated_When": "10102024"},
+        {"_id": ObjectId(), "created_when": "not a date", "updated_when": "08102024"},
+        {"_id": ObjectId(), "created_when": datetime(2024, 10, 9, 12), "updated_when": datetime(2024, 10, 9, 12)},
+        {"_id": ObjectId(), "created_when": "01112024", "updated_when": "01112024"},
+    ]
+
+def test_migrate_ConvertsLegacyAuditFields():
+    db = mongomock.MongoClient()["BOOKING"]
+    bookings = buildLegacyBookings()
+    db.BOOKING.insert_many(bookings)
+
+    totals = migrate(db.BOOKING, db.MIGRATIONS, batchSize=2, report=lambda message: None)
+    migrated = {booking["_id"]: booking for booking in db.BOOKING.find()}
+
+    assert totals == {"scanned": 4, "migrated": 3, "invalid": 1, "skipped": 0}
+    assert migrated[bookings[0]["_id"]]["created_when"] == datetime(2024, 10, 8)
+    assert migrated[bookings[1]["_id"]]["updated_when"] == datetime(2024, 10, 10)
+    assert "updated_When" not in migrated[bookings[1]["_id"]]
+    assert migrated[bookings[2]["_id"]]["created_when"] == "not a date"
+    assert "completedAt" in db.MIGRATIONS.find_one({"_id": MIGRATION_ID})
+
+def test_migrate_ResumesFromCheckpoint():
+    db = mongomock.MongoClient()["BOOKING"]
+    bookings = buildLegacyBookings()
+    db.BOOKING.insert_many(bookings)
+
+    first = migrate(db.BOOKING, db.MIGRATIONS, batchSize=2, maxBatches=1, report=lambda message: None)
+    checkpoint = db.MIGRATIONS.find_one({"_id": MIGRATION_ID})
+    second = migrate(db.BOOKING, db.MIGRATIONS, batchSize=2, report=lambda message: None)
+
+    assert first["scanned"] == 2 and "completedAt" not in checkpoint
+    assert checkpoint["lastId"] == bookings[1]["_id"]
+    assert second == {"scanned": 4, "migrated": 3, "invalid": 1, "skipped": 0}
+    assert db.BOOKING.count_documents({"updated_when": {"$type": "string"}}) == 1
+
+class RewritingCollection:
+    """Rewrites documents right before the first bulk write, as the app would
+    between the migration's read and its guarded update."""
+
+    def __init__(self, collection, rewrites: dict):
+        self.collection = collection
+        self.rewrites = rewrites
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    def bulk_write(self, operations, **kwargs):
+        for bookingId, update in self.rewrites.items():
+            self.collection.update_one({"_id": bookingId}, update)
+        self.rewrites = {}
+        return self.collection.bulk_write(operations, **kwargs)
+
+def test_migrateConcurrentRewrite_RetriesBeforeCompleting():
+    db = mongomock.MongoClient()["BOOKING"]
+    bookings = buildLegacyBookings()
+    db.BOOKING.insert_many(bookings)
+    collection = RewritingCollection(db.BOOKING, {
+        bookings[0]["_id"]: {"$set": {"updated_When": "12102024"}},
+        bookings[1]["_id"]: {"$set": {"created_when": datetime(2024, 10, 8), "updated_when": datetime(2024, 10, 11)}, "$unset": {"updated_When": ""}}
+    })
+
+    totals = migrate(collection, db.MIGRATIONS, batchSize=2, report=lambda message: None)
+    migrated = {booking["_id"]: booking for booking in db.BOOKING.find()}
+
+    assert totals == {"scanned": 4, "migrated": 2, "invalid": 1, "skipped": 0}
+    assert migrated[bookings[0]["_id"]]["updated_when"] == datetime(2024, 10, 12)
+    assert migrated[bookings[1]["_id"]]["updated_when"] == datetime(2024, 10, 11)
+    assert "completedAt" in db.MIGRATIONS.find_one({"_id": MIGRATION_ID})
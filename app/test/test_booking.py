@@ -1,4 +1,7 @@
+import json
+import pytest
 from fastapi.testclient import TestClient
+from app.core.config import settings
 from app.helpers.exception import BookingException
 from main import app 
 from unittest.mock import patch
@@ -6,6 +9,11 @@ from unittest.mock import patch
 
 client = TestClient(app)
 
+@pytest.fixture(autouse=True, scope="module")
+def lifespan():
+    with client:
+        yield
+
 
 def test_addBooking_ReturnSuccess():
     userId = 1
@@ -80,7 +88,8 @@ def test_retrieveBookingByRestaurantId_ReturnSuccess():
     assert response.status_code == 200
     assert response.json() == {
         "message": "Bookings fetched successfully",
-        "bookings": mockResponse["bookings"]
+        "bookings": mockResponse["bookings"],
+        "nextCursor": None
     }
 
 def test_retrieveBookingByRestaurantId_ReturnFailure():
@@ -126,7 +135,8 @@ def test_retrieveBookingByUserId_ReturnSuccess():
     assert response.status_code == 200
     assert response.json() == {
         "message": "Bookings fetched successfully",
-        "bookings": mockResponse["bookings"]
+        "bookings": mockResponse["bookings"],
+        "nextCursor": None
     }
 
 def test_retrieveBookingByUserId_ReturnFailure():
@@ -280,4 +290,241 @@ def test_updateStatus_ReturnFailure_InvalidData():
         response = client.put(f"/api/booking/userId123/update/670ba40b57ee2ddfe948510e", json=bookingData)
     
     assert response.status_code == 400
-    assert response.json() == {"detail": "guest must not be less than 1"}
\ No newline at end of file
+    assert response.json() == {"detail": "guest must not be less than 1"}
+
+def test_retrieveBookingByRestaurantIdInvalidCursor_ReturnError():
+    response = client.get("/api/booking/get/restaurantId/1234567890abcdef?after=not-a-cursor")
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid pagination cursor."}
+
+def test_retrieveBookingByUserIdLimitTooLarge_ReturnError():
+    response = client.get("/api/booking/get/userId/1?limit=100000")
+
+    assert response.status_code == 422
+
+def test_exportBookingByRestaurantId_ReturnSuccess():
+    restaurantId = "exportRestaurant"
+    bookingData = {
+        "paymentId" : "test123",
+        "reservationDate" : {
+            "startFrom" : "2024-10-08T09:00:00",
+            "to" : "2024-12-08T09:00:00"
+        },
+        "reservationRequest" : "WHATISTHIS?",
+        "guestNumber" : 5,
+        "costPerPerson" : 20
+    }
+    bookingIds = [client.post(f"/api/booking/1/{restaurantId}/create", json=bookingData).json()["bookingId"] for _ in range(3)]
+
+    plainResponse = client.get(f"/api/booking/export/restaurantId/{restaurantId}", headers={"Accept-Encoding": "identity"})
+    gzipResponse = client.get(f"/api/booking/export/restaurantId/{restaurantId}", headers={"Accept-Encoding": "gzip"})
+    refusedResponse = client.get(f"/api/booking/export/restaurantId/{restaurantId}", headers={"Accept-Encoding": "gzip;q=0"})
+
+    assert plainResponse.status_code == 200
+    assert plainResponse.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line)["bookingId"] for line in plainResponse.text.splitlines()] == bookingIds
+    assert gzipResponse.headers["content-encoding"] == "gzip"
+    assert gzipResponse.text == plainResponse.text
+    assert "content-encoding" not in refusedResponse.headers
+    assert refusedResponse.text == plainResponse.text
+
+def test_retrieveAvailabilityInvalidWindow_ReturnError():
+    response = client.get("/api/booking/availability/restaurantId/1234567890abcdef?startFrom=2024-10-08T20:00:00&to=2024-10-08T19:00:00")
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "'start' time must be earlier than 'to' time."}
+
+def test_createBookingsPartialFailure_ReturnMultiStatus():
+    bookingData = {
+        "paymentId" : "test123",
+        "reservationDate" : {
+            "startFrom" : "2024-10-08T09:00:00",
+            "to" : "2024-12-08T09:00:00"
+        },
+        "reservationRequest" : "WHATISTHIS?",
+        "guestNumber" : 5,
+        "costPerPerson" : 20
+    }
+    response = client.post("/api/booking/1/bulkRestaurant/createBulk", json=[bookingData, {**bookingData, "guestNumber": 0}, bookingData])
+
+    results = response.json()["results"]
+    assert response.status_code == 207
+    assert [result["statusCode"] for result in results] == [201, 400, 201]
+    assert results[1]["detail"] == "guest must not be less than 1"
+    assert client.get(f"/api/booking/get/bookingId/{results[2]['bookingId']}").status_code == 200
+
+def test_addBookingRetryWithIdempotencyKey_ReturnOriginalBooking():
+    bookingData = {
+        "paymentId" : "test123",
+        "reservationDate" : {
+            "startFrom" : "2024-10-08T09:00:00",
+            "to" : "2024-10-08T11:00:00"
+        },
+        "reservationRequest" : "WHATISTHIS?",
+        "guestNumber" : 5,
+        "costPerPerson" : 20
+    }
+    headers = {"Idempotency-Key": "c0ffee"}
+    first = client.post("/api/booking/1/1234567890abcdef/create", json=bookingData, headers=headers)
+    retry = client.post("/api/booking/1/1234567890abcdef/create", json=bookingData, headers=headers)
+
+    assert first.status_code == 201
+    assert retry.status_code == 201
+    assert retry.json()["bookingId"] == first.json()["bookingId"]
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+
+def test_searchBookings_ReturnPagesInStartOrder():
+    restaurantId = "searchRestaurant"
+    for hour in (12, 9, 10):
+        bookingData = {
+            "paymentId" : "test123",
+            "reservationDate" : {
+                "startFrom" : f"2024-11-08T{hour:02d}:00:00",
+                "to" : f"2024-11-08T{hour + 1:02d}:00:00"
+            },
+            "reservationRequest" : "WHATISTHIS?",
+            "guestNumber" : 2,
+            "costPerPerson" : 20
+        }
+        client.post(f"/api/booking/1/{restaurantId}/create", json=bookingData)
+
+    params = {"from": "2024-11-08T00:00:00", "to": "2024-11-09T00:00:00", "restaurantId": restaurantId, "limit": 2}
+    first = client.get("/api/booking/search", params=params)
+    second = client.get("/api/booking/search", params={**params, "after": first.json()["nextCursor"]})
+
+    assert first.status_code == 200
+    assert [booking["reservationDate"]["startFrom"][11:16] for booking in first.json()["bookings"] + second.json()["bookings"]] == ["09:00", "10:00", "12:00"]
+    assert second.json()["nextCursor"] is None
+
+def test_searchBookingsInvalidWindow_ReturnError():
+    reversed = client.get("/api/booking/search", params={"from": "2024-11-09T00:00:00", "to": "2024-11-08T00:00:00"})
+    missing = client.get("/api/booking/search", params={"to": "2024-11-08T00:00:00"})
+    badCursor = client.get("/api/booking/search", params={"from": "2024-11-08T00:00:00", "to": "2024-11-09T00:00:00", "after": "nope"})
+    # a page cursor from the get endpoints carries no start time
+    pageCursor = client.get("/api/booking/search", params={"from": "2024-11-08T00:00:00", "to": "2024-11-09T00:00:00", "after": "ZwukC1fuLd_pSFEO"})
+
+    assert reversed.status_code == 400
+    assert missing.status_code == 422
+    assert badCursor.status_code == 400
+    assert pageCursor.status_code == 400
+
+def test_retrieveBookingByRestaurantIdIfNoneMatch_ReturnNotModifiedUntilWrite():
+    restaurantId = "etagrestaurant"
+    bookingData = {
+        "paymentId" : "test123",
+        "reservationDate" : {
+            "startFrom" : "2024-10-08T09:00:00",
+            "to" : "2024-10-08T11:00:00"
+        },
+        "reservationRequest" : "Window seat",
+        "guestNumber" : 2,
+        "costPerPerson" : 20,
+        "paymentStatus" : "Unpaid",
+        "bookingStatus" : "Pending"
+    }
+    created = client.post(f"/api/booking/7/{restaurantId}/create", json=bookingData)
+    first = client.get(f"/api/booking/get/restaurantId/{restaurantId}")
+    etag = first.headers["ETag"]
+
+    notModified = client.get(f"/api/booking/get/restaurantId/{restaurantId}", headers={"If-None-Match": etag})
+    assert notModified.status_code == 304
+    assert notModified.headers["ETag"] == etag
+    assert client.get(f"/api/booking/get/userId/7", headers={"If-None-Match": etag}).status_code == 200
+
+    bookingId = created.json()["bookingId"]
+    bookingEtag = client.get(f"/api/booking/get/bookingId/{bookingId}").headers["ETag"]
+    assert client.put(f"/api/booking/7/update/{bookingId}", json={**bookingData, "guestNumber": 3}).status_code == 200
+
+    changed = client.get(f"/api/booking/get/restaurantId/{restaurantId}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert client.get(f"/api/booking/get/bookingId/{bookingId}", headers={"If-None-Match": bookingEtag}).status_code == 200
+
+def test_retrieveBookingIfNoneMatchWithoutVersion_ReturnNotFound():
+    assert client.get("/api/booking/get/bookingId/670ba40b57ee2ddfe948510e", headers={"If-None-Match": '"0"'}).status_code == 404
+    assert client.get("/api/booking/get/bookingId/670ba40b57ee2ddfe948510e", headers={"If-None-Match": "*"}).status_code == 404
+    assert client.get("/api/booking/get/restaurantId/noVersionRestaurant", headers={"If-None-Match": "*"}).status_code == 404
+
+def test_getBookingByIdIfNoneMatchAfterCreate_ReturnNotModified():
+    bookingData = {
+        "paymentId" : "test123",
+        "reservationDate" : {
+            "startFrom" : "2024-10-08T09:00:00",
+            "to" : "2024-10-08T11:00:00"
+        },
+        "reservationRequest" : "Window seat",
+        "guestNumber" : 2,
+        "costPerPerson" : 20,
+        "paymentStatus" : "Unpaid",
+        "bookingStatus" : "Pending"
+    }
+    bookingId = client.post("/api/booking/7/etagCreateRestaurant/create", json=bookingData).json()["bookingId"]
+    bulkId = client.post("/api/booking/7/etagCreateRestaurant/createBulk", json=[bookingData]).json()["results"][0]["bookingId"]
+
+    first = client.get(f"/api/booking/get/bookingId/{bookingId}")
+    notModified = client.get(f"/api/booking/get/bookingId/{bookingId.upper()}", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == 200
+    assert notModified.status_code == 304
+    assert "ETag" in client.get(f"/api/booking/get/bookingId/{bulkId}").headers
+    assert client.get(f"/api/booking/get/bookingId/{bookingId}", headers={"If-None-Match": "*"}).status_code == 304
+
+def test_retrieveBookingByUserIdWithFields_ReturnSelectedFieldsCompressed():
+    bookingData = {
+        "paymentId" : "test123",
+        "reservationDate" : {
+            "startFrom" : "2024-10-08T09:00:00",
+            "to" : "2024-10-08T11:00:00"
+        },
+        "reservationRequest" : "Window seat",
+        "guestNumber" : 2,
+        "costPerPerson" : 20,
+        "paymentStatus" : "Unpaid",
+        "bookingStatus" : "Pending"
+    }
+    client.post("/api/booking/fieldsUser/fieldsRestaurant/createBulk", json=[bookingData] * 20)
+
+    selected = client.get("/api/booking/get/userId/fieldsUser", params={"fields": "restaurantId,reservationDate,bookingStatus"})
+    full = client.get("/api/booking/get/userId/fieldsUser", headers={"Accept-Encoding": "gzip"})
+    invalid = client.get("/api/booking/get/userId/fieldsUser", params={"fields": "status"})
+
+    assert selected.status_code == 200
+    assert {tuple(booking) for booking in selected.json()["bookings"]} == {("bookingId", "restaurantId", "reservationDate", "bookingStatus")}
+    assert full.headers["content-encoding"] == "gzip"
+    assert len(full.json()["bookings"]) == 20
+    assert invalid.status_code == 400
+
+def test_getBookingsByIds_ReturnResultsInRequestOrder():
+    bookingData = {
+        "paymentId" : "test123",
+        "reservationDate" : {
+            "startFrom" : "2024-10-08T09:00:00",
+            "to" : "2024-10-08T11:00:00"
+        },
+        "reservationRequest" : "Window seat",
+        "guestNumber" : 2,
+        "costPerPerson" : 20,
+        "paymentStatus" : "Unpaid",
+        "bookingStatus" : "Pending"
+    }
+    created = client.post("/api/booking/batchUser/batchRestaurant/createBulk", json=[bookingData] * 3).json()["results"]
+    bookingIds = [result["bookingId"] for result in created]
+    client.get(f"/api/booking/get/bookingId/{bookingIds[1]}")
+    missingId = "670ba40b57ee2ddfe948510e"
+
+    response = client.post("/api/booking/get/bookingIds", params={"fields": "guestNumber"}, json=[bookingIds[2], "notAnId", bookingIds[0], missingId, bookingIds[1].upper()])
+    results = response.json()["results"]
+
+    assert response.status_code == 207
+    assert [result["statusCode"] for result in results] == [200, 400, 200, 404, 200]
+    assert [result["bookingId"] for result in results] == [bookingIds[2], "notAnId", bookingIds[0], missingId, bookingIds[1].upper()]
+    assert results[0]["booking"] == {"bookingId": bookingIds[2], "guestNumber": 2}
+    assert results[4]["booking"] == {"bookingId": bookingIds[1], "guestNumber": 2}
+
+def test_getBookingsByIdsTooMany_ReturnError():
+    with patch.object(settings, "BATCH_GET_MAX", 2):
+        response = client.post("/api/booking/get/bookingIds", json=["670ba40b57ee2ddfe948510e"] * 3)
+
+    assert response.status_code == 400
@@ -0,0 +1,143 @@
+import asyncio
+from datetime import date, datetime, timedelta
+import mongomock
+import pytest
+from bson import ObjectId
+from app.helpers.dates import utcNow
+from app.helpers.exception import BookingException
+from app.repositories.mongoBookingRepository import MongoBookingRepository
+from app.services.bookingArchive import archiveBookings
+from app.services.bookingService import BookingService
+from app.services.bookingStats import rebuildStats
+from app.test.conftest import buildMutation
+
+def buildBooking(status=1, endsDaysAgo=0, updatedDaysAgo=0):
+    now = utcNow().replace(microsecond=0)
+    return {
+        "_id": ObjectId(),
+        "restaurantId": "r1",
+        "created_by": "1",
+        "reservationDate": {"startFrom": now - timedelta(days=endsDaysAgo, hours=2), "to": now - timedelta(days=endsDaysAgo)},
+        "guestNumber": 2,
+        "costPerPerson": 10,
+        "paymentStatus": "Unpaid",
+        "updated_when": now - timedelta(days=updatedDaysAgo),
+        "status": status
+    }
+
+def test_archiveBookings_MovesOldCancelledAndCompleted(repository):
+    oldCancelled = buildBooking(status=0, endsDaysAgo=-10, updatedDaysAgo=40)
+    oldCompleted = buildBooking(endsDaysAgo=40)
+    recentCancelled = buildBooking(status=0, endsDaysAgo=-10, updatedDaysAgo=1)
+    upcoming = buildBooking(endsDaysAgo=-10)
+
+    async def run():
+        await repository.insertMany([oldCancelled, oldCompleted, recentCancelled, upcoming])
+        totals = await archiveBookings(repository, 30, batchSize=1, report=lambda message: None)
+        rerun = await archiveBookings(repository, 30, report=lambda message: None)
+        hot = await repository.findActive({"restaurantId": "r1"}, {"status": 1})
+        archived = await repository.findActive({"restaurantId": "r1"}, {"status": 1}, archived=True)
+        cancelled = await repository.findActiveById(oldCancelled["_id"], {"status": 1}, archived=True)
+        return totals, rerun, hot, archived, cancelled, await repository.findVersion("restaurant:r1")
+
+    totals, rerun, hot, archived, cancelled, version = asyncio.run(run())
+
+    assert totals == {"scanned": 2, "archived": 2} and rerun == {"scanned": 0, "archived": 0}
+    assert [booking["_id"] for booking in hot] == [upcoming["_id"]]
+    assert [booking["_id"] for booking in archived] == [oldCompleted["_id"]]
+    assert cancelled is None
+    assert version["version"] == 2
+
+def test_includeArchived_PagesThroughHotAndArchivedBookings():
+    service = BookingService(MongoBookingRepository(mongomock.MongoClient(), False))
+
+    async def run():
+        past = [await service.createBooking(buildMutation(2, startFrom=f"2024-10-0{day}T19:00:00", to=f"2024-10-0{day}T21:00:00"), "1", "archiveRestaurant") for day in range(1, 4)]
+        upcoming = await service.createBooking(buildMutation(2, startFrom="2099-10-08T19:00:00", to="2099-10-08T21:00:00"), "1", "archiveRestaurant")
+        statsBefore = await service.getBookingStats("archiveRestaurant", date(2024, 10, 1), date(2024, 10, 31))
+        await archiveBookings(service.repository, 30, report=lambda message: None)
+
+        hot = await service.getBookingByRestaurantId("archiveRestaurant", 2)
+        first = await service.getBookingByRestaurantId("archiveRestaurant", 2, includeArchived=True)
+        second = await service.getBookingByRestaurantId("archiveRestaurant", 2, first["nextCursor"], includeArchived=True)
+        byId = await service.getBookingById(past[0]["bookingId"], includeArchived=True)
+        with pytest.raises(BookingException) as e:
+            await service.getBookingById(past[1]["bookingId"])
+        return past, upcoming, statsBefore, hot, first, second, byId, e.value.status_code
+
+    past, upcoming, statsBefore, hot, first, second, byId, missingStatus = asyncio.run(run())
+    rebuildStats(service.repository.collection, service.repository.stats, "archiveRestaurant", service.repository.archive)
+    statsAfter = asyncio.run(service.getBookingStats("archiveRestaurant", date(2024, 10, 1), date(2024, 10, 31)))
+
+    assert [booking["bookingId"] for booking in hot["bookings"]] == [ObjectId(upcoming["bookingId"])]
+    assert [str(booking["bookingId"]) for booking in first["bookings"] + second["bookings"]] == [booking["bookingId"] for booking in past] + [upcoming["bookingId"]]
+    assert second["nextCursor"] is None
+    assert str(byId["booking"]["bookingId"]) == past[0]["bookingId"]
+    assert missingStatus == 404
+    assert len(statsBefore["stats"]) == 3 and statsAfter == statsBefore
+
+def test_includeArchived_ExportsAndSearchesArchivedBookings(repository):
+    service = BookingService(repository)
+
+    async def run():
+        past = [await service.createBooking(buildMutation(2, startFrom=f"2024-10-0{day}T19:00:00", to=f"2024-10-0{day}T21:00:00"), "1", "archiveRestaurant") for day in range(1, 4)]
+        upcoming = await service.createBooking(buildMutation(2, startFrom="2099-10-08T19:00:00", to="2099-10-08T21:00:00"), "1", "archiveRestaurant")
+        await archiveBookings(repository, 30, report=lambda message: None)
+
+        hot = [booking async for batch in service.exportBookingByRestaurantId("archiveRestaurant") for booking in batch]
+        exported = [booking async for batch in service.exportBookingByRestaurantId("archiveRestaurant", includeArchived=True) for booking in batch]
+        window = (datetime(2024, 10, 1), datetime(2024, 10, 20))
+        hotSearch = await service.searchBookings(*window, restaurantId="archiveRestaurant")
+        first = await service.searchBookings(*window, restaurantId="archiveRestaurant", limit=2, includeArchived=True)
+        second = await service.searchBookings(*window, restaurantId="archiveRestaurant", limit=2, after=first["nextCursor"], includeArchived=True)
+        return past, upcoming, hot, exported, hotSearch, first, second
+
+    past, upcoming, hot, exported, hotSearch, first, second = asyncio.run(run())
+
+    assert [str(booking["bookingId"]) for booking in hot] == [upcoming["bookingId"]]
+    assert hotSearch["bookings"] == []
+    assert sorted(str(booking["bookingId"]) for booking in exported) == sorted([booking["bookingId"] for booking in past] + [upcoming["bookingId"]])
+    assert [str(booking["bookingId"]) for booking in first["bookings"] + second["bookings"]] == [booking["bookingId"] for booking in past]
+    assert second["nextCursor"] is None
+
+class CancellingCollection:
+    """Cancels a booking in the hot collection right after the archive copy
+    is written, as a request landing mid-batch would."""
+
+    def __init__(self, archive, collection, bookingId):
+        self.archive = archive
+        self.collection = collection
+        self.bookingId = bookingId
+
+    def __getattr__(self, name):
+        return getattr(self.archive, name)
+
+    def bulk_write(self, operations, **kwargs):
+        result = self.archive.bulk_write(operations, **kwargs)
+        if self.bookingId is not None:
+            self.collection.update_one({"_id": self.bookingId}, {"$set": {"status": 0, "updated_when": utcNow()}})
+            self.bookingId = None
+        return result
+
+def test_archiveBookingsCancelledMidBatch_KeepsOnlyHotCopy():
+    repository = MongoBookingRepository(mongomock.MongoClient(), False)
+    completed = buildBooking(endsDaysAgo=40)
+    other = buildBooking(endsDaysAgo=40)
+    repository.archive = CancellingCollection(repository.archive, repository.collection, completed["_id"])
+    service = BookingService(repository)
+
+    async def run():
+        await repository.insertMany([completed, other])
+        totals = await archiveBookings(repository, 30, report=lambda message: None)
+        archivedOther = await service.getBookingById(str(other["_id"]), includeArchived=True, fields="restaurantId")
+        with pytest.raises(BookingException) as e:
+            await service.getBookingById(str(completed["_id"]), includeArchived=True, fields="restaurantId")
+        return totals, archivedOther, e.value.status_code
+
+    totals, archivedOther, cancelledStatus = asyncio.run(run())
+
+    assert totals == {"scanned": 2, "archived": 1}
+    assert archivedOther["statusCode"] == 200
+    assert cancelledStatus == 404
+    assert repository.archive.find_one({"_id": completed["_id"]}) is None
+    assert repository.collection.find_one({"_id": completed["_id"]})["status"] == 0
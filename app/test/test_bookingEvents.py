@@ -0,0 +1,147 @@
+import asyncio
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from app.helpers.streaming import sseStream
+from app.repositories.inMemoryBookingRepository import InMemoryBookingRepository
+from app.services.bookingEvents import RESYNC, BookingEventBus, changeEvent
+from app.services.bookingService import BookingService
+from app.test.conftest import buildMutation
+
+
+def drain(subscription) -> list:
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+def test_serviceWrites_PublishToRestaurantSubscribers():
+    service = BookingService(InMemoryBookingRepository())
+
+    async def run():
+        subscription = service.events.subscribe("r1")
+        other = service.events.subscribe("r2")
+        created = await service.createBooking(buildMutation(), "1", "r1")
+        await service.updateStatus(buildMutation(8), "1", created["bookingId"])
+        await service.cancelBooking(created["bookingId"], "1")
+        subscription.close()
+        return created, drain(subscription), drain(other)
+
+    created, events, otherEvents = asyncio.run(run())
+
+    assert [event["type"] for event in events] == ["created", "updated", "cancelled"]
+    assert all(event["bookingId"] == created["bookingId"] for event in events)
+    assert events[1]["booking"]["guestNumber"] == 8
+    assert otherEvents == []
+    assert service.events.stats()["subscribers"] == 1
+
+def test_slowSubscriber_ReceivesResyncInsteadOfBacklog():
+    async def run():
+        bus = BookingEventBus(queueSize=3)
+        subscription = bus.subscribe("r1")
+        for index in range(5):
+            bus.publish("r1", {"type": "created", "bookingId": str(index)})
+        return subscription, drain(subscription)
+
+    subscription, events = asyncio.run(run())
+
+    assert events == [RESYNC, {"type": "created", "bookingId": "4"}]
+    assert subscription.dropped == 3
+
+def test_changeEvent_MapsChangeStreamDocuments():
+    booking = {"_id": ObjectId(), "restaurantId": "r1", "paymentId": "p", "reservationDate": {"startFrom": datetime(2024, 10, 8, 9), "to": datetime(2024, 10, 8, 11)}, "reservationRequest": "", "guestNumber": 2, "costPerPerson": 10, "totalAmount": 20, "paymentStatus": "Unpaid", "bookingStatus": "Pending", "created_by": "1", "created_when": "", "updated_by": "1", "updated_when": ""}
+
+    inserted = changeEvent({"operationType": "insert", "fullDocument": booking})
+    updated = changeEvent({"operationType": "update", "fullDocument": booking, "updateDescription": {"updatedFields": {"guestNumber": 4}}})
+    cancelled = changeEvent({"operationType": "update", "fullDocument": booking, "updateDescription": {"updatedFields": {"status": 0}}})
+    deleted = changeEvent({"operationType": "update", "fullDocument": None})
+
+    assert inserted[0] == "r1" and inserted[1]["type"] == "created"
+    assert updated[1] == {"type": "updated", "bookingId": str(booking["_id"]), "booking": {"guestNumber": 4}}
+    assert cancelled[1] == {"type": "cancelled", "bookingId": str(booking["_id"])}
+    assert deleted is None
+
+def test_eventBusStart_FallsBackWithoutChangeStreams():
+    repository = InMemoryBookingRepository()
+
+    auto = BookingEventBus(10, "auto")
+    asyncio.run(auto.start(repository))
+    required = BookingEventBus(10, "changeStream")
+
+    assert auto.source == "local"
+    with pytest.raises(NotImplementedError):
+        asyncio.run(required.start(repository))
+
+def test_eventBusChangeStream_PublishesChanges():
+    booking = {"_id": ObjectId(), "restaurantId": "r1"}
+
+    class FakeStream:
+        def __init__(self):
+            self.changes = asyncio.Queue()
+            self.closed = False
+
+        async def next(self):
+            return await self.changes.get()
+
+        async def close(self):
+            self.closed = True
+
+    class FakeRepository:
+        async def openChangeStream(self):
+            return stream
+
+    async def run():
+        bus = BookingEventBus(10, "auto")
+        subscription = bus.subscribe("r1")
+        await bus.start(FakeRepository())
+        bus.record("r1", {"type": "ignored"})
+        stream.changes.put_nowait({"operationType": "update", "fullDocument": booking, "updateDescription": {"updatedFields": {"status": 0}}})
+        event = await asyncio.wait_for(subscription.get(), 1)
+        await bus.stop()
+        return bus, event
+
+    stream = FakeStream()
+    bus, event = asyncio.run(run())
+
+    assert bus.source == "changeStream"
+    assert event == {"type": "cancelled", "bookingId": str(booking["_id"])}
+    assert stream.closed
+
+def test_changeStreamChanges_UpdateAvailabilityIndex():
+    service = BookingService(InMemoryBookingRepository())
+    morning = datetime(2024, 10, 8, 10)
+    # written by another worker, so only the change stream reports it
+    other = {"_id": ObjectId(), "restaurantId": "r1", "reservationDate": {"startFrom": datetime(2024, 10, 8, 9), "to": datetime(2024, 10, 8, 11)}, "guestNumber": 4, "status": 1}
+
+    async def run():
+        await service.createBooking(buildMutation(), "1", "r1")
+        await service.getAvailability("r1", morning)
+        service.events.onChange({"operationType": "insert", "fullDocument": other})
+        inserted = await service.getAvailability("r1", morning)
+        service.events.onChange({"operationType": "update", "fullDocument": {**other, "status": 0}, "updateDescription": {"updatedFields": {"status": 0}}})
+        cancelled = await service.getAvailability("r1", morning)
+        service.events.onResync()
+        return inserted, cancelled, service.availability.isStale("r1")
+
+    inserted, cancelled, stale = asyncio.run(run())
+
+    assert inserted["seatsTaken"] == 9
+    assert cancelled["seatsTaken"] == 5
+    assert stale
+
+def test_sseStream_FormatsEventsAndHeartbeats():
+    async def run():
+        bus = BookingEventBus(10)
+        stream = sseStream(lambda: bus.subscribe("r1"), 0.01)
+        heartbeat = await stream.__anext__()
+        bus.publish("r1", {"type": "cancelled", "bookingId": "b1"})
+        event = await stream.__anext__()
+        subscribers = bus.stats()["subscribers"]
+        await stream.aclose()
+        return heartbeat, event, subscribers, bus.stats()["subscribers"]
+
+    heartbeat, event, subscribers, remaining = asyncio.run(run())
+
+    assert heartbeat == b": keep-alive\n\n"
+    assert event == b'event: cancelled\ndata: {"type":"cancelled","bookingId":"b1"}\n\n'
+    assert subscribers == 1 and remaining == 0
@@ -0,0 +1,300 @@
+import asyncio
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+from app.helpers.exception import BookingException
+from app.repositories.mongoBookingRepository import MongoBookingRepository
+from app.services.bookingService import BookingService
+from app.test.conftest import buildMutation
+
+
+def buildService():
+    return BookingService(MongoBookingRepository(AsyncMongoMockClient(), True))
+
+def test_createAndGetBooking_ReturnSuccess():
+    service = buildService()
+
+    async def run():
+        created = await service.createBooking(buildMutation(), "1", "1234567890abcdef")
+        fetched = await service.getBookingById(created["bookingId"])
+        byRestaurant = await service.getBookingByRestaurantId("1234567890abcdef")
+        return created, fetched, byRestaurant
+
+    created, fetched, byRestaurant = asyncio.run(run())
+
+    assert created["statusCode"] == 201
+    assert str(fetched["booking"]["bookingId"]) == created["bookingId"]
+    assert fetched["booking"]["totalAmount"] == 100
+    assert [str(booking["bookingId"]) for booking in byRestaurant["bookings"]] == [created["bookingId"]]
+
+def test_cancelBookingTwice_ReturnFailure():
+    service = buildService()
+
+    async def run():
+        created = await service.createBooking(buildMutation(), "1", "1234567890abcdef")
+        await service.cancelBooking(created["bookingId"], "1")
+        await service.cancelBooking(created["bookingId"], "1")
+
+    with pytest.raises(BookingException) as e:
+        asyncio.run(run())
+
+    assert e.value.status_code == 400
+    assert e.value.detail == "Booking is already inactive."
+
+def test_getBookingByUserIdPaginated_ReturnSuccess():
+    service = buildService()
+
+    async def run():
+        createdIds = [(await service.createBooking(buildMutation(), "1", "1234567890abcdef"))["bookingId"] for _ in range(3)]
+        firstPage = await service.getBookingByUserId("1", 2)
+        secondPage = await service.getBookingByUserId("1", 2, firstPage["nextCursor"])
+        return createdIds, firstPage, secondPage
+
+    createdIds, firstPage, secondPage = asyncio.run(run())
+
+    assert [str(booking["bookingId"]) for booking in firstPage["bookings"]] == createdIds[:2]
+    assert firstPage["nextCursor"] is not None
+    assert [str(booking["bookingId"]) for booking in secondPage["bookings"]] == createdIds[2:]
+    assert secondPage["nextCursor"] is None
+
+def test_getAvailabilityAfterWrites_ReturnSuccess():
+    service = buildService()
+    evening = datetime(2024, 10, 8, 19, 0)
+
+    async def run():
+        first = await service.createBooking(buildMutation(4), "1", "availabilityRestaurant")
+        second = await service.createBooking(buildMutation(6), "1", "availabilityRestaurant")
+        before = await service.getAvailability("availabilityRestaurant", datetime(2024, 10, 8, 10, 0))
+        await service.cancelBooking(first["bookingId"], "1")
+        moved = buildMutation(6)
+        moved.reservationDate.startFrom = datetime(2024, 10, 8, 18, 0)
+        moved.reservationDate.to = datetime(2024, 10, 8, 20, 0)
+        await service.updateStatus(moved, "1", second["bookingId"])
+        await service.createBooking(buildMutation(2), "1", "availabilityRestaurant")
+        after = await service.getAvailability("availabilityRestaurant", evening)
+        return second, before, after
+
+    second, before, after = asyncio.run(run())
+
+    assert before["seatsTaken"] == 10
+    assert len(before["bookings"]) == 2
+    assert [booking["bookingId"] for booking in after["bookings"]] == [second["bookingId"]]
+    assert after["seatsTaken"] == 6
+
+def test_getAvailabilityAfterWritesByUpperCaseId_ReturnSuccess():
+    service = buildService()
+    morning = datetime(2024, 10, 8, 10, 0)
+
+    async def run():
+        created = await service.createBooking(buildMutation(5), "1", "upperCaseRestaurant")
+        await service.getAvailability("upperCaseRestaurant", morning)
+        await service.updateStatus(buildMutation(7), "1", created["bookingId"].upper())
+        updated = await service.getAvailability("upperCaseRestaurant", morning)
+        await service.cancelBooking(created["bookingId"].upper(), "1")
+        cancelled = await service.getAvailability("upperCaseRestaurant", morning)
+        return updated, cancelled
+
+    updated, cancelled = asyncio.run(run())
+
+    assert updated["seatsTaken"] == 7 and len(updated["bookings"]) == 1
+    assert cancelled["seatsTaken"] == 0 and cancelled["bookings"] == []
+
+def test_getAvailabilityWritesDuringLoad_ReturnSuccess():
+    service = buildService()
+    morning = datetime(2024, 10, 8, 10, 0)
+    findActive = service.repository.findActive
+
+    async def slowFindActive(*args, **kwargs):
+        bookings = await findActive(*args, **kwargs)
+        await asyncio.sleep(0.05)
+        return bookings
+
+    async def run():
+        cancelled = await service.createBooking(buildMutation(5), "1", "loadingRestaurant")
+        service.repository.findActive = slowFindActive
+        loading = asyncio.ensure_future(service.getAvailability("loadingRestaurant", morning))
+        await asyncio.sleep(0.01)
+        await service.createBooking(buildMutation(6), "1", "loadingRestaurant")
+        await service.cancelBooking(cancelled["bookingId"], "1")
+        await loading
+        return await service.getAvailability("loadingRestaurant", morning)
+
+    after = asyncio.run(run())
+
+    assert after["seatsTaken"] == 6 and len(after["bookings"]) == 1
+
+def test_getBookingByIdAfterCancel_ReturnFailure():
+    service = buildService()
+
+    async def run():
+        created = await service.createBooking(buildMutation(), "1", "1234567890abcdef")
+        await service.getBookingById(created["bookingId"])
+        await service.getBookingById(created["bookingId"])
+        await service.cancelBooking(created["bookingId"], "1")
+        await service.getBookingById(created["bookingId"])
+
+    with pytest.raises(BookingException) as e:
+        asyncio.run(run())
+
+    assert e.value.status_code == 404
+    assert service.cache.stats()["hits"] == 1
+
+def test_getBookingByIdUpperCaseAfterCancel_ReturnFailure():
+    service = buildService()
+
+    async def run():
+        created = await service.createBooking(buildMutation(), "1", "1234567890abcdef")
+        await service.getBookingById(created["bookingId"].upper())
+        await service.cancelBooking(created["bookingId"], "1")
+        await service.getBookingById(created["bookingId"].upper())
+
+    with pytest.raises(BookingException) as e:
+        asyncio.run(run())
+
+    assert e.value.status_code == 404
+
+def test_getBookingByIdInvalidId_ReturnFailure():
+    service = buildService()
+
+    with pytest.raises(BookingException) as e:
+        asyncio.run(service.getBookingById("notAnId"))
+
+    assert e.value.status_code == 400
+    assert e.value.detail == "Invalid booking id."
+
+def test_updateStatusMissingBooking_ReturnFailure():
+    service = buildService()
+
+    with pytest.raises(BookingException) as e:
+        asyncio.run(service.updateStatus(buildMutation(), "1", "670ba40b57ee2ddfe948510e"))
+
+    assert e.value.status_code == 404
+
+def test_updateStatusCancelledBooking_ReturnFailure():
+    service = buildService()
+
+    async def cancelled():
+        created = await service.createBooking(buildMutation(), "1", "1234567890abcdef")
+        await service.cancelBooking(created["bookingId"], "1")
+        return created["bookingId"]
+
+    bookingId = asyncio.run(cancelled())
+    with pytest.raises(BookingException) as e:
+        asyncio.run(service.updateStatus(buildMutation(8), "2", bookingId))
+    booking = asyncio.run(service.repository.collection.find_one({"_id": ObjectId(bookingId)}))
+
+    assert e.value.status_code == 400
+    assert booking["status"] == 0
+    assert booking["guestNumber"] == 5
+    assert booking["updated_by"] == "1"
+
+def test_createBookingSameIdempotencyKey_ReturnsOriginalBooking():
+    service = buildService()
+
+    async def run():
+        first = await service.createBooking(buildMutation(), "1", "1234567890abcdef", "retry-1")
+        second = await service.createBooking(buildMutation(), "1", "1234567890abcdef", "retry-1")
+        otherUser = await service.createBooking(buildMutation(), "2", "1234567890abcdef", "retry-1")
+        count = await service.repository.collection.count_documents({})
+        return first, second, otherUser, count
+
+    first, second, otherUser, count = asyncio.run(run())
+
+    assert second == {"statusCode": 201, "bookingId": first["bookingId"], "replayed": True}
+    assert otherUser["bookingId"] != first["bookingId"]
+    assert count == 2
+
+def test_createBookingReusedIdempotencyKey_ReturnFailure():
+    service = buildService()
+
+    async def run():
+        await service.createBooking(buildMutation(), "1", "1234567890abcdef", "retry-1")
+        await service.createBooking(buildMutation(8), "1", "1234567890abcdef", "retry-1")
+
+    with pytest.raises(BookingException) as e:
+        asyncio.run(run())
+
+    assert e.value.status_code == 422
+
+def test_createBookingInvalidWithIdempotencyKey_ReleasesKey():
+    service = buildService()
+
+    async def run():
+        with pytest.raises(BookingException):
+            await service.createBooking(buildMutation(0), "1", "1234567890abcdef", "retry-1")
+        return await service.createBooking(buildMutation(0), "1", "1234567890abcdef", "retry-1")
+
+    with pytest.raises(BookingException) as e:
+        asyncio.run(run())
+
+    assert e.value.status_code == 400
+
+def test_createBookingExpiredIdempotencyKey_CreatesNewBooking():
+    service = buildService()
+
+    async def run():
+        first = await service.createBooking(buildMutation(), "1", "1234567890abcdef", "retry-1")
+        await service.repository.idempotency.update_one({"_id": "1:retry-1"}, {"$set": {"createdAt": datetime(2020, 1, 1)}})
+        second = await service.createBooking(buildMutation(), "1", "1234567890abcdef", "retry-1")
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert "replayed" not in second
+    assert second["bookingId"] != first["bookingId"]
+
+def test_updateStatus_WritesDatetimeAuditFields():
+    service = buildService()
+
+    async def run():
+        created = await service.createBooking(buildMutation(), "1", "1234567890abcdef")
+        await service.updateStatus(buildMutation(6), "2", created["bookingId"])
+        return await service.repository.collection.find_one({"_id": ObjectId(created["bookingId"])})
+
+    booking = asyncio.run(run())
+
+    assert isinstance(booking["created_when"], datetime)
+    assert isinstance(booking["updated_when"], datetime)
+    assert booking["updated_when"] >= booking["created_when"]
+    assert "updated_When" not in booking
+
+def test_createBookingVersionBumpFails_ReturnFailureAndReplaysKey():
+    service = buildService()
+
+    async def failingBump(keys):
+        raise RuntimeError("versions unavailable")
+
+    async def run():
+        bumpVersions = service.repository.bumpVersions
+        service.repository.bumpVersions = failingBump
+        with pytest.raises(BookingException) as e:
+            await service.createBooking(buildMutation(), "1", "1234567890abcdef", "retry-1")
+        service.repository.bumpVersions = bumpVersions
+        replayed = await service.createBooking(buildMutation(), "1", "1234567890abcdef", "retry-1")
+        return e.value, replayed, await service.repository.collection.count_documents({})
+
+    error, replayed, count = asyncio.run(run())
+
+    assert error.status_code == 500
+    assert replayed["replayed"] is True
+    assert count == 1
+
+def test_createBookingCompleteIdempotencyKeyFails_ReleasesKey():
+    service = buildService()
+
+    async def failingComplete(key, result):
+        raise RuntimeError("idempotency store unavailable")
+
+    async def run():
+        completeIdempotencyKey = service.repository.completeIdempotencyKey
+        service.repository.completeIdempotencyKey = failingComplete
+        first = await service.createBooking(buildMutation(), "1", "1234567890abcdef", "retry-1")
+        service.repository.completeIdempotencyKey = completeIdempotencyKey
+        second = await service.createBooking(buildMutation(), "1", "1234567890abcdef", "retry-1")
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first["statusCode"] == 201
+    assert second["statusCode"] == 201 and "replayed" not in second
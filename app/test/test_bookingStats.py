@@ -0,0 +1,60 @@
+import asyncio
+from datetime import date, datetime
+import mongomock
+import pytest
+from app.core.config import settings
+from app.helpers.exception import BookingException
+from app.services.bookingService import BookingService
+from app.repositories.mongoBookingRepository import MongoBookingRepository
+from app.services.bookingStats import rebuildStats, statsDeltas, statsOperations
+from app.test.conftest import buildMutation
+
+
+def test_statsOperationsSameDayUpdate_ReturnSuccess():
+    before = {"reservationDate": {"startFrom": datetime(2024, 10, 8, 19)}, "guestNumber": 2, "costPerPerson": 10, "paymentStatus": "Unpaid"}
+    after = {**before, "paymentStatus": "Paid"}
+
+    operations = statsOperations(statsDeltas("restaurant", removed=[before], added=[after]))
+
+    assert len(operations) == 1
+    assert operations[0]._doc["$inc"] == {
+        "paymentStatus.Unpaid.bookings": -1,
+        "paymentStatus.Unpaid.covers": -2,
+        "paymentStatus.Unpaid.revenue": -20,
+        "paymentStatus.Paid.bookings": 1,
+        "paymentStatus.Paid.covers": 2,
+        "paymentStatus.Paid.revenue": 20
+    }
+
+def test_incrementalStatsMatchRebuild_ReturnSuccess():
+    service = BookingService(MongoBookingRepository(mongomock.MongoClient(), False))
+
+    async def writes():
+        first = await service.createBooking(buildMutation(4), "1", "statsRestaurant")
+        second = await service.createBooking(buildMutation(6), "1", "statsRestaurant")
+        await service.createBookings([buildMutation(2, startFrom="2024-10-09T19:00:00", to="2024-10-09T21:00:00")], "1", "statsRestaurant")
+        await service.updateStatus(buildMutation(3, "Paid"), "1", first["bookingId"])
+        await service.cancelBooking(second["bookingId"], "1")
+
+    asyncio.run(writes())
+    incremental = asyncio.run(service.getBookingStats("statsRestaurant", date(2024, 10, 1), date(2024, 10, 31)))["stats"]
+    rebuildStats(service.repository.collection, service.repository.stats)
+    rebuilt = asyncio.run(service.getBookingStats("statsRestaurant", date(2024, 10, 1), date(2024, 10, 31)))["stats"]
+
+    assert [day["day"] for day in incremental] == ["2024-10-08", "2024-10-09"]
+    assert incremental[0]["bookings"] == 1
+    assert incremental[0]["covers"] == 3
+    assert incremental[0]["revenue"] == 60
+    assert incremental[0]["paymentStatus"]["Paid"] == {"bookings": 1, "covers": 3, "revenue": 60}
+    for incrementalDay, rebuiltDay in zip(incremental, rebuilt):
+        assert {status: values for status, values in incrementalDay["paymentStatus"].items() if values["bookings"]} == rebuiltDay["paymentStatus"]
+        assert [incrementalDay[field] for field in ("bookings", "covers", "revenue")] == [rebuiltDay[field] for field in ("bookings", "covers", "revenue")]
+
+def test_retrieveBookingStatsTooManyDays_ReturnError():
+    service = BookingService(MongoBookingRepository(mongomock.MongoClient(), False))
+
+    with pytest.raises(BookingException) as e:
+        asyncio.run(service.getBookingStats("statsRestaurant", date(2020, 1, 1), date(2024, 1, 1)))
+
+    assert e.value.status_code == 400
+    assert e.value.detail == f"cannot fetch more than {settings.STATS_MAX_DAYS} days of stats"
@@ -0,0 +1,38 @@
+import time
+from app.helpers.cache import LRUCache, NullCache, createCache
+
+
+def test_lruEviction_ReturnSuccess():
+    cache = LRUCache(2, 60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+def test_ttlExpiry_ReturnSuccess():
+    cache = LRUCache(10, 0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_setAfterDelete_ReturnFailure():
+    cache = LRUCache(10, 60)
+    readAt = time.monotonic()
+    cache.delete("a")
+    cache.set("a", "stale", readAt)
+
+    assert cache.get("a") is None
+
+def test_createCache_ReturnSuccess():
+    assert isinstance(createCache("memory", 1, 1), LRUCache)
+    assert isinstance(createCache("none", 1, 1), NullCache)
+    assert isinstance(createCache("app.helpers.cache:LRUCache", 1, 1), LRUCache)
@@ -0,0 +1,58 @@
+import asyncio
+import gzip
+import zlib
+from unittest.mock import patch
+from app.core import compression
+from app.core.compression import CompressionMiddleware, StreamCompressor, negotiateEncoding
+
+
+def runMiddleware(body: bytes, acceptEncoding: str, more_body: bool = False, headers: list = ()):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json"), *headers]})
+        await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", acceptEncoding.encode())]}
+    asyncio.run(CompressionMiddleware(app, minimumSize=100, level=5)(scope, None, send))
+    return dict(sent[0]["headers"]), sent[1]["body"]
+
+def test_negotiateEncoding_ReturnPreferredAcceptedCoding():
+    with patch.object(compression, "brotli", None):
+        assert negotiateEncoding("gzip, deflate, br") == "gzip"
+        assert negotiateEncoding("br") is None
+        assert negotiateEncoding("gzip;q=0, *;q=0.5") is None
+        assert negotiateEncoding("identity") is None
+    with patch.object(compression, "brotli", object()):
+        assert negotiateEncoding("gzip, br") == "br"
+        assert negotiateEncoding("gzip;q=1.0, br;q=0.5") == "gzip"
+        assert negotiateEncoding("*") == "br"
+
+def test_compressionMiddleware_CompressesOnlyLargeWholeBodies():
+    body = b'{"bookings": [' + b'{"guestNumber": 2},' * 50 + b']}'
+
+    headers, compressed = runMiddleware(body, "gzip")
+    smallHeaders, small = runMiddleware(b"{}", "gzip")
+    streamedHeaders, streamed = runMiddleware(body, "gzip", more_body=True)
+    encodedHeaders, encoded = runMiddleware(body, "gzip", headers=[(b"content-encoding", b"gzip")])
+
+    assert headers[b"content-encoding"] == b"gzip" and gzip.decompress(compressed) == body
+    assert headers[b"vary"] == b"Accept-Encoding"
+    assert b"content-encoding" not in smallHeaders and small == b"{}"
+    assert b"content-encoding" not in streamedHeaders and streamed == body
+    assert encoded == body
+
+def test_streamCompressor_EachChunkDecodesOnArrival():
+    compressor = StreamCompressor("gzip", 5)
+    decoder = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+
+    first = decoder.decompress(compressor.compress(b'{"bookingId": 1}\n'))
+    second = decoder.decompress(compressor.compress(b'{"bookingId": 2}\n'))
+    rest = decoder.decompress(compressor.finish())
+
+    assert first == b'{"bookingId": 1}\n'
+    assert second == b'{"bookingId": 2}\n'
+    assert rest == b"" and decoder.eof
@@ -0,0 +1,41 @@
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.core.database import createMongoClient
+from main import app
+
+
+def test_ready_ReturnsServiceUnavailableBeforeStartup():
+    client = TestClient(app)
+
+    response = client.get("/health/ready")
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
+
+def test_ready_ReturnsSuccessAfterWarmUp():
+    with TestClient(app) as client:
+        live = client.get("/health/live")
+        ready = client.get("/health/ready")
+
+    assert live.status_code == 200
+    assert ready.status_code == 200
+    assert ready.json()["status"] == "ready"
+
+def test_ready_ReturnsServiceUnavailableWhenPingFails():
+    with TestClient(app) as client:
+        with patch.object(app.state.bookingService.repository, "ping", side_effect=ConnectionError("no primary")):
+            response = client.get("/health/ready")
+
+    assert response.status_code == 503
+    assert response.json()["detail"] == "no primary"
+
+def test_createMongoClient_AppliesPoolSettings():
+    with patch.object(settings, "MONGODB_MOCK", False), patch("app.core.database.MongoClient") as mongoClient:
+        createMongoClient(isAsync=False)
+
+    options = mongoClient.call_args.kwargs
+    assert options["maxPoolSize"] == settings.MONGO_MAX_POOL_SIZE
+    assert options["minPoolSize"] == settings.MONGO_MIN_POOL_SIZE
+    assert options["maxIdleTimeMS"] == settings.MONGO_MAX_IDLE_TIME_MS
+    assert options["serverSelectionTimeoutMS"] == settings.MONGO_SERVER_SELECTION_TIMEOUT_MS
@@ -0,0 +1,40 @@
+import asyncio
+import mongomock
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from app.core.indexes import BOOKING_INDEXES, planStages, verifyIndexes
+from app.helpers.exception import IndexVerificationError
+from app.repositories.mongoBookingRepository import MongoBookingRepository
+
+
+def test_ensureIndexesTwice_ReturnSuccess():
+    repository = MongoBookingRepository(AsyncMongoMockClient(), True)
+
+    asyncio.run(repository.ensureIndexes())
+    asyncio.run(repository.ensureIndexes())
+    indexNames = asyncio.run(repository.collection.index_information()).keys()
+
+    assert {index.document["name"] for index in BOOKING_INDEXES} <= set(indexNames)
+
+def test_planStages_ReturnSuccess():
+    plan = {
+        "stage": "FETCH",
+        "inputStage": {
+            "stage": "OR",
+            "inputStages": [{"stage": "IXSCAN"}, {"stage": "IXSCAN"}]
+        }
+    }
+
+    assert planStages(plan) == ["FETCH", "OR", "IXSCAN", "IXSCAN"]
+
+def test_verifyIndexesCollectionScan_ReturnFailure():
+    class ExplainCollection:
+        def find(self, query):
+            cursor = mongomock.MongoClient()["BOOKING"]["BOOKING"].find(query)
+            cursor.explain = lambda: {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}
+            return cursor
+
+    with pytest.raises(IndexVerificationError) as e:
+        verifyIndexes(ExplainCollection())
+
+    assert len(e.value.failures) == 6
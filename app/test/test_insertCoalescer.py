@@ -0,0 +1,109 @@
+import asyncio
+from unittest.mock import patch
+import pytest
+from bson import ObjectId
+from pymongo.errors import WriteError
+from app.core.config import settings
+from app.helpers.exception import BookingException
+from app.repositories.inMemoryBookingRepository import InMemoryBookingRepository
+from app.services.bookingService import BookingService
+from app.services.insertCoalescer import InsertCoalescer
+from app.test.conftest import buildMutation
+
+
+class RecordingInsert:
+    def __init__(self, delay=0, failIndexes=()):
+        self.calls = []
+        self.delay = delay
+        self.failIndexes = failIndexes
+
+    async def __call__(self, documents):
+        self.calls.append(len(documents))
+        await asyncio.sleep(self.delay)
+        return [{"index": index, "code": 11000, "errmsg": "duplicate key"} for index in self.failIndexes]
+
+def test_submit_CoalescesConcurrentInserts():
+    insert = RecordingInsert()
+
+    async def run():
+        coalescer = InsertCoalescer(insert, maxBatch=100, windowSeconds=0.01, maxPending=100, queueTimeoutSeconds=1)
+        documents = [{"n": index} for index in range(5)]
+        ids = await asyncio.gather(*(coalescer.submit(document) for document in documents))
+        return documents, ids, coalescer.stats()
+
+    documents, ids, stats = asyncio.run(run())
+
+    assert insert.calls == [5]
+    assert ids == [document["_id"] for document in documents]
+    assert all(isinstance(insertedId, ObjectId) for insertedId in ids)
+    assert stats["batches"] == 1 and stats["averageBatch"] == 5
+
+def test_submit_FlushesWhenBatchIsFull():
+    insert = RecordingInsert()
+
+    async def run():
+        coalescer = InsertCoalescer(insert, maxBatch=3, windowSeconds=0.01, maxPending=100, queueTimeoutSeconds=1)
+        await asyncio.gather(*(coalescer.submit({"n": index}) for index in range(7)))
+
+    asyncio.run(run())
+
+    assert insert.calls == [3, 3, 1]
+
+def test_submit_WriteErrorOnlyFailsItsCaller():
+    insert = RecordingInsert(failIndexes=(1,))
+
+    async def run():
+        coalescer = InsertCoalescer(insert, maxBatch=100, windowSeconds=0.01, maxPending=100, queueTimeoutSeconds=1)
+        return await asyncio.gather(*(coalescer.submit({"n": index}) for index in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert isinstance(results[1], WriteError)
+    assert isinstance(results[0], ObjectId) and isinstance(results[2], ObjectId)
+
+def test_submit_RejectsWhenQueueStaysFull():
+    insert = RecordingInsert(delay=0.2)
+
+    async def run():
+        coalescer = InsertCoalescer(insert, maxBatch=1, windowSeconds=0.01, maxPending=1, queueTimeoutSeconds=0.05)
+        return await asyncio.gather(coalescer.submit({"n": 0}), coalescer.submit({"n": 1}), return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert isinstance(results[0], ObjectId)
+    assert isinstance(results[1], BookingException) and results[1].status_code == 503
+
+def test_close_FlushesPendingAndRejectsNewWrites():
+    insert = RecordingInsert()
+
+    async def run():
+        coalescer = InsertCoalescer(insert, maxBatch=100, windowSeconds=60, maxPending=100, queueTimeoutSeconds=1)
+        waiting = asyncio.ensure_future(coalescer.submit({"n": 0}))
+        await asyncio.sleep(0.01)
+        await coalescer.close()
+        with pytest.raises(BookingException) as e:
+            await coalescer.submit({"n": 1})
+        return await waiting, e.value.status_code
+
+    insertedId, statusCode = asyncio.run(run())
+
+    assert insert.calls == [1]
+    assert isinstance(insertedId, ObjectId)
+    assert statusCode == 503
+
+def test_createBookingWithCoalescing_ReturnSuccess():
+    mutation = buildMutation()
+
+    async def run():
+        with patch.object(settings, "COALESCE_INSERTS", True):
+            service = BookingService(InMemoryBookingRepository())
+        created = await asyncio.gather(*(service.createBooking(mutation, "1", "r1") for _ in range(4)))
+        fetched = await service.getBookingByRestaurantId("r1")
+        stats = service.coalescer.stats()
+        await service.close()
+        return created, fetched, stats
+
+    created, fetched, stats = asyncio.run(run())
+
+    assert {booking["bookingId"] for booking in created} == {str(booking["bookingId"]) for booking in fetched["bookings"]}
+    assert stats["batches"] == 1
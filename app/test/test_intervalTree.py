@@ -0,0 +1,28 @@
+import random
+from app.helpers.intervalTree import IntervalTree
+
+
+def test_overlapMatchesBruteForce_ReturnSuccess():
+    random.seed(7)
+    tree = IntervalTree()
+    intervals = {}
+    for key in range(500):
+        start = random.randint(0, 1000)
+        intervals[key] = (start, start + random.randint(1, 50))
+        tree.insert(intervals[key][0], intervals[key][1], key)
+    for key in random.sample(sorted(intervals), 200):
+        assert tree.remove(intervals.pop(key)[0], key)
+
+    for _ in range(100):
+        start = random.randint(0, 1000)
+        end = start + random.randint(1, 100)
+        expected = {key for key, (s, e) in intervals.items() if s < end and e > start}
+        assert {key for _, _, key, _ in tree.overlap(start, end)} == expected
+    assert len(tree) == 300
+
+def test_removeMissingInterval_ReturnFailure():
+    tree = IntervalTree()
+    tree.insert(1, 2, "a")
+
+    assert not tree.remove(1, "b")
+    assert len(tree) == 1
@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+from app.core.metrics import mongoCommandMetrics
+from app.helpers.metrics import MetricsRegistry
+from main import app
+
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True, scope="module")
+def lifespan():
+    with client:
+        yield
+
+
+def test_histogram_RendersCumulativeBuckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    requests = registry.counter("requests", "Requests.", ("route",))
+
+    latency.observe(("/a",), 0.05)
+    latency.observe(("/a",), 0.5)
+    latency.observe(("/a",), 5)
+    requests.inc(("/a",))
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="/a"} 1.0' in lines
+
+def test_metricsEndpoint_ReportsRouteTemplateAndStatus():
+    client.get("/api/booking/get/bookingId/0123456789abcdef01234567")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'booking_http_requests_total{method="GET",route="/api/booking/get/bookingId/{bookingId}",status="404"}' in response.text
+    assert 'booking_http_request_duration_seconds_count{method="GET",route="/api/booking/get/bookingId/{bookingId}"}' in response.text
+
+def test_mongoCommandListener_RecordsLatencyAndErrors():
+    mongoCommandMetrics.succeeded(SimpleNamespace(command_name="testFind", duration_micros=1500))
+    mongoCommandMetrics.failed(SimpleNamespace(command_name="testFind", duration_micros=800))
+
+    text = client.get("/metrics").text
+
+    assert 'booking_mongo_command_duration_seconds_count{command="testFind"} 2' in text
+    assert 'booking_mongo_command_errors_total{command="testFind"} 1.0' in text
@@ -0,0 +1,73 @@
+import asyncio
+import httpx
+import mongomock
+from fastapi import FastAPI
+from app.controllers.bookingController import router as bookingController
+from app.core.profiling import ProfileBuffer, ProfiledService, ProfilingMiddleware, summarizeExplain
+from app.repositories.mongoBookingRepository import MongoBookingRepository
+from app.services.bookingService import BookingService
+
+BOOKING = {
+    "paymentId" : "test123",
+    "reservationDate" : {
+        "startFrom" : "2024-10-08T09:00:00",
+        "to" : "2024-10-08T11:00:00"
+    },
+    "reservationRequest" : "Window seat",
+    "guestNumber" : 2,
+    "costPerPerson" : 20
+}
+
+def buildApp(buffer: ProfileBuffer, slowSeconds: float, sampleRate: float = 0):
+    app = FastAPI()
+    app.include_router(bookingController, prefix="/api/booking")
+    app.state.bookingService = ProfiledService(BookingService(MongoBookingRepository(mongomock.MongoClient(), False)))
+    return ProfilingMiddleware(app, slowSeconds=slowSeconds, sampleRate=sampleRate, buffer=buffer)
+
+async def send(middleware, requests: list):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=middleware), base_url="http://profiling") as client:
+        for method, url, options in requests:
+            await client.request(method, url, **options)
+    await asyncio.gather(*middleware.tasks)
+
+def test_profilingMiddleware_RecordsPhasesCommandsAndExplain():
+    buffer = ProfileBuffer(10)
+    middleware = buildApp(buffer, slowSeconds=0)
+
+    asyncio.run(send(middleware, [
+        ("POST", "/api/booking/1/profiled/create", {"json": BOOKING}),
+        ("GET", "/api/booking/get/restaurantId/profiled", {})
+    ]))
+    latest, created = buffer.recent()
+
+    assert created["route"] == "/api/booking/{userId}/{restaurantId}/create" and created["status"] == 201
+    assert [call["name"] for call in created["serviceCalls"]] == ["createBooking"]
+    assert "insert_one" in [command["name"] for command in created["commands"]]
+    assert latest["path"] == "/api/booking/get/restaurantId/profiled" and latest["reason"] == "slow"
+    assert set(latest["phases"]) == {"parse", "service", "encode"}
+    assert [call["name"] for call in latest["serviceCalls"]] == ["getEtag", "getBookingByRestaurantId"]
+    assert "find" in [command["name"] for command in latest["commands"]]
+    assert latest["explain"]["command"] == "find"
+
+def test_profilingMiddleware_KeepsOnlySlowOrSampledRequestsInBoundedBuffer():
+    quiet = ProfileBuffer(10)
+    sampled = ProfileBuffer(2)
+    requests = [("GET", f"/api/booking/get/userId/{userId}", {}) for userId in range(3)]
+
+    asyncio.run(send(buildApp(quiet, slowSeconds=60), requests))
+    asyncio.run(send(buildApp(sampled, slowSeconds=60, sampleRate=1), requests))
+
+    assert quiet.recent() == []
+    assert [entry["path"] for entry in sampled.recent()] == ["/api/booking/get/userId/2", "/api/booking/get/userId/1"]
+    assert all(entry["reason"] == "sampled" and "explain" not in entry for entry in sampled.recent())
+
+def test_summarizeExplain_KeepsWinningPlanAndCounters():
+    explain = {
+        "queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}, "rejectedPlans": [{"stage": "COLLSCAN"}]},
+        "executionStats": {"nReturned": 3, "totalKeysExamined": 3, "totalDocsExamined": 3, "executionTimeMillis": 1, "executionStages": {}}
+    }
+
+    assert summarizeExplain(explain) == {
+        "winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}},
+        "executionStats": {"nReturned": 3, "totalKeysExamined": 3, "totalDocsExamined": 3, "executionTimeMillis": 1}
+    }
@@ -0,0 +1,142 @@
+import asyncio
+from datetime import datetime
+from bson import ObjectId
+from app.services.bookingStats import statsDeltas
+
+PROJECTION = {"restaurantId": 1, "guestNumber": 1, "status": 1, "reservationDate": 1}
+
+def buildBooking(restaurantId="r1", createdBy="1", hour=9, guestNumber=2):
+    return {
+        "_id": ObjectId(),
+        "restaurantId": restaurantId,
+        "created_by": createdBy,
+        "reservationDate": {"startFrom": datetime(2024, 10, 8, hour), "to": datetime(2024, 10, 8, hour + 2)},
+        "guestNumber": guestNumber,
+        "costPerPerson": 10,
+        "paymentStatus": "Unpaid",
+        "status": 1
+    }
+
+def test_findActive_PagesInIdOrder(repository):
+    bookings = [buildBooking(hour=hour) for hour in range(9, 14)] + [buildBooking(restaurantId="r2")]
+
+    async def run():
+        await repository.insertMany(bookings)
+        first = await repository.findActive({"restaurantId": "r1"}, PROJECTION, limit=3)
+        second = await repository.findActive({"restaurantId": "r1"}, PROJECTION, after=first[-1]["_id"], limit=3)
+        batches = [batch async for batch in repository.iterActive({"restaurantId": "r1"}, PROJECTION, 2)]
+        return first, second, batches
+
+    first, second, batches = asyncio.run(run())
+
+    assert [booking["_id"] for booking in first + second] == [booking["_id"] for booking in bookings[:5]]
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+def test_updateIfActive_ReturnsBeforeAndSkipsInactive(repository):
+    booking = buildBooking()
+
+    async def run():
+        await repository.insertOne(booking)
+        missing = await repository.updateIfActive(ObjectId(), {"status": 0}, PROJECTION)
+        before = await repository.updateIfActive(booking["_id"], {"status": 0}, PROJECTION)
+        again = await repository.updateIfActive(booking["_id"], {"guestNumber": 9}, PROJECTION)
+        active = await repository.findActive({"restaurantId": "r1"}, PROJECTION)
+        byId = await repository.findActiveById(booking["_id"], PROJECTION)
+        return missing, before, again, active, byId
+
+    missing, before, again, active, byId = asyncio.run(run())
+
+    assert missing is None
+    assert before["status"] == 1
+    assert again["status"] == 0 and again["guestNumber"] == 2
+    assert active == [] and byId is None
+
+def test_findActiveByDate_MatchesExactBounds(repository):
+    bookings = [buildBooking(hour=9), buildBooking(hour=10), buildBooking(hour=11)]
+
+    async def run():
+        await repository.insertMany(bookings)
+        return await repository.findActiveByDate(datetime(2024, 10, 8, 10), datetime(2024, 10, 8, 13), PROJECTION)
+
+    found = asyncio.run(run())
+
+    assert [booking["_id"] for booking in found] == [bookings[1]["_id"], bookings[2]["_id"]]
+
+def test_applyStats_AccumulatesAndFiltersByDay(repository):
+    booking = buildBooking(guestNumber=4)
+
+    async def run():
+        await repository.applyStats(statsDeltas("r1", removed=[], added=[booking]))
+        await repository.applyStats(statsDeltas("r1", removed=[], added=[booking]))
+        inRange = await repository.findStats("r1", "2024-10-01", "2024-10-31")
+        outOfRange = await repository.findStats("r1", "2024-11-01", "2024-11-30")
+        return inRange, outOfRange
+
+    inRange, outOfRange = asyncio.run(run())
+
+    assert len(inRange) == 1 and inRange[0]["day"] == "2024-10-08"
+    assert inRange[0]["bookings"] == 2 and inRange[0]["covers"] == 8
+    assert outOfRange == []
+
+def test_idempotencyKey_ReserveCompleteRelease(repository):
+    record = {"_id": "1:key", "fingerprint": "abc", "createdAt": datetime(2024, 10, 8)}
+
+    async def run():
+        reserved = await repository.reserveIdempotencyKey(record)
+        pending = await repository.reserveIdempotencyKey(dict(record))
+        await repository.completeIdempotencyKey("1:key", {"statusCode": 201, "bookingId": "b"})
+        completed = await repository.reserveIdempotencyKey(dict(record))
+        await repository.releaseIdempotencyKey("1:key")
+        released = await repository.reserveIdempotencyKey(dict(record))
+        return reserved, pending, completed, released
+
+    reserved, pending, completed, released = asyncio.run(run())
+
+    assert reserved is None and released is None
+    assert pending["fingerprint"] == "abc" and "result" not in pending
+    assert completed["result"] == {"statusCode": 201, "bookingId": "b"}
+
+def test_findActiveInRange_PagesByStartThenId(repository):
+    bookings = [buildBooking(hour=9), buildBooking(hour=9), buildBooking(hour=10), buildBooking(restaurantId="r2", hour=10), buildBooking(hour=12)]
+    bookings[1]["paymentStatus"] = "Paid"
+    start, to = datetime(2024, 10, 8, 9), datetime(2024, 10, 8, 12)
+
+    async def run():
+        await repository.insertMany(bookings)
+        first = await repository.findActiveInRange({"restaurantId": "r1"}, start, to, PROJECTION, limit=2)
+        after = (first[-1]["reservationDate"]["startFrom"], first[-1]["_id"])
+        second = await repository.findActiveInRange({"restaurantId": "r1"}, start, to, PROJECTION, after=after, limit=2)
+        paid = await repository.findActiveInRange({"paymentStatus": "Paid"}, start, to, PROJECTION)
+        everyone = await repository.findActiveInRange({}, start, to, PROJECTION)
+        return first, second, paid, everyone
+
+    first, second, paid, everyone = asyncio.run(run())
+
+    assert [booking["_id"] for booking in first + second] == [bookings[0]["_id"], bookings[1]["_id"], bookings[2]["_id"]]
+    assert [booking["_id"] for booking in paid] == [bookings[1]["_id"]]
+    assert len(everyone) == 4
+
+def test_bumpVersions_IncrementsPerKey(repository):
+    async def run():
+        missing = await repository.findVersion("restaurant:r1")
+        await repository.bumpVersions(["restaurant:r1", "user:1"])
+        await repository.bumpVersions(["restaurant:r1"])
+        return missing, await repository.findVersion("restaurant:r1"), await repository.findVersion("user:1")
+
+    missing, restaurant, user = asyncio.run(run())
+
+    assert missing is None
+    assert restaurant["version"] == 2 and user["version"] == 1
+    assert restaurant["epoch"] != user["epoch"]
+
+def test_findActiveByIds_SkipsMissingAndInactive(repository):
+    bookings = [buildBooking(), buildBooking(), buildBooking()]
+
+    async def run():
+        await repository.insertMany(bookings)
+        await repository.updateIfActive(bookings[1]["_id"], {"status": 0}, PROJECTION)
+        return await repository.findActiveByIds([bookings[2]["_id"], bookings[1]["_id"], ObjectId(), bookings[0]["_id"]], PROJECTION)
+
+    found = asyncio.run(run())
+
+    assert sorted(booking["_id"] for booking in found) == [bookings[0]["_id"], bookings[2]["_id"]]
@@ -0,0 +1,59 @@
+import json
+import pytest
+from datetime import datetime
+from bson import ObjectId
+from app.helpers.exception import BookingException
+from app.helpers.serializer import BOOKING_FIELDS, BookingResponse, BookingSerializer, bookingSerializer, dumps, projectionFor, selectFields, serializerFor
+from app.models.bookingBaseModel import BookingStatus, PaymentStatus
+
+
+booking = {
+    "_id": ObjectId("670ba40b57ee2ddfe948510e"),
+    "restaurantId": "1234567890abcdef",
+    "paymentId": "test123",
+    "reservationDate": {"startFrom": datetime(2024, 10, 8, 9, 0), "to": datetime(2024, 12, 8, 9, 0)},
+    "reservationRequest": "WHATISTHIS?",
+    "guestNumber": 5,
+    "costPerPerson": 20,
+    "totalAmount": 100,
+    "paymentStatus": PaymentStatus.unpaid,
+    "bookingStatus": BookingStatus.pending,
+    "created_by": "1",
+    "created_when": "13102024",
+    "updated_by": "1",
+    "updated_when": "13102024",
+    "status": 1
+}
+
+def test_dumpsBooking_ReturnSuccess():
+    content = json.loads(dumps(bookingSerializer.format(booking)))
+
+    assert content["bookingId"] == "670ba40b57ee2ddfe948510e"
+    assert content["reservationDate"] == {"startFrom": "2024-10-08T09:00:00+00:00", "to": "2024-12-08T09:00:00+00:00"}
+    assert content["paymentStatus"] == "Unpaid"
+    assert content["createdBy"] == "1"
+    assert "status" not in content
+
+def test_singleFieldSerializer_ReturnSuccess():
+    assert BookingSerializer((("bookingId", "_id"),)).format(booking) == {"bookingId": booking["_id"]}
+
+def test_bookingResponse_ReturnSuccess():
+    response = BookingResponse(status_code=200, content={"booking": bookingSerializer.format(booking)})
+
+    assert response.headers["content-type"] == "application/json"
+    assert json.loads(response.body)["booking"]["guestNumber"] == 5
+
+def test_selectFields_ReturnSchemaOrderedSubset():
+    fields = selectFields("reservationDate, restaurantId")
+
+    assert [key for key, _ in fields] == ["bookingId", "restaurantId", "reservationDate"]
+    assert projectionFor(fields) == {"_id": 1, "restaurantId": 1, "reservationDate": 1}
+    assert serializerFor(fields).format(booking) == {"bookingId": booking["_id"], "restaurantId": "1234567890abcdef", "reservationDate": booking["reservationDate"]}
+    assert selectFields(None) is BOOKING_FIELDS
+
+def test_selectFieldsUnknown_ReturnError():
+    with pytest.raises(BookingException) as e:
+        selectFields("restaurantId,status")
+
+    assert e.value.status_code == 400
+    assert e.value.detail == "unknown fields: status"
@@ -0,0 +1,29 @@
+from unittest.mock import patch
+import pytest
+from app.core.config import settings
+from app.core.server import serverOptions
+
+
+def test_serverOptions_ReturnProductionDefaults():
+    with patch.object(settings, "SERVER_WORKERS", 4), patch.object(settings, "BOOKING_REPOSITORY", "mongo"), patch.object(settings, "CACHE_BACKEND", "none"), patch.object(settings, "EVENT_SOURCE", "changeStream"):
+        options = serverOptions()
+
+    assert options["workers"] == 4
+    assert options["reload"] is False
+    assert options["loop"] == "auto" and options["http"] == "auto"
+    assert options["timeout_graceful_shutdown"] == settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS
+
+def test_serverOptionsReload_ReturnSingleWorker():
+    with patch.object(settings, "SERVER_WORKERS", 4), patch.object(settings, "SERVER_RELOAD", True):
+        assert serverOptions()["workers"] == 1
+
+def test_serverOptionsMemoryRepositoryManyWorkers_ReturnError():
+    with patch.object(settings, "SERVER_WORKERS", 2), patch.object(settings, "BOOKING_REPOSITORY", "memory"):
+        with pytest.raises(ValueError):
+            serverOptions()
+
+@pytest.mark.parametrize("setting, value", [("CACHE_BACKEND", "memory"), ("EVENT_SOURCE", "local")])
+def test_serverOptionsProcessLocalStateManyWorkers_ReturnError(setting, value):
+    with patch.object(settings, "SERVER_WORKERS", 2), patch.object(settings, "BOOKING_REPOSITORY", "mongo"), patch.object(settings, "CACHE_BACKEND", "none"), patch.object(settings, "EVENT_SOURCE", "changeStream"), patch.object(settings, setting, value):
+        with pytest.raises(ValueError):
+            serverOptions()
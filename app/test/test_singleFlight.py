@@ -0,0 +1,175 @@
+import asyncio
+import pytest
+from app.helpers.exception import BookingException
+from app.helpers.singleFlight import SingleFlight
+from app.repositories.inMemoryBookingRepository import InMemoryBookingRepository
+from app.services.bookingService import BookingService
+from app.test.conftest import buildMutation
+
+
+class SlowCall:
+    def __init__(self, result="rows", error=None):
+        self.calls = 0
+        self.result = result
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+def test_do_SharesConcurrentIdenticalCalls():
+    call = SlowCall()
+    other = SlowCall("other")
+
+    async def run():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do(("restaurantId", "r1"), call) for _ in range(5)), flight.do(("restaurantId", "r2"), other))
+        return flight, results
+
+    flight, results = asyncio.run(run())
+
+    assert call.calls == 1 and other.calls == 1
+    assert results == ["rows"] * 5 + ["other"]
+    assert flight.stats() == {"leader": 2, "shared": 4, "reused": 0, "inflight": 0, "reusable": 0}
+
+def test_do_SharesErrors():
+    call = SlowCall(error=BookingException(404, "Bookings not found."))
+
+    async def run():
+        flight = SingleFlight()
+        return await asyncio.gather(*(flight.do(("bookingId", "b1"), call) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert call.calls == 1
+    assert all(isinstance(result, BookingException) and result.status_code == 404 for result in results)
+
+def test_do_LeaderCancellationKeepsFollowersRunning():
+    call = SlowCall()
+
+    async def run():
+        flight = SingleFlight()
+        leader = asyncio.ensure_future(flight.do(("userId", "1"), call))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do(("userId", "1"), call))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == "rows"
+    assert call.calls == 1
+
+def test_do_ReusesResultWithinWindow():
+    call = SlowCall()
+
+    async def run():
+        flight = SingleFlight(reuseSeconds=0.05)
+        first = await flight.do(("restaurantId", "r1"), call)
+        second = await flight.do(("restaurantId", "r1"), call)
+        await asyncio.sleep(0.06)
+        third = await flight.do(("restaurantId", "r1"), call)
+        return flight, [first, second, third]
+
+    flight, results = asyncio.run(run())
+
+    assert results == ["rows"] * 3
+    assert call.calls == 2
+    assert flight.outcomes["reused"] == 1
+
+def test_getBookingByRestaurantIdConcurrent_RunsOneQuery():
+    repository = InMemoryBookingRepository()
+    service = BookingService(repository)
+    queries = []
+    findActive = repository.findActive
+
+    async def countingFindActive(*args, **kwargs):
+        queries.append(args[0])
+        await asyncio.sleep(0.01)
+        return await findActive(*args, **kwargs)
+
+    repository.findActive = countingFindActive
+    mutation = buildMutation()
+
+    async def run():
+        await service.createBooking(mutation, "1", "r1")
+        return await asyncio.gather(*(service.getBookingByRestaurantId("r1") for _ in range(10)))
+
+    responses = asyncio.run(run())
+
+    assert len(queries) == 1
+    assert all(response["bookings"] == responses[0]["bookings"] for response in responses)
+    assert service.singleFlight.stats()["shared"] == 9
+
+def test_forget_LaterCallersStartFreshCall():
+    call = SlowCall()
+
+    async def run():
+        flight = SingleFlight(reuseSeconds=1)
+        first = asyncio.ensure_future(flight.do(("bookingId", "b1", False), call))
+        await asyncio.sleep(0)
+        flight.forget(("bookingId", "b1"))
+        second = await flight.do(("bookingId", "b1", False), call)
+        await first
+        flight.forget(("bookingId", "b1"))
+        third = await flight.do(("bookingId", "b1", False), call)
+        return flight, [await first, second, third]
+
+    flight, results = asyncio.run(run())
+
+    assert results == ["rows"] * 3
+    assert call.calls == 3
+    assert flight.outcomes["shared"] == 0 and flight.outcomes["reused"] == 0
+
+def test_getBookingByIdCancelledDuringFlight_ReturnNotFound():
+    repository = InMemoryBookingRepository()
+    service = BookingService(repository)
+    findActiveById = repository.findActiveById
+
+    async def slowFindActiveById(*args, **kwargs):
+        booking = await findActiveById(*args, **kwargs)
+        await asyncio.sleep(0.02)
+        return booking
+
+    mutation = buildMutation()
+
+    async def run():
+        bookingId = (await service.createBooking(mutation, "1", "r1"))["bookingId"]
+        repository.findActiveById = slowFindActiveById
+        before = asyncio.ensure_future(service.getBookingById(bookingId))
+        await asyncio.sleep(0.005)
+        await service.cancelBooking(bookingId, "1")
+        with pytest.raises(BookingException) as e:
+            await service.getBookingById(bookingId)
+        return await before, e.value.status_code
+
+    before, afterStatus = asyncio.run(run())
+
+    assert before["statusCode"] == 200
+    assert afterStatus == 404
+
+def test_getBookingByRestaurantIdNewerVersion_StartsFreshQuery():
+    repository = InMemoryBookingRepository()
+    service = BookingService(repository)
+    queries = []
+    findActive = repository.findActive
+
+    async def countingFindActive(*args, **kwargs):
+        queries.append(args[0])
+        await asyncio.sleep(0.01)
+        return await findActive(*args, **kwargs)
+
+    repository.findActive = countingFindActive
+    mutation = buildMutation()
+
+    async def run():
+        await service.createBooking(mutation, "1", "r1")
+        # another worker's write moved the version while the first query ran
+        return await asyncio.gather(service.getBookingByRestaurantId("r1", version='"1.1"'), service.getBookingByRestaurantId("r1", version='"1.2"'))
+
+    asyncio.run(run())
+
+    assert len(queries) == 2
+    assert service.singleFlight.stats()["shared"] == 0
@@ -0,0 +1,128 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+RESTAURANTS = 10
+USERS = 50
+
+def buildMutation(index: int) -> dict:
+    start = datetime(2024, 10, 1, 9, 0) + timedelta(hours=index % 720)
+    return {
+        "paymentId": f"payment{index}",
+        "reservationDate": {"startFrom": start.isoformat(), "to": (start + timedelta(hours=2)).isoformat()},
+        "reservationRequest": "Window seat please",
+        "guestNumber": 1 + index % 8,
+        "costPerPerson": 25
+    }
+
+def percentile(latencies: list, fraction: float) -> float:
+    index = min(len(latencies) - 1, max(0, round(fraction * len(latencies)) - 1))
+    return latencies[index]
+
+def summarize(latencies: list, elapsed: float, errors: int) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 1),
+        "p50Ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95Ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99Ms": round(percentile(latencies, 0.99) * 1000, 3)
+    }
+
+async def seed(client, bookings: int, chunkSize: int) -> list:
+    bookingIds = []
+    for start in range(0, bookings, chunkSize):
+        indexes = range(start, min(start + chunkSize, bookings))
+        restaurantId = f"restaurant{start // chunkSize % RESTAURANTS}"
+        userId = str(start // chunkSize % USERS)
+        response = await client.post(f"/api/booking/{userId}/{restaurantId}/createBulk", json=[buildMutation(index) for index in indexes])
+        bookingIds.extend(result["bookingId"] for result in response.json()["results"] if result["statusCode"] == 201)
+    return bookingIds
+
+def scenarios(bookingIds: list) -> dict:
+    updateIds = iter(bookingIds[:len(bookingIds) // 2])
+    cancelIds = iter(bookingIds[len(bookingIds) // 2:])
+    restaurant = lambda index: f"restaurant{index % RESTAURANTS}"
+    return {
+        "create": lambda index: ("POST", f"/api/booking/1/{restaurant(index)}/create", {"json": buildMutation(index)}),
+        "createBulk": lambda index: ("POST", f"/api/booking/1/{restaurant(index)}/createBulk", {"json": [buildMutation(index + offset) for offset in range(10)]}),
+        "getByRestaurantId": lambda index: ("GET", f"/api/booking/get/restaurantId/{restaurant(index)}", {}),
+        "exportByRestaurantId": lambda index: ("GET", f"/api/booking/export/restaurantId/{restaurant(index)}", {"headers": {"Accept-Encoding": "gzip"}}),
+        "getByUserId": lambda index: ("GET", f"/api/booking/get/userId/{index % USERS}", {}),
+        "getByBookingId": lambda index: ("GET", f"/api/booking/get/bookingId/{random.choice(bookingIds)}", {}),
+        "getByBookingIds": lambda index: ("POST", "/api/booking/get/bookingIds", {"json": random.sample(bookingIds, min(100, len(bookingIds)))}),
+        "getByDate": lambda index: ("GET", "/api/booking/get/date", {"json": {"startFrom": buildMutation(index)["reservationDate"]["startFrom"], "to": None}}),
+        "search": lambda index: ("GET", "/api/booking/search", {"params": {"from": "2024-10-08T00:00:00", "to": "2024-10-15T00:00:00", "restaurantId": restaurant(index)}}),
+        "availability": lambda index: ("GET", f"/api/booking/availability/restaurantId/{restaurant(index)}", {"params": {"startFrom": "2024-10-08T09:00:00", "to": "2024-10-08T21:00:00"}}),
+        "stats": lambda index: ("GET", f"/api/booking/stats/restaurantId/{restaurant(index)}", {"params": {"startFrom": "2024-10-01", "to": "2024-10-31"}}),
+        "cacheStats": lambda index: ("GET", "/api/booking/cache/stats", {}),
+        "update": lambda index: ("PUT", f"/api/booking/1/update/{next(updateIds)}", {"json": dict(buildMutation(index), paymentStatus="Paid")}),
+        "cancel": lambda index: ("DELETE", f"/api/booking/1/cancel/{next(cancelIds)}", {})
+    }
+
+async def runScenario(client, requestFor, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(index: int):
+        nonlocal errors
+        method, url, options = requestFor(index)
+        async with semaphore:
+            startedAt = time.perf_counter()
+            response = await client.request(method, url, **options)
+            latencies.append(time.perf_counter() - startedAt)
+        if response.status_code >= 400:
+            errors += 1
+
+    startedAt = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    return summarize(latencies, time.perf_counter() - startedAt, errors)
+
+async def main(args):
+    os.environ["BOOKING_REPOSITORY"] = args.repository
+    import httpx
+    from main import app
+    from app.core.config import settings
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        # one chunk per user at least, so every user and restaurant has bookings to read back
+        bookingIds = await seed(client, args.bookings, max(1, min(settings.BULK_CREATE_MAX, args.bookings // USERS)))
+        # update and cancel each consume one distinct booking per request
+        requests = min(args.requests, len(bookingIds) // 2)
+        results = {}
+        for name, requestFor in scenarios(bookingIds).items():
+            if args.endpoint and name not in args.endpoint:
+                continue
+            results[name] = await runScenario(client, requestFor, requests, args.concurrency)
+            print(f"{name:<22} {results[name]['throughput']:>9} req/s  p50 {results[name]['p50Ms']:>8} ms  p95 {results[name]['p95Ms']:>8} ms  p99 {results[name]['p99Ms']:>8} ms  errors {results[name]['errors']}")
+
+    report = {
+        "repository": args.repository,
+        "bookings": args.bookings,
+        "concurrency": args.concurrency,
+        "requests": requests,
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive every booking endpoint in-process and report throughput and p50/p95/p99 latency.")
+    parser.add_argument("--repository", choices=["memory", "mongo"], default="memory")
+    parser.add_argument("--bookings", type=int, default=5000, help="bookings seeded before measuring")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--endpoint", action="append", help="only run the named endpoint (repeatable)")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    random.seed(0)
+    asyncio.run(main(args))
@@ -0,0 +1,78 @@
+import argparse
+import asyncio
+import os
+import time
+from unittest.mock import patch
+from benchmarks.apiBenchmark import summarize
+
+class RoundTripRepository:
+    """Holds one of poolSize connections for a fixed delay on every insert, so
+    the in-memory repository pays a round trip and write-concern wait the way a
+    pooled driver does."""
+
+    def __init__(self, repository, latencySeconds: float, poolSize: int):
+        self.repository = repository
+        self.latencySeconds = latencySeconds
+        self.connections = asyncio.Semaphore(poolSize)
+
+    def __getattr__(self, name):
+        return getattr(self.repository, name)
+
+    async def insertOne(self, bookingData: dict):
+        async with self.connections:
+            await asyncio.sleep(self.latencySeconds)
+            return await self.repository.insertOne(bookingData)
+
+    async def insertMany(self, documents: list) -> list:
+        async with self.connections:
+            await asyncio.sleep(self.latencySeconds)
+            return await self.repository.insertMany(documents)
+
+async def run(coalesce: bool, args) -> dict:
+    from app.core.config import settings
+    from app.core.database import createBookingRepository
+    from app.models.bookingBaseModel import BookingMutation
+    from app.services.bookingService import BookingService
+    from benchmarks.apiBenchmark import buildMutation
+
+    with patch.object(settings, "COALESCE_INSERTS", coalesce), patch.object(settings, "COALESCE_WINDOW_MS", args.windowMs), patch.object(settings, "COALESCE_MAX_BATCH", args.maxBatch):
+        service = BookingService(RoundTripRepository(createBookingRepository(), args.latencyMs / 1000, args.poolSize))
+    mutations = [BookingMutation(**buildMutation(index)) for index in range(args.bookings)]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    errors = 0
+
+    async def create(mutation):
+        nonlocal errors
+        async with semaphore:
+            startedAt = time.perf_counter()
+            try:
+                await service.createBooking(mutation, "1", "restaurant0")
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - startedAt)
+
+    startedAt = time.perf_counter()
+    await asyncio.gather(*(create(mutation) for mutation in mutations))
+    result = summarize(latencies, time.perf_counter() - startedAt, errors)
+    if service.coalescer is not None:
+        result["averageBatch"] = service.coalescer.stats()["averageBatch"]
+    await service.close()
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare createBooking throughput with and without the insert coalescer.")
+    parser.add_argument("--repository", choices=["memory", "mongo"], default="memory")
+    parser.add_argument("--bookings", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latencyMs", type=float, default=1.0, help="simulated round trip added to every insert call")
+    parser.add_argument("--poolSize", type=int, default=10, help="connections available to the simulated inserts")
+    parser.add_argument("--windowMs", type=float, default=2)
+    parser.add_argument("--maxBatch", type=int, default=100)
+    args = parser.parse_args()
+
+    os.environ["BOOKING_REPOSITORY"] = args.repository
+    for name, coalesce in [("insertOne", False), ("coalesced", True)]:
+        result = asyncio.run(run(coalesce, args))
+        batch = f"  avg batch {result['averageBatch']}" if "averageBatch" in result else ""
+        print(f"{name:<10} {result['throughput']:>9} req/s  p50 {result['p50Ms']:>8} ms  p99 {result['p99Ms']:>8} ms  errors {result['errors']}{batch}")
@@ -0,0 +1,59 @@
+import argparse
+import timeit
+from datetime import datetime, timedelta
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from app.helpers.serializer import BookingResponse, bookingSerializer
+
+def buildBookings(count: int) -> list:
+    start = datetime(2024, 10, 8, 9, 0)
+    return [{
+        "_id": ObjectId(),
+        "restaurantId": "1234567890abcdef",
+        "paymentId": f"payment{index}",
+        "reservationDate": {"startFrom": start + timedelta(hours=index), "to": start + timedelta(hours=index + 2)},
+        "reservationRequest": "Window seat please",
+        "guestNumber": 4,
+        "costPerPerson": 25,
+        "totalAmount": 100,
+        "paymentStatus": "Unpaid",
+        "bookingStatus": "Pending",
+        "created_by": "1",
+        "created_when": "13102024",
+        "updated_by": "1",
+        "updated_when": "13102024"
+    } for index in range(count)]
+
+def legacyPath(bookings: list) -> bytes:
+    bookingList = [{
+        "bookingId": str(booking["_id"]),
+        "restaurantId": str(booking["restaurantId"]),
+        "paymentId": booking["paymentId"],
+        "reservationDate": str(booking["reservationDate"]),
+        "reservationRequest": booking["reservationRequest"],
+        "guestNumber": booking["guestNumber"],
+        "costPerPerson": booking["costPerPerson"],
+        "totalAmount": booking["totalAmount"],
+        "paymentStatus": booking["paymentStatus"],
+        "bookingStatus": booking["bookingStatus"],
+        "createdBy": booking["created_by"],
+        "createdWhen": booking["created_when"],
+        "updatedBy": booking["updated_by"],
+        "updatedWhen": booking["updated_when"]
+    } for booking in bookings]
+    return JSONResponse(status_code=200, content={"message": "Bookings fetched successfully", "bookings": bookingList}).body
+
+def serializerPath(bookings: list) -> bytes:
+    bookingList = [bookingSerializer.format(booking) for booking in bookings]
+    return BookingResponse(status_code=200, content={"message": "Bookings fetched successfully", "bookings": bookingList}).body
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the legacy dict + JSONResponse path with BookingSerializer + BookingResponse.")
+    parser.add_argument("--bookings", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    bookings = buildBookings(args.bookings)
+    for name, path in [("legacy", legacyPath), ("serializer", serializerPath)]:
+        best = min(timeit.repeat(lambda: path(bookings), number=1, repeat=args.repeat))
+        print(f"{name:<10} {best * 1000:8.3f} ms per {args.bookings} bookings ({len(path(bookings))} bytes)")
@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from benchmarks.apiBenchmark import buildMutation, summarize
+
+def startServer(workers: int, port: int, env: dict):
+    env = {**os.environ, **env, "SERVER_WORKERS": str(workers), "SERVER_PORT": str(port), "SERVER_HOST": "127.0.0.1", "SERVER_RELOAD": "false"}
+    return subprocess.Popen([sys.executable, "-m", "app.core.server"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+async def waitReady(baseUrl: str, workers: int, timeoutSeconds: float = 30):
+    import httpx
+    deadline = time.monotonic() + timeoutSeconds
+    ready = 0
+    async with httpx.AsyncClient(base_url=baseUrl) as client:
+        # new connections are spread over the workers, so a run of successful
+        # probes means every worker has finished its lifespan startup
+        while ready < workers * 4:
+            if time.monotonic() > deadline:
+                raise TimeoutError("server did not become ready")
+            try:
+                response = await client.get("/health/ready", headers={"Connection": "close"})
+                ready = ready + 1 if response.status_code == 200 else 0
+            except httpx.TransportError:
+                ready = 0
+                await asyncio.sleep(0.2)
+
+async def drive(baseUrl: str, scenario: str, requests: int, concurrency: int, offset: int):
+    import httpx
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(index: int):
+        nonlocal errors
+        async with semaphore:
+            startedAt = time.perf_counter()
+            if scenario == "create":
+                response = await client.post(f"/api/booking/1/restaurant{index % 10}/create", json=buildMutation(index))
+            else:
+                response = await client.get("/health/live")
+            latencies.append(time.perf_counter() - startedAt)
+        if response.status_code >= 400:
+            errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=baseUrl, limits=limits) as client:
+        await asyncio.gather(*(one(offset + index) for index in range(requests)))
+    return latencies, errors
+
+def driveProcess(baseUrl: str, scenario: str, requests: int, concurrency: int, offset: int):
+    return asyncio.run(drive(baseUrl, scenario, requests, concurrency, offset))
+
+def measure(baseUrl: str, args) -> dict:
+    # several client processes, so the load generator is not the single-core bottleneck
+    with ProcessPoolExecutor(args.clients) as pool:
+        startedAt = time.perf_counter()
+        futures = [pool.submit(driveProcess, baseUrl, args.scenario, args.requests // args.clients, args.concurrency, client * args.requests) for client in range(args.clients)]
+        results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - startedAt
+    latencies = [latency for clientLatencies, _ in results for latency in clientLatencies]
+    return summarize(latencies, elapsed, sum(errors for _, errors in results))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Start the production launcher with 1..N workers and compare throughput over real HTTP.")
+    parser.add_argument("--workers", type=int, action="append", help="worker counts to compare (repeatable, default 1 2 4)")
+    parser.add_argument("--scenario", choices=["create", "live"], default="create")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32, help="in-flight requests per client process")
+    parser.add_argument("--clients", type=int, default=4, help="load generator processes")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--mongo", action="store_true", help="use MONGODB_URI instead of a mocked Mongo per worker")
+    args = parser.parse_args()
+
+    # the launcher refuses several workers over the per-process cache
+    env = {"METRICS_ENABLED": os.environ.get("METRICS_ENABLED", "true"), "CACHE_BACKEND": os.environ.get("CACHE_BACKEND", "none")}
+    if not args.mongo:
+        env.update({"BOOKING_REPOSITORY": "mongo", "MONGODB_MOCK": "true"})
+    baseUrl = f"http://127.0.0.1:{args.port}"
+    for workers in args.workers or [1, 2, 4]:
+        server = startServer(workers, args.port, env)
+        try:
+            asyncio.run(waitReady(baseUrl, workers))
+            result = measure(baseUrl, args)
+        finally:
+            # SIGTERM goes through the same graceful drain as a production stop
+            server.send_signal(signal.SIGTERM)
+            server.wait(60)
+        print(f"{workers} worker(s) {result['throughput']:>9} req/s  p50 {result['p50Ms']:>8} ms  p99 {result['p99Ms']:>8} ms  errors {result['errors']}")
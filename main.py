@@ -1,9 +1,48 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.controllers.bookingController import router as bookingController
-app = FastAPI()
+from app.controllers.debugController import router as debugController
+from app.controllers.healthController import router as healthController
+from app.controllers.metricsController import router as metricsController
+from app.core.compression import CompressionMiddleware
+from app.core.config import settings
+from app.core.database import createBookingRepository
+from app.core.metrics import MetricsMiddleware
+from app.core.profiling import ProfiledService, ProfilingMiddleware
+from app.services.bookingService import BookingService
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    bookingService = BookingService(createBookingRepository())
+    # opens the pool and pings the server, so a worker that cannot reach
+    # MongoDB fails startup instead of failing its first requests
+    await bookingService.repository.warmUp(settings.MONGO_WARMUP_CONNECTIONS)
+    if settings.ENSURE_INDEXES:
+        await bookingService.repository.ensureIndexes()
+    await bookingService.events.start(bookingService.repository)
+    app.state.bookingService = ProfiledService(bookingService) if settings.PROFILING_ENABLED else bookingService
+    try:
+        yield
+    finally:
+        app.state.bookingService = None
+        await bookingService.close()
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(bookingController, prefix="/api/booking")
+app.include_router(healthController, prefix="/health")
+
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimumSize=settings.COMPRESSION_MIN_SIZE, level=settings.COMPRESSION_LEVEL)
+
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware, slowSeconds=settings.PROFILING_SLOW_MS / 1000, sampleRate=settings.PROFILING_SAMPLE_RATE, explain=settings.PROFILING_EXPLAIN)
+    app.include_router(debugController, prefix="/debug")
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metricsController)
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("main:app", host="127.0.0.1", port=8001, reload=True)
\ No newline at end of file
+    from app.core.server import run
+    run()